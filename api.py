@@ -0,0 +1,163 @@
+"""JSON read API serving the whole CV in one request, or one section at a time."""
+from contextlib import ExitStack  # Shares one pooled connection across several section loads
+import mysql.connector  # Database errors raised while loading sections
+from flask import Blueprint, current_app, request, url_for  # Blueprint for the /api routes
+from db import db_connection  # Pooled connections
+from pagination import PageRequest, InvalidPageRequest  # Keyset pagination for section endpoints
+from tenants import current_tenant  # Sections are read for the tenant being served
+
+try:
+    import orjson  # Optional: several times faster than the json module
+except ImportError:
+    orjson = None
+    import json
+
+# URL segment -> table name for every CV section
+SECTIONS = {
+    'personal-info': 'personal_info',
+    'education': 'education',
+    'work-experience': 'work_experience',
+    'skills': 'skills',
+    'projects': 'projects',
+}
+
+
+class SectionUnavailable(Exception):
+    """Raised when no database connection could be obtained."""
+
+
+def dumps(data):
+    """Serialise data to JSON bytes, turning dates and decimals into strings."""
+    if orjson:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, default=str, separators=(',', ':')).encode()
+
+
+def json_response(data, status=200):
+    """Build a JSON response from a Python object."""
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+
+def parse_fields(value, columns):
+    """Validate a comma-separated ?fields= list against the available columns."""
+    if not value:
+        return list(columns)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise InvalidPageRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def to_dicts(rows, columns, fields):
+    """Turn row tuples into dicts holding only the requested fields."""
+    indexes = [(field, columns.index(field)) for field in fields]
+    return [{field: row[index] for field, index in indexes} for row in rows]
+
+
+def section_selects(listings):
+    """Return the whole-table query of every listing, built once so prepared statements are reused."""
+    return {table: listing.select() + " WHERE tenant_id = %s ORDER BY id" for table, listing in listings.items()}
+
+
+def load_sections(query_cache, selects, tables):
+    """Load whole tables from the cache, querying misses over a single pooled connection.
+
+    Misses are queried one after another. A multi-statement round trip would
+    need CLIENT_MULTI_STATEMENTS and the text protocol on every pooled
+    connection, giving up the prepared statements; running them concurrently
+    would take a connection per section. Both cost more than the round trips
+    they save, and a warm cache answers without any query at all.
+    """
+    with ExitStack() as stack:
+        connection = []  # Opened on the first cache miss, then reused
+
+        def load(table):
+            if not connection:
+                mydb = stack.enter_context(db_connection(reads=tuple(tables)))  # Borrow a pooled connection, a replica if allowed
+                if not mydb:
+                    raise SectionUnavailable()
+                connection.append(mydb)
+            return connection[0].prepared(selects[table]).execute((current_tenant(),)).fetchall()  # Fetch the whole section
+
+        return {table: query_cache.get_or_load(table, lambda table=table: load(table), key='api') for table in tables}
+
+
+def create_api(listings, query_cache, page_cache, page_size=50, max_page_size=200):
+    """Build the /api blueprint on top of the app's listings and caches."""
+    api = Blueprint('api', __name__, url_prefix='/api')
+    selects = section_selects(listings)
+
+    @page_cache.page(*SECTIONS.values())
+    def cv():
+        """Return every CV section in one JSON document."""
+        names = request.args.get('sections')
+        names = [name.strip() for name in names.split(',')] if names else list(SECTIONS)
+        if any(name not in SECTIONS for name in names):
+            return json_response({'error': f"Unknown section; choose from {', '.join(SECTIONS)}"}, 400)
+        selected = {}  # table -> requested fields, from ?fields=section.column,...
+        try:
+            for item in filter(None, (item.strip() for item in (request.args.get('fields') or '').split(','))):
+                name, _, field = item.partition('.')
+                if not name or not field.strip():
+                    raise InvalidPageRequest(f"Invalid field {item!r}; use section.column")
+                selected.setdefault(SECTIONS.get(name, name), []).append(field.strip())
+            for table, fields in selected.items():
+                if table not in listings:
+                    raise InvalidPageRequest(f"Unknown section: {table}")
+                parse_fields(','.join(fields), listings[table].columns)
+        except InvalidPageRequest as err:
+            return json_response({'error': str(err)}, 400)
+        try:
+            data = load_sections(query_cache, selects, [SECTIONS[name] for name in names])
+        except SectionUnavailable:
+            return json_response({'error': "Database connection failed."}, 503)
+        except mysql.connector.Error as err:
+            print(f"Error loading CV: {err}")  # Log any database errors
+            return json_response({'error': "Unable to load the CV."}, 500)
+        result = {}
+        for name in names:
+            table = SECTIONS[name]
+            columns = listings[table].columns
+            result[table] = to_dicts(data[table], columns, selected.get(table, columns))
+        return json_response(result)
+
+    api.add_url_rule('/cv', 'cv', cv)
+
+    def section_view(name, table):
+        """Build the view returning one page of a single section."""
+        @page_cache.page(table)
+        def section():
+            listing = listings[table]
+            try:
+                fields = parse_fields(request.args.get('fields'), listing.columns)
+                page_request = PageRequest(listing, request.args, page_size, max_page_size)
+            except InvalidPageRequest as err:
+                return json_response({'error': str(err)}, 400)
+            sql, params = page_request.query()  # Keyset query for just this page
+
+            def load():
+                with db_connection(reads=(table,)) as mydb:  # Borrow a pooled connection, a replica if allowed
+                    if not mydb:
+                        raise SectionUnavailable()
+                    return mydb.prepared(sql).execute(params).fetchall()
+            try:
+                rows = query_cache.get_or_load(table, load, key=page_request.cache_key())
+            except SectionUnavailable:
+                return json_response({'error': "Database connection failed."}, 503)
+            except mysql.connector.Error as err:
+                print(f"Error loading {table}: {err}")  # Log any database errors
+                return json_response({'error': f"Unable to load {name}."}, 500)
+            page = page_request.page(rows)
+            return json_response({
+                'items': to_dicts(page.rows, listing.columns, fields),
+                'next': page.next_args and url_for(request.endpoint, fields=request.args.get('fields'), **page.next_args),
+                'prev': page.prev_args and url_for(request.endpoint, fields=request.args.get('fields'), **page.prev_args),
+            })
+        section.__name__ = table
+        return section
+
+    for name, table in SECTIONS.items():
+        api.add_url_rule(f'/{name}', table, section_view(name, table))
+
+    return api
@@ -1,646 +1,434 @@
 import os  # Importing the OS module for operating system dependent functionality
-from dotenv import load_dotenv  # Importing dotenv to load environment variables from a .env file
+from datetime import date  # Parses the date filters of the projects listing
 import mysql.connector  # Importing mysql.connector to connect to a MySQL database
-from flask import Flask, render_template, request, redirect, url_for  # Importing Flask and necessary functions for web development
-
-# Load environment variables from the .env file
-load_dotenv()
-
-# Access the environment variables
-DB_HOST = os.getenv('DB_HOST')  # Database host
-DB_USER = os.getenv('DB_USER')  # Database user
-DB_PASSWORD = os.getenv('DB_PASSWORD')  # Database password
-DB_NAME = os.getenv('DB_NAME')  # Database name
-
-app = Flask(__name__)  # Creating a Flask application instance
-
-def get_db_connection():
-    """Establish a connection to the MySQL database."""
-    try:
-        mydb = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return mydb  # Return the database connection object
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")  # Print the error if connection fails
-        return None  # Return None if the connection fails
-
-# Home Page Route
-@app.route('/')
-def home():
-    """Render the home page."""
-    return render_template('index.html')
-
-# Personal Information Page Route
-@app.route('/personal-info')
-def personal_info():
-    """Render the personal information page with data from the database."""
-    mydb = get_db_connection()  # Get database connection
-    if mydb:
-        try:
-            cursor = mydb.cursor()  # Create a cursor object to interact with the database
-            cursor.execute("SELECT name, email, phone, bio, id FROM personal_info")
-            personal_info_data = cursor.fetchall()  # Fetch all rows from the query
-            cursor.close()  # Close the cursor
-            mydb.close()    # Close the connection
-            return render_template('personal_info.html', personal_info=personal_info_data)  # Render template with data
-        except mysql.connector.Error as err:
-            print(f"Error fetching personal info: {err}")  # Print error if query fails
-            return render_template('error.html', error_message="Unable to load personal information.")  # Render error template
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Add New Personal Information
-@app.route('/add-personal-info', methods=['GET', 'POST'])
-def add_personal_info():
-    """Handle adding new personal information."""
-    if request.method == 'POST':  # Check if the request method is POST
-        name = request.form['name']  # Get name from form data
-        email = request.form['email']  # Get email from form data
-        phone = request.form['phone']  # Get phone from form data
-        bio = request.form['bio']  # Get bio from form data
-
-        mydb = get_db_connection()  # Get database connection
-        if mydb:
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = "INSERT INTO personal_info (name, email, phone, bio) VALUES (%s, %s, %s, %s)"  # SQL query to insert data
-                values = (name, email, phone, bio)  # Values to insert
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the connection
-                return redirect(url_for('personal_info'))  # Redirect to the personal info page
-            except mysql.connector.Error as err:
-                print(f"Error inserting personal information: {err}")  # Print error if insertion fails
-                return render_template('error.html', error_message="Unable to add personal information.")  # Render error template
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-    
-    return render_template('add_personal_info.html')  # Render the form for adding personal info
-
-# Route to Edit Personal Information
-@app.route('/edit-personal-info/<int:id>', methods=['GET', 'POST'])
-def edit_personal_info(id):
-    """Handle editing existing personal information."""
-    mydb = get_db_connection()  # Get database connection
-
-    if request.method == 'POST':  # Check if the request method is POST
-        name = request.form['name']  # Get name from form data
-        email = request.form['email']  # Get email from form data
-        phone = request.form['phone']  # Get phone from form data
-        bio = request.form['bio']  # Get bio from form data
-
-        if mydb:
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = """
-                    UPDATE personal_info
-                    SET name=%s, email=%s, phone=%s, bio=%s
-                    WHERE id=%s
-                """  # SQL query to update data
-                values = (name, email, phone, bio, id)  # Values to update
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the connection
-
-                return redirect(url_for('personal_info'))  # Redirect to the personal info page
-            except mysql.connector.Error as err:
-                return render_template('error.html', error_message="Unable to update personal information.")  # Render error template
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template
-    else:
-        if mydb:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "SELECT name, email, phone, bio FROM personal_info WHERE id=%s"  # SQL query to fetch specific personal info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            personal_info_data = cursor.fetchone()  # Fetch the single record
-
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the connection
-
-            return render_template('edit_personal_info.html', personal_info=personal_info_data)  # Render edit form with data
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template
-
-# Route to Delete Personal Information
-@app.route('/delete-personal-info/<int:id>', methods=['GET'])
-def delete_personal_info(id):
-    """Handle deleting personal information."""
-    mydb = get_db_connection()  # Get database connection
-
-    if mydb:
-        try:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "DELETE FROM personal_info WHERE id = %s"  # SQL query to delete personal info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            mydb.commit()  # Commit the changes to the database
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the connection
-            return redirect(url_for('personal_info'))  # Redirect to the personal info page
-        except mysql.connector.Error as err:
-            print(f"Error deleting personal info: {err}")  # Print error if deletion fails
-            return render_template('error.html', error_message="Unable to delete the personal info.")  # Render error template
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template
-
-# Education Page Route
-@app.route('/education')
-def education():
-    """Render the education page with data from the database."""
-    mydb = get_db_connection()  # Get database connection
-    if mydb:
-        try:
-            cursor = mydb.cursor()  # Create a cursor object
-            cursor.execute("SELECT school, achievement, start_year, end_year, id FROM education")  # SQL query to fetch education data
-            education_data = cursor.fetchall()  # Fetch all the records
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the connection
-            return render_template('education.html', education=education_data)  # Render template with education data
-        except mysql.connector.Error as err:
-            print(f"Error fetching education data: {err}")  # Print error if query fails
-            return render_template('error.html', error_message="Unable to load education data.")  # Render error template
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template
-
-# Route to Add New Education
-@app.route('/add-education', methods=['GET', 'POST'])
-def add_education():
-    """Handle adding new education information."""
-    if request.method == 'POST':  # Check if the request method is POST
-        school = request.form['school']  # Get school name from form data
-        achievement = request.form['achievement']  # Get achievement from form data
-        start_year = request.form['start_year']  # Get start year from form data
-        end_year = request.form['end_year']  # Get end year from form data
-
-        mydb = get_db_connection()  # Get database connection
-        if mydb:
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = "INSERT INTO education (school, achievement, start_year, end_year) VALUES (%s, %s, %s, %s)"  # SQL query to insert data
-                values = (school, achievement, start_year, end_year)  # Values to insert
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the connection
-                return redirect(url_for('education'))  # Redirect to the education page
-            except mysql.connector.Error as err:
-                print(f"Error inserting education information: {err}")  # Print error if insertion fails
-                return render_template('error.html', error_message="Unable to add education information.")  # Render error template
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template
-    
-    return render_template('add_education.html')  # Render the form for adding education info
-
-# Route to Edit Education Information
-@app.route('/edit-education/<int:id>', methods=['GET', 'POST'])
-def edit_education(id):
-    """Handle editing existing education information."""
-    mydb = get_db_connection()  # Get database connection
-
-    if request.method == 'POST':  # Check if the request method is POST
-        school = request.form['school']  # Get school name from form data
-        achievement = request.form['achievement']  # Get achievement from form data
-        start_year = request.form['start_year']  # Get start year from form data
-        end_year = request.form['end_year']  # Get end year from form data
-
-        if mydb:
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = """
-                    UPDATE education
-                    SET school=%s, achievement=%s, start_year=%s, end_year=%s
-                    WHERE id=%s
-                """  # SQL query to update data
-                values = (school, achievement, start_year, end_year, id)  # Values to update
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the connection
-
-                return redirect(url_for('education'))  # Redirect to the education page
-            except mysql.connector.Error as err:
-                return render_template('error.html', error_message="Unable to update education information.")  # Render error template
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template
-    else:
-        if mydb:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "SELECT school, achievement, start_year, end_year FROM education WHERE id=%s"  # SQL query to fetch specific education info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            education_data = cursor.fetchone()  # Fetch the single record
-
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the connection
-
-            return render_template('edit_education.html', education=education_data)  # Render edit form with data
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template
-
-# Route to Delete Education Information
-@app.route('/delete-education/<int:id>', methods=['GET'])
-def delete_education(id):
-    """Handle deleting education information."""
-    mydb = get_db_connection()  # Get database connection
-
-    if mydb:
-        try:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "DELETE FROM education WHERE id = %s"  # SQL query to delete education info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            mydb.commit()  # Commit the changes to the database
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the connection
-            return redirect(url_for('education'))  # Redirect to the education page
-        except mysql.connector.Error as err:
-            print(f"Error deleting education info: {err}")  # Print error if deletion fails
-            return render_template('error.html', error_message="Unable to delete the education info.")  # Render error template
-    else:
-        return render_template('error.html', error_message="Database connection failed.")
-
-# Work Experience Page Route
-@app.route('/work-experience')
-def work_experience():
-    """Fetch and display all work experience records from the database."""
-    mydb = get_db_connection()  # Establish database connection
-    if mydb:
-        try:
-            cursor = mydb.cursor()  # Create a cursor object for executing queries
-            cursor.execute("SELECT company, position, start_year, end_year, description, id FROM work_experience")
-            work_experience_data = cursor.fetchall()  # Fetch all records from the work_experience table
-            cursor.close()  # Close the cursor
-            mydb.close()    # Close the database connection
-            return render_template('work_experience.html', work_experience=work_experience_data)  # Render the work experience page with fetched data
-        except mysql.connector.Error as err:
-            print(f"Error fetching work experience data: {err}")  # Log any database errors
-            return render_template('error.html', error_message="Unable to load work experience data.")  # Render error template
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Add New Work Experience
-@app.route('/add-work-experience', methods=['GET', 'POST'])
-def add_work_experience():
-    """Handle adding new work experience records."""
-    if request.method == 'POST':  # Check if the form has been submitted
-        company = request.form['company']  # Get company name from form data
-        position = request.form['position']  # Get position from form data
-        start_year = request.form['start_year']  # Get start year from form data
-        end_year = request.form['end_year']  # Get end year from form data
-        description = request.form['description']  # Get description from form data
-
-        # Connect to the database and insert new work experience entry
-        mydb = get_db_connection()  # Establish database connection
-        if mydb:
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = "INSERT INTO work_experience (company, position, start_year, end_year, description) VALUES (%s, %s, %s, %s, %s)"
-                values = (company, position, start_year, end_year, description)  # Define values to be inserted
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-
-                # Redirect back to the Work Experience page after adding the entry
-                return redirect(url_for('work_experience'))  # Redirect to work experience page
-            except mysql.connector.Error as err:
-                print(f"Error inserting work experience: {err}")  # Log any database errors
-                return render_template('error.html', error_message="Unable to add work experience.")  # Render error template
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-    
-    # Render the form to add a new work experience if the request method is GET
-    return render_template('add_work_experience.html')  # Show form for adding work experience
-
-# Route to Edit Work Experience    
-@app.route('/edit-work-experience/<int:id>', methods=['GET', 'POST'])
-def edit_work_experience(id):
-    """Handle editing existing work experience records."""
-    mydb = get_db_connection()  # Establish database connection
-
-    if request.method == 'POST':  # Check if the form has been submitted
-        company = request.form['company']  # Get updated company name from form data
-        position = request.form['position']  # Get updated position from form data
-        start_year = request.form['start_year']  # Get updated start year from form data
-        end_year = request.form['end_year']  # Get updated end year from form data
-        description = request.form['description']  # Get updated description from form data
-
-        if mydb:  # Check if database connection was successful
+from werkzeug.middleware.proxy_fix import ProxyFix  # Importing the trusted-proxy fix for client IPs
+from flask import Flask, render_template, stream_template, request, redirect, url_for, abort  # Importing Flask and necessary functions for web development
+import time  # Read-your-writes windows
+import config  # Importing the settings read from the environment and .env
+from db import configure_pool, close_pool, get_pool, get_replicas, set_tracer, set_write_tracker, begin_request, end_request, request_wrote, db_connection, stream_rows, PoolTimeout  # Importing the connection pool used by every route
+from cache import create_cache  # Importing the read-through cache for the listing pages
+from response_cache import PageCache, build_fingerprint  # Importing the full-page cache with ETag support
+from pagination import Listing, PageRequest, InvalidPageRequest  # Importing keyset pagination for the listing pages
+from contact_queue import ContactQueue, QueueFull  # Importing the background queue for contact messages
+from api import create_api, SECTIONS  # Importing the JSON read API
+from bulk import create_bulk  # Importing bulk import/export
+from batch import create_batch  # Importing the transactional batch edits
+from crud import Resource, register_resources  # Importing the table-driven CRUD routes
+from migrations import create_migrations  # Importing the schema migrations and the EXPLAIN check
+from metrics import Instrumentation  # Importing request timing, Prometheus metrics and the profiler
+from compression import Compression  # Importing gzip/brotli/zstd response compression
+from assets import Assets  # Importing the fingerprinted static files
+from template_cache import configure_templates, warm_templates  # Importing the compiled-template cache
+from search import SearchIndex, create_search  # Importing the in-memory full-text search
+from static_export import StaticExport, create_static_export  # Importing the pre-rendered static site
+from documents import DocumentRenderer, create_documents  # Importing the PDF/DOCX/Markdown CV downloads
+from ratelimit import RateLimiter, SharedBuckets  # Importing the rate limits on the contact form and mutation routes
+from tenants import DEFAULT_TENANT_ID, TenantDirectory, TenantMiddleware, create_tenants, current_tenant  # Importing multi-tenant hosting
+
+# Paginated listings: selected columns (id last), sortable columns, supported filters and optional columns
+# (a NULL end year/date means "ongoing"; see schema/migrations)
+LISTINGS = {
+    'personal_info': Listing(
+        'personal_info', ['name', 'email', 'phone', 'bio', 'id'],
+        sorts=('name',),
+    ),
+    'education': Listing(
+        'education', ['school', 'achievement', 'start_year', 'end_year', 'id'],
+        sorts=('school', 'start_year', 'end_year'),
+        filters={'from_year': ('(end_year >= %s OR end_year IS NULL)', int), 'to_year': ('start_year <= %s', int)},
+        nullable=('end_year',),
+    ),
+    'work_experience': Listing(
+        'work_experience', ['company', 'position', 'start_year', 'end_year', 'description', 'id'],
+        sorts=('company', 'start_year', 'end_year'),
+        filters={'from_year': ('(end_year >= %s OR end_year IS NULL)', int), 'to_year': ('start_year <= %s', int), 'company': ('company = %s', str)},
+        nullable=('end_year',),
+    ),
+    'skills': Listing(
+        'skills', ['skill_name', 'category', 'proficiency_level', 'id'],
+        sorts=('skill_name', 'category', 'proficiency_level'),
+        filters={'category': ('category = %s', str)},
+    ),
+    'projects': Listing(
+        'projects', ['project_name', 'description', 'start_date', 'end_date', 'id'],
+        sorts=('project_name', 'start_date', 'end_date'),
+        filters={'from_date': ('(end_date >= %s OR end_date IS NULL)', date.fromisoformat), 'to_date': ('start_date <= %s', date.fromisoformat)},
+        nullable=('end_date',),
+    ),
+}
+
+# List, add, edit and delete routes for every CV section, generated from their columns
+RESOURCES = [
+    Resource(LISTINGS['personal_info'], 'personal-info', 'personal-info', 'personal information', "Unable to load personal information."),
+    Resource(LISTINGS['education'], 'education', 'education', 'education information', "Unable to load education data."),
+    Resource(LISTINGS['work_experience'], 'work-experience', 'work-experience', 'work experience', "Unable to load work experience data."),
+    Resource(LISTINGS['skills'], 'skills', 'skill', 'skill', "Unable to load skills data."),
+    Resource(LISTINGS['projects'], 'projects', 'project', 'project', "Unable to load projects data."),
+]
+
+# Full-text search over the descriptive columns, kept in memory and updated by the routes above
+SEARCH_FIELDS = {
+    'personal_info': ('bio',),
+    'education': ('achievement',),
+    'work_experience': ('description',),
+    'skills': ('skill_name',),
+    'projects': ('project_name', 'description'),
+}
+
+def fetch_rows(sql, params=(), reads=None):
+    """Run a SELECT on a pooled connection and return all rows, or None if no connection is available.
+
+    `reads` names the tables selected from, letting the query run on a read replica.
+    """
+    with db_connection(reads) as mydb:  # Borrow a pooled database connection
+        if not mydb:
+            return None
+        return mydb.prepared(sql).execute(params).fetchall()  # Prepared once per pooled connection, then reused
+
+def lookup_tenant(slug):
+    """Return the id of the tenant with this slug, or None."""
+    with db_connection() as mydb:  # Borrow a pooled primary connection: a tenant created a moment ago must resolve
+        if not mydb:
+            raise PoolTimeout(msg="Database connection failed.")
+        rows = mydb.prepared("SELECT id FROM tenants WHERE slug = %s").execute((slug,)).fetchall()
+        return rows[0][0] if rows else None
+
+def write_contacts(records):
+    """Insert a batch of contact messages in one transaction."""
+    with db_connection() as mydb:  # Borrow a pooled database connection
+        if not mydb:
+            raise PoolTimeout(msg="Database connection failed.")  # Let the queue retry later
+        cursor = mydb.cursor()  # Create a cursor object
+        sql = "INSERT INTO contact (tenant_id, name, email, message) VALUES (%s, %s, %s, %s)"  # SQL query to insert contact messages
+        cursor.executemany(sql, [(r.get('tenant_id', DEFAULT_TENANT_ID), r['name'], r['email'], r['message']) for r in records])  # Insert the whole batch; journals from before tenants have no tenant_id
+        mydb.commit()  # Commit the batch
+        cursor.close()  # Close the cursor
+
+def create_app(overrides=None):
+    """Build the application from the settings in config.py, with `overrides` replacing any of them.
+
+    Everything a worker can share is built and warmed here: templates are
+    compiled, the first page of each listing is cached and the search index
+    is loaded. Under `gunicorn --preload` this runs once in the master and the
+    forked workers inherit it all. Connections, threads and process pools are
+    per process and only opened on first use in each worker; the connections
+    the warm-up used are closed before returning so no worker inherits one.
+    The shared objects are in app.extensions['cv'].
+    """
+    app = Flask(__name__)  # Creating a Flask application instance
+    app.config.from_object(config)
+    app.config.update(overrides or {})
+    settings = app.config
+    app.config['USE_X_SENDFILE'] = settings['STATIC_X_SENDFILE']
+    if settings['TEMPLATE_CACHE_DIR']:
+        configure_templates(app, settings['TEMPLATE_CACHE_DIR'])  # Load compiled templates from disk instead of recompiling them
+
+    # Fingerprinted static files from `flask assets build`, served with immutable caching
+    assets = Assets(app, accel_prefix=settings['STATIC_ACCEL_PREFIX'])
+
+    # Per-request spans, latency histograms, slow-request logs and the opt-in profiler
+    instrumentation = Instrumentation(
+        app,
+        metrics_dir=settings['METRICS_DIR'],
+        slow_threshold=settings['SLOW_REQUEST_THRESHOLD'],
+        profiling=settings['PROFILING_ENABLED'],
+        profile_token=settings['PROFILE_TOKEN'],
+        profile_dir=settings['PROFILE_DIR'],
+    )
+    set_tracer(instrumentation)  # Time pool checkouts and SQL statements
+
+    # Token buckets per client IP and route, checked before the view borrows a database connection.
+    # Rules are attached to the routes below once they are registered.
+    rate_limiter = RateLimiter(app, SharedBuckets(settings['RATE_LIMIT_FILE'], settings['RATE_LIMIT_SLOTS']), enabled=settings['RATE_LIMIT_ENABLED'])
+    if settings['RATE_LIMIT_ENABLED'] and not settings['PROXY_FIX_HOPS']:
+        print("Warning: rate limits are keyed on the connecting address; behind a proxy, set PROXY_FIX_HOPS or every client shares one bucket")
+
+    # Negotiated response compression; registered after the instrumentation so it records the compressed size
+    compression = Compression(app, min_size=settings['COMPRESSION_MIN_SIZE']) if settings['COMPRESSION_ENABLED'] else None
+
+    # Configure the per-worker connection pool
+    connect_args = dict(host=settings['DB_HOST'], user=settings['DB_USER'], password=settings['DB_PASSWORD'], database=settings['DB_NAME'])
+    use_pure = settings['DB_USE_PURE']
+    if use_pure is not None:
+        connect_args['use_pure'] = use_pure.lower() == 'true'
+    if settings['SERVER_MODE'] == 'async':
+        if use_pure is not None and use_pure.lower() != 'true':
+            print("SERVER_MODE=async needs the pure-Python MySQL driver; ignoring DB_USE_PURE=false")
+        connect_args['use_pure'] = True  # gevent can only switch requests on Python-level socket I/O
+    configure_pool(
+        connect_args,
+        size=settings['DB_POOL_SIZE'],
+        max_overflow=settings['DB_POOL_MAX_OVERFLOW'],
+        timeout=settings['DB_POOL_TIMEOUT'],
+        recycle=settings['DB_POOL_RECYCLE'],
+        pre_ping=settings['DB_POOL_PRE_PING'],
+        prepared=settings['DB_PREPARED_STATEMENTS'],
+        statement_cache_size=settings['DB_STATEMENT_CACHE_SIZE'],
+        replicas=settings['DB_REPLICAS'],
+        max_lag=settings['DB_REPLICA_MAX_LAG'],
+        check_interval=settings['DB_REPLICA_CHECK_INTERVAL'],
+        connect_timeout=settings['DB_REPLICA_CONNECT_TIMEOUT'],
+    )
+
+    # Cache for the listing queries; entries for a table expire when that table is modified.
+    # With tenants, each tenant's tables have their own versions and their own slice of the cache.
+    tenant_mode = settings['TENANT_MODE']
+    cache_scope = current_tenant if tenant_mode != 'off' else None
+    query_cache = create_cache(
+        settings['CACHE_URL'], settings['CACHE_MAX_ENTRIES'], settings['CACHE_TTL'], settings['CACHE_VERSIONS_DIR'], scope=cache_scope,
+        partition_bytes=settings['CACHE_TENANT_MAX_BYTES'], max_partitions=settings['CACHE_MAX_TENANTS'],
+    )
+
+    # Cache for rendered pages, sharing the table versions so the mutation routes expire both
+    build_id, build_time = build_fingerprint(os.path.join(app.root_path, 'templates'), app.static_folder)
+    page_cache = PageCache(
+        query_cache.versions,
+        query_cache.backend,
+        build_id=build_id,
+        build_time=build_time,
+        default_policy=settings['PAGE_CACHE_CONTROL'],
+        policies=settings['PAGE_CACHE_POLICIES'],
+        compression=compression,  # Keep a compressed copy per encoding with each cached page
+        scope=cache_scope,
+    )
+
+    if settings['DB_REPLICAS']:
+        # Reads of a table written less than a window ago go to the primary, so a lagging
+        # replica cannot answer (and fill the caches) with rows from before the write
+        window = settings['READ_YOUR_WRITES_WINDOW']
+        set_write_tracker(lambda table: time.time() - query_cache.modified(table) < window)
+
+        @app.before_request
+        def route_reads():
+            """Pin every read of a session that wrote recently to the primary."""
             try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = """
-                    UPDATE work_experience
-                    SET company=%s, position=%s, start_year=%s, end_year=%s, description=%s
-                    WHERE id=%s
-                """  # SQL query to update work experience data
-                values = (company, position, start_year, end_year, description, id)  # Define updated values
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-
-                # Redirect to work experience page after successful update
-                return redirect(url_for('work_experience'))  # Redirect to work experience page
-            except mysql.connector.Error as err:
-                return render_template('error.html', error_message="Unable to update work experience.")  # Render error template if update fails
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-    else:
-        if mydb:  # Check if database connection was successful
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "SELECT company, position, start_year, end_year, description FROM work_experience WHERE id=%s"  # SQL query to fetch specific work experience info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            work_experience_data = cursor.fetchone()  # Fetch the single record
-
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-
-            return render_template('edit_work_experience.html', work_experience=work_experience_data)  # Render edit form with fetched data
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Delete Work Experience 
-@app.route('/delete-work-experience/<int:id>', methods=['GET'])
-def delete_work_experience(id):
-    """Handle deleting work experience records."""
-    mydb = get_db_connection()  # Establish database connection
-
-    if mydb:  # Check if database connection was successful
-        try:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "DELETE FROM work_experience WHERE id = %s"  # SQL query to delete work experience entry
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            mydb.commit()  # Commit the changes to the database
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-            return redirect(url_for('work_experience'))  # Redirect to work experience page
-        except mysql.connector.Error as err:
-            print(f"Error deleting work experience: {err}")  # Log any database errors
-            return render_template('error.html', error_message="Unable to delete the work experience.")  # Render error template if deletion fails
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Skills Page Route
-@app.route('/skills')
-def skills():
-    """Fetch and display all skills records from the database."""
-    mydb = get_db_connection()  # Establish database connection
-    if mydb:  # Check if database connection was successful
+                pinned = float(request.cookies.get('db_primary_until', 0)) > time.time()
+            except ValueError:
+                pinned = False
+            begin_request(pinned)
+
+        @app.after_request
+        def remember_writes(response):
+            """Mark the session as having written, so its next reads see the write."""
+            if request_wrote():
+                until = time.time() + window
+                response.set_cookie('db_primary_until', f"{until:.0f}", max_age=int(window) + 1, httponly=True, samesite='Lax')
+            return response
+
+        @app.teardown_request
+        def forget_routing(exc):
+            """Reset the routing state; a 429 from the rate limiter ends the request before route_reads runs."""
+            end_request()
+
+    # Resolve the tenant of every request before Flask routes it; path mode also strips the /<slug> prefix
+    tenant_directory = TenantDirectory(lookup_tenant, ttl=settings['TENANT_LOOKUP_TTL'])
+    app.wsgi_app = TenantMiddleware(app.wsgi_app, tenant_directory, tenant_mode, settings['TENANT_BASE_DOMAIN'])
+    if settings['PROXY_FIX_HOPS']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=settings['PROXY_FIX_HOPS'])  # Take the client IP from X-Forwarded-For set by our own proxies
+    app.register_blueprint(create_tenants(tenant_directory, db_connection))  # `flask tenants create|list`
+
+    stream_routes = settings['STREAM_ROUTES']
+    page_size, list_max_page_size = settings['LIST_PAGE_SIZE'], settings['LIST_MAX_PAGE_SIZE']
+
+    def render_listing(name, template, error_message):
+        """Render one page of a listing, serving its rows from the query cache."""
+        streaming = name in stream_routes  # Stream this listing instead of rendering it in one go
+        max_page_size = settings['STREAM_MAX_PAGE_SIZE'] if streaming else list_max_page_size
         try:
-            cursor = mydb.cursor()  # Create a cursor object
-            cursor.execute("SELECT skill_name, category, proficiency_level, id FROM skills")  # SQL query to fetch skills data
-            skills_data = cursor.fetchall()  # Fetch all records from the skills table
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-            return render_template('skills.html', skills=skills_data)  # Render the skills page with fetched data
-        except mysql.connector.Error as err:
-            return render_template('error.html', error_message="Unable to load skills data.")  # Render error template if fetching fails
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Add New Skill
-@app.route('/add-skill', methods=['GET', 'POST'])
-def add_skill():
-    """Handle adding new skill records."""
-    if request.method == 'POST':  # Check if the form has been submitted
-        skill_name = request.form['skill_name']  # Get skill name from form data
-        category = request.form['category']  # Get category from form data
-        proficiency_level = request.form['proficiency_level']  # Get proficiency level from form data
-
-        mydb = get_db_connection()  # Establish database connection
-        if mydb:  # Check if database connection was successful
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = "INSERT INTO skills (skill_name, category, proficiency_level) VALUES (%s, %s, %s)"  # SQL query to insert new skill
-                values = (skill_name, category, proficiency_level)  # Define values to be inserted
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-
-                return redirect(url_for('skills'))  # Redirect to skills page
-            except mysql.connector.Error as err:
-                return render_template('error.html', error_message="Unable to add skill.")  # Render error template if insertion fails
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-    return render_template('add_skill.html')  # Show form for adding skill if the request method is GET
-
-# Route to Edit Skill
-@app.route('/edit-skill/<int:id>', methods=['GET', 'POST'])
-def edit_skill(id):
-    """Handle editing existing skill records."""
-    mydb = get_db_connection()  # Establish database connection
-
-    if request.method == 'POST':  # Check if the form has been submitted
-        skill_name = request.form['skill_name']  # Get updated skill name from form data
-        category = request.form['category']  # Get updated category from form data
-        proficiency_level = request.form['proficiency_level']  # Get updated proficiency level from form data
-
-        if mydb:  # Check if database connection was successful
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = """
-                    UPDATE skills
-                    SET skill_name=%s, category=%s, proficiency_level=%s
-                    WHERE id=%s
-                """  # SQL query to update skill data
-                values = (skill_name, category, proficiency_level, id)  # Define updated values
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-
-                return redirect(url_for('skills'))  # Redirect to skills page
-            except mysql.connector.Error as err:
-                return render_template('error.html', error_message="Unable to update skill.")  # Render error template if update fails
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-    else:
-        if mydb:  # Check if database connection was successful
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "SELECT skill_name, category, proficiency_level FROM skills WHERE id=%s"  # SQL query to fetch specific skill info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            skill_data = cursor.fetchone()  # Fetch the single record
-
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-
-            return render_template('edit_skill.html', skill=skill_data)  # Render edit form with fetched data
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Delete Skill
-@app.route('/delete-skill/<int:id>', methods=['GET'])
-def delete_skill(id):
-    """Handle deleting skill records."""
-    mydb = get_db_connection()  # Establish database connection
-
-    if mydb:  # Check if database connection was successful
+            page_request = PageRequest(LISTINGS[name], request.args, page_size, max_page_size)  # Validate sort, filters and cursor
+        except InvalidPageRequest as err:
+            return render_template('error.html', error_message=str(err)), 400  # Render error template for bad query arguments
+        sql, params = page_request.query()  # Keyset query for just this page
+        if streaming:
+            return stream_listing(name, template, error_message, page_request, sql, params)
         try:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "DELETE FROM skills WHERE id = %s"  # SQL query to delete skill entry
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            mydb.commit()  # Commit the changes to the database
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-
-            return redirect(url_for('skills'))  # Redirect to skills page
+            rows = query_cache.get_or_load(name, lambda: fetch_rows(sql, params, reads=(name,)), key=page_request.cache_key())  # Serve from cache, querying only on a miss
         except mysql.connector.Error as err:
-            return render_template('error.html', error_message="Unable to delete the skill.")  # Render error template if deletion fails
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Projects Page Route
-@app.route('/projects')
-def projects():
-    """Fetch and display all project records from the database."""
-    mydb = get_db_connection()  # Establish database connection
-    if mydb:  # Check if connection was successful
+            print(f"Error fetching {name} data: {err}")  # Log any database errors
+            return render_template('error.html', error_message=error_message), 500  # Render error template
+        if rows is None:
+            return render_template('error.html', error_message="Database connection failed."), 503  # Render error template if connection fails
+        page = page_request.page(rows)  # Trim the look-ahead row and build next/prev links
+        return render_template(template, page=page, **{name: page.rows})  # Render the page with the fetched data
+
+    def stream_listing(name, template, error_message, page_request, sql, params):
+        """Stream a listing page, rendering rows as they are fetched in batches."""
         try:
-            cursor = mydb.cursor()  # Create a cursor object for executing queries
-            cursor.execute("SELECT project_name, description, start_date, end_date, id FROM projects")
-            projects_data = cursor.fetchall()  # Fetch all records from the projects table
-            cursor.close()  # Close the cursor
-            mydb.close()    # Close the database connection
-            return render_template('projects.html', projects=projects_data)  # Render the projects page with fetched data
+            rows = stream_rows(sql, params, settings['STREAM_BATCH_SIZE'], reads=(name,))  # Runs the query now; rows are read while rendering
         except mysql.connector.Error as err:
-            print(f"Error fetching projects data: {err}")  # Log any database errors
-            return render_template('error.html', error_message="Unable to load projects data.")  # Render error template
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Add New Project
-@app.route('/add-project', methods=['GET', 'POST'])
-def add_project():
-    """Handle adding new project records."""
-    if request.method == 'POST':  # Check if the form has been submitted
-        project_name = request.form['project_name']  # Get project name from form data
-        description = request.form['description']  # Get description from form data
-        start_date = request.form['start_date']  # Get start date from form data
-        end_date = request.form['end_date']  # Get end date from form data
-
-        mydb = get_db_connection()  # Establish database connection
-        if mydb:  # Check if connection was successful
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = "INSERT INTO projects (project_name, description, start_date, end_date) VALUES (%s, %s, %s, %s)"  # SQL query to insert new project
-                values = (project_name, description, start_date, end_date)  # Define values to be inserted
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-                return redirect(url_for('projects'))  # Redirect to projects page after adding the project
-            except mysql.connector.Error as err:
-                print(f"Error inserting project: {err}")  # Log any database errors
-                return render_template('error.html', error_message="Unable to add project.")  # Render error template
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-    
-    return render_template('add_project.html')  # Render form to add new project if the request method is GET
-
-# Route to Edit Project
-@app.route('/edit-project/<int:id>', methods=['GET', 'POST'])
-def edit_project(id):
-    """Handle editing existing project records."""
-    mydb = get_db_connection()  # Establish database connection
-
-    if request.method == 'POST':  # Check if the form has been submitted
-        project_name = request.form['project_name']  # Get updated project name from form data
-        description = request.form['description']  # Get updated description from form data
-        start_date = request.form['start_date']  # Get updated start date from form data
-        end_date = request.form['end_date']  # Get updated end date from form data
-
-        if mydb:  # Check if connection was successful
+            print(f"Error fetching {name} data: {err}")  # Log any database errors
+            return render_template('error.html', error_message=error_message), 500  # Render error template
+        if rows is None:
+            return render_template('error.html', error_message="Database connection failed."), 503  # Render error template if connection fails
+        page = page_request.stream(rows)  # Page whose links are filled in once the rows have been read
+        response = app.response_class(stream_template(template, page=page, **{name: page.rows}))  # Send HTML as it is generated
+        response.call_on_close(rows.close)  # Return the connection even if the client disconnects early
+        return response
+
+    # Contact messages are journaled and written in batches by a background thread
+    contact_queue = ContactQueue(
+        write_contacts,
+        settings['CONTACT_SPILL_DIR'],
+        max_size=settings['CONTACT_QUEUE_SIZE'],
+        batch_size=settings['CONTACT_BATCH_SIZE'],
+        flush_interval=settings['CONTACT_FLUSH_INTERVAL'],
+        fsync=settings['CONTACT_FSYNC'],
+        is_transient=lambda err: not isinstance(err, (mysql.connector.DataError, mysql.connector.IntegrityError, mysql.connector.ProgrammingError)),
+    )
+
+    # JSON API: /api/cv and /api/<section>
+    app.register_blueprint(create_api(LISTINGS, query_cache, page_cache, page_size, list_max_page_size))
+
+    # Bulk import/export: /export/<section>.<csv|jsonl>, /import/<section> and `flask data import|export`
+    app.register_blueprint(create_bulk(LISTINGS, query_cache, SECTIONS))
+
+    @instrumentation.collector
+    def runtime_gauges():
+        """Pool, cache and contact queue counters of the worker answering the scrape."""
+        worker = (('worker', str(os.getpid())),)
+        for name, value in get_pool().stats.snapshot().items():
+            yield f'cv_db_pool_{name}', f"Connection pool {name.replace('_', ' ')}.", worker, value
+        replicas = get_replicas()
+        if replicas:
+            for replica in replicas.stats():
+                labels = worker + (('replica', replica['replica']),)
+                yield 'cv_db_replica_healthy', "Whether the replica is serving reads.", labels, replica['healthy']
+                yield 'cv_db_replica_lag_seconds', "Replication lag at the last check (-1 if unknown).", labels, replica['lag']
+                yield 'cv_db_replica_reads', "Connections checked out from the replica.", labels, replica['reads']
+            yield 'cv_db_replica_fallbacks', "Reads sent to the primary because no replica was usable.", worker, replicas.fallbacks
+        for name in ('hits', 'misses'):
+            yield f'cv_query_cache_{name}', f"Query cache {name}.", worker, getattr(query_cache, name)
+        if hasattr(query_cache.backend, 'stats'):  # In-process cache partitioned per tenant
+            for name, value in query_cache.backend.stats().items():
+                yield f'cv_cache_tenant_{name}', f"Tenant cache {name.replace('_', ' ')}.", worker, value
+        for name in ('hits', 'misses', 'not_modified'):
+            yield f'cv_page_cache_{name}', f"Page cache {name.replace('_', ' ')}.", worker, getattr(page_cache, name)
+        if compression:
+            stats = compression.stats()
+            yield 'cv_compression_responses', "Responses sent compressed.", worker, stats['responses']
+            yield 'cv_compression_bytes_in', "Size of the compressed responses before compression.", worker, stats['bytes_in']
+            yield 'cv_compression_bytes_out', "Size of the compressed responses on the wire.", worker, stats['bytes_out']
+        for name, value in search_index.stats().items():
+            yield f'cv_search_{name}', f"Search index {name}.", worker, value
+        for name, value in static_export.stats().items():
+            yield f'cv_static_export_pages_{name}', f"Exported pages {name}.", worker, value
+        for name, value in documents.stats().items():
+            yield f'cv_documents_{name}', f"CV document {name}.", worker, value
+        for rule, outcome, value in rate_limiter.stats():
+            yield 'cv_rate_limit_requests', "Rate-limited route requests by outcome.", worker + (('rule', rule), ('outcome', outcome)), value
+        for name, value in contact_queue.stats().items():
+            yield f'cv_contact_queue_{name}', f"Contact queue {name.replace('_', ' ')}.", worker, value
+
+    # Prometheus Metrics Route
+    @app.route('/metrics')
+    def metrics():
+        """Expose request, database, template and cache metrics in Prometheus text format."""
+        token = settings['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f"Bearer {token}":
+            abort(403)  # Keep internal numbers private unless a token is configured and sent
+        return app.response_class(instrumentation.render(), mimetype='text/plain; version=0.0.4')
+
+    # Home Page Route
+    @app.route('/')
+    @page_cache.page()
+    def home():
+        """Render the home page."""
+        return render_template('index.html')
+
+    search_index = SearchIndex(SEARCH_FIELDS, query_cache.version, check_interval=settings['SEARCH_CHECK_INTERVAL'], max_tenants=settings['CACHE_MAX_TENANTS'])
+    register_resources(app, RESOURCES, query_cache, page_cache, render_listing, on_write=search_index.apply)
+    app.register_blueprint(create_search(search_index, SECTIONS))  # /search and /api/search
+    # Batch edits: POST /api/batch applies many creates/updates/deletes in one transaction; GET /api/versions/<section>
+    app.register_blueprint(create_batch(RESOURCES, query_cache, SECTIONS, on_writes=search_index.apply_many, max_operations=settings['BATCH_MAX_OPERATIONS']))
+
+    # Pre-rendered copies of the public pages for nginx: `flask export-static`, then kept current on every edit.
+    # Only the default tenant's CV is exported; rendering goes through the app, so routing and templates are shared.
+    export_pages = {'/': ()} | {f'/{resource.path}': (resource.table,) for resource in RESOURCES}  # Path -> tables it shows
+    static_export = StaticExport(
+        app,
+        assets,
+        settings['STATIC_EXPORT_DIR'] or os.path.join(settings['INSTANCE_DIR'], 'static-export'),
+        export_pages,
+        prefix='/default' if tenant_mode == 'path' else '',
+        base_url=f"http://{settings['TENANT_BASE_DOMAIN']}" if tenant_mode == 'subdomain' else 'http://localhost',
+        debounce=settings['STATIC_EXPORT_DEBOUNCE'],
+    )
+    app.register_blueprint(create_static_export(static_export))
+    if settings['STATIC_EXPORT_DIR']:
+        @query_cache.on_invalidate
+        def export_changed(table):
+            """Re-render the exported pages showing a table that was just modified."""
+            if current_tenant() == DEFAULT_TENANT_ID:
+                static_export.changed(table)
+
+    # CV downloads: /cv.pdf, /cv.docx and /cv.md, rendered off the request path and re-rendered on every edit
+    documents = DocumentRenderer(LISTINGS, query_cache, settings['DOCUMENT_CACHE_DIR'], workers=settings['DOCUMENT_WORKERS'], timeout=settings['DOCUMENT_RENDER_TIMEOUT'], prune_after=settings['DOCUMENT_PRUNE_AFTER'])
+    query_cache.on_invalidate(documents.changed)
+    app.register_blueprint(create_documents(documents))
+
+    # Schema migrations and the query-plan check: `flask db migrate|status|stamp|explain`
+    app.register_blueprint(create_migrations(LISTINGS, RESOURCES))
+
+    # Contact Form Route
+    @app.route('/contact', methods=['GET', 'POST'])
+    def contact():
+        """Handle the contact form submission."""
+        if request.method == 'POST':  # Check if the form has been submitted
+            name = request.form['name']  # Get name from form data
+            email = request.form['email']  # Get email from form data
+            message = request.form['message']  # Get message from form data
+
             try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = """
-                    UPDATE projects
-                    SET project_name=%s, description=%s, start_date=%s, end_date=%s
-                    WHERE id=%s
-                """  # SQL query to update project data
-                values = (project_name, description, start_date, end_date, id)  # Define updated values
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-
-                return redirect(url_for('projects'))  # Redirect to projects page after successful update
-            except mysql.connector.Error as err:
-                return render_template('error.html', error_message="Unable to update project.")  # Render error template if update fails
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-    else:
-        if mydb:  # Check if connection was successful
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "SELECT project_name, description, start_date, end_date FROM projects WHERE id=%s"  # SQL query to fetch specific project info
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            project_data = cursor.fetchone()  # Fetch the single record
-
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-
-            return render_template('edit_project.html', project=project_data)  # Render edit form with fetched data
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Route to Delete Project
-@app.route('/delete-project/<int:id>', methods=['GET'])
-def delete_project(id):
-    """Handle deleting project records."""
-    mydb = get_db_connection()  # Establish database connection
-
-    if mydb:  # Check if connection was successful
+                contact_queue.submit({'tenant_id': current_tenant(), 'name': name, 'email': email, 'message': message})  # Journal the message; it is written in the background
+            except QueueFull:
+                print("Contact queue full, rejecting submission")  # Log the rejected submission
+                return render_template('error.html', error_message="We are receiving a lot of messages right now. Please try again shortly."), 503  # Ask the client to back off
+            except OSError as err:
+                print(f"Error submitting contact form: {err}")  # Log journal errors
+                return render_template('error.html', error_message="Unable to submit your message. Please try again.")  # Render error template if submission fails
+            return redirect(url_for('home'))  # Redirect to home page after successful submission
+
+        return render_template('contact.html')  # Render the contact form if the request method is GET
+
+    # Rate limits: form submissions (POST), deletes (plain GET links), bulk imports and batch edits
+    rate_limiter.rule('contact', settings['RATE_LIMIT_CONTACT'], settings['RATE_LIMIT_CONTACT_ROUTE'], endpoints=['contact'])
+    rate_limiter.rule('writes', settings['RATE_LIMIT_WRITES'], settings['RATE_LIMIT_WRITES_ROUTE'], endpoints=[f'{action}_{resource.name}' for resource in RESOURCES for action in ('add', 'edit')] + ['bulk.import_section', 'batch.batch'])
+    rate_limiter.rule('writes', settings['RATE_LIMIT_WRITES'], settings['RATE_LIMIT_WRITES_ROUTE'], endpoints=[f'delete_{resource.name}' for resource in RESOURCES], methods=('GET',))
+
+    app.extensions['cv'] = {
+        'query_cache': query_cache,
+        'page_cache': page_cache,
+        'contact_queue': contact_queue,
+        'tenant_directory': tenant_directory,
+        'search_index': search_index,
+        'static_export': static_export,
+        'documents': documents,
+        'rate_limiter': rate_limiter,
+        'instrumentation': instrumentation,
+    }
+
+    # Warm up what every worker would otherwise build on its first requests
+    if settings['TEMPLATE_WARMUP']:
+        warm_templates(app)  # Compile every template
+    if settings['CACHE_WARMUP']:
+        warm_listings(query_cache, [name for name in LISTINGS if name not in stream_routes], page_size, list_max_page_size)  # The default tenant's first listing pages
+    if settings['SEARCH_WARMUP']:
+        search_index.warm()  # The default tenant's index; other tenants' are built on their first search
+    close_pool()  # A forked worker must not share the warm-up's sockets; each opens its own
+    if settings['CONTACT_QUEUE_START']:
+        contact_queue.start()  # Deliver messages journaled by workers that died now, not on the next submission
+    return app
+
+def warm_listings(query_cache, names, page_size, max_page_size):
+    """Load the first page of each listing, in its default order, into the query cache."""
+    for name in names:
+        page_request = PageRequest(LISTINGS[name], {}, page_size, max_page_size)
+        sql, params = page_request.query()
         try:
-            cursor = mydb.cursor()  # Create a cursor object
-            sql = "DELETE FROM projects WHERE id = %s"  # SQL query to delete project entry
-            cursor.execute(sql, (id,))  # Execute the SQL query with ID as parameter
-            mydb.commit()  # Commit the changes to the database
-            cursor.close()  # Close the cursor
-            mydb.close()  # Close the database connection
-            return redirect(url_for('projects'))  # Redirect to projects page after deletion
+            query_cache.get_or_load(name, lambda: fetch_rows(sql, params, reads=(name,)), key=page_request.cache_key())
         except mysql.connector.Error as err:
-            print(f"Error deleting project: {err}")  # Log any database errors
-            return render_template('error.html', error_message="Unable to delete the project.")  # Render error template if deletion fails
-    else:
-        return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-# Contact Form Route
-@app.route('/contact', methods=['GET', 'POST'])
-def contact():
-    """Handle the contact form submission."""
-    if request.method == 'POST':  # Check if the form has been submitted
-        name = request.form['name']  # Get name from form data
-        email = request.form['email']  # Get email from form data
-        message = request.form['message']  # Get message from form data
-
-        mydb = get_db_connection()  # Establish database connection
-        if mydb:  # Check if connection was successful
-            try:
-                cursor = mydb.cursor()  # Create a cursor object
-                sql = "INSERT INTO contact (name, email, message) VALUES (%s, %s, %s)"  # SQL query to insert new contact message
-                values = (name, email, message)  # Define values to be inserted
-                cursor.execute(sql, values)  # Execute the SQL query
-                mydb.commit()  # Commit the changes to the database
-                cursor.close()  # Close the cursor
-                mydb.close()  # Close the database connection
-                return redirect(url_for('home'))  # Redirect to home page after successful submission
-            except mysql.connector.Error as err:
-                print(f"Error submitting contact form: {err}")  # Log any database errors
-                return render_template('error.html', error_message="Unable to submit your message. Please try again.")  # Render error template if submission fails
-        else:
-            return render_template('error.html', error_message="Database connection failed.")  # Render error template if connection fails
-
-    return render_template('contact.html')  # Render the contact form if the request method is GET
+            print(f"Error warming the {name} cache: {err}")  # Loaded on the first request instead
+            return
 
 if __name__ == "__main__":
-    app.run(debug=True)  # Run the Flask application in debug mode
+    create_app().run(debug=True)  # Run the Flask application in debug mode
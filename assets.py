@@ -0,0 +1,163 @@
+"""Static asset pipeline: minified, content-hashed copies with precompressed variants and immutable caching.
+
+`flask assets build` writes static/dist/<name>.<hash>.<ext> (plus .gz and, with
+brotli installed, .br) and static/dist/manifest.json. At runtime
+url_for('static', filename='styles.css') resolves through the manifest, so a
+page links the hashed file, and hashed files are served with a one-year
+immutable Cache-Control: browsers never revalidate them, and a changed file
+gets a new URL.
+"""
+import gzip  # Precompressed .gz variants
+import hashlib  # Content hashes in file names
+import json  # The manifest
+import mimetypes  # Content-Type of the original file for compressed variants
+import os  # Walking and writing the static folder
+import re  # CSS minification
+import click  # `flask assets build`
+from flask import Blueprint, request, send_from_directory  # CLI group, request headers and file responses
+from compression import brotli, negotiate  # Optional brotli module and Accept-Encoding negotiation
+
+OUTPUT_DIR = 'dist'  # Under the static folder, so the built files keep /static/ URLs
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'  # One year; the name changes whenever the content does
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}  # Precompressed variant of each encoding, best first
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}  # Images and fonts are compressed already
+
+_strings = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')  # CSS string literals, left untouched
+
+
+def minify_css(text):
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    parts = _strings.split(text)  # Odd indexes are string literals
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'\s+', ' ', parts[i])
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)  # No space is needed around these
+        code = re.sub(r':\s+', ':', code)  # Only after ":"; a space before it is a descendant selector
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+MINIFIERS = {'.css': minify_css}
+
+
+def write_atomic(path, data):
+    """Write a file atomically so a worker never serves half of it."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build(static_folder):
+    """Fingerprint and precompress every file under `static_folder`; return (manifest, files written).
+
+    Files whose hashed name already exists are skipped, so rebuilding after a
+    small change only writes what changed. Earlier builds are left in place for
+    pages that still link them during a rolling deploy.
+    """
+    output = os.path.join(static_folder, OUTPUT_DIR)
+    manifest, written = {}, 0
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder) and OUTPUT_DIR in dirs:
+            dirs.remove(OUTPUT_DIR)  # Never fingerprint our own output
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')  # The name templates pass to url_for()
+            stem, ext = os.path.splitext(logical)
+            with open(source, 'rb') as f:
+                data = f.read()
+            if ext in MINIFIERS:
+                data = MINIFIERS[ext](data.decode('utf-8')).encode('utf-8')
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+            target = os.path.join(output, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            encodings = []
+            variants = {'gzip': lambda: gzip.compress(data, compresslevel=9, mtime=0)}  # mtime=0 keeps rebuilds byte-identical
+            if brotli:
+                variants['br'] = lambda: brotli.compress(data, quality=11)  # Built once, so the slowest, smallest setting
+            for encoding in SUFFIXES:
+                if ext not in COMPRESSIBLE or encoding not in variants:
+                    continue
+                if not os.path.exists(target + SUFFIXES[encoding]):
+                    compressed = variants[encoding]()
+                    if len(compressed) >= len(data):
+                        continue  # Not worth serving
+                    write_atomic(target + SUFFIXES[encoding], compressed)
+                    written += 1
+                encodings.append(encoding)
+            if not os.path.exists(target):
+                write_atomic(target, data)
+                written += 1
+            manifest[logical] = {'path': f"{OUTPUT_DIR}/{hashed}", 'encodings': encodings}
+    os.makedirs(output, exist_ok=True)  # Also for an empty static folder
+    write_atomic(os.path.join(output, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest, written
+
+
+class Assets:
+    """Resolves url_for('static', ...) through the manifest and serves hashed files with immutable headers.
+
+    With `accel_prefix` set (e.g. "/_static/"), hashed files are handed to nginx
+    with X-Accel-Redirect instead of being read by Python; let nginx pick the
+    .gz/.br sibling with gzip_static/brotli_static. USE_X_SENDFILE in the app
+    config does the same for servers that understand X-Sendfile.
+    """
+
+    def __init__(self, app, accel_prefix=None):
+        self.app = app
+        self.accel_prefix = accel_prefix  # Internal nginx location mapped to the static folder
+        self.reload()
+        app.url_defaults(self.resolve)
+        app.view_functions['static'] = self.serve  # Replaces Flask's static view on the same URL rule
+
+        assets = Blueprint('assets', __name__, cli_group='assets')
+
+        @assets.cli.command('build')
+        def build_command():
+            """Minify, fingerprint and precompress the files in the static folder."""
+            manifest, written = build(app.static_folder)
+            self.reload()
+            click.echo(f"Built {len(manifest)} assets ({written} files written)")
+
+        app.register_blueprint(assets)
+
+    def reload(self):
+        """Pick up the manifest of the latest build."""
+        self.manifest = self.load()  # logical name -> {'path': hashed name, 'encodings': [...]}
+        self.hashed = {entry['path']: entry['encodings'] for entry in self.manifest.values()}
+
+    def load(self):
+        """Read the manifest written by `flask assets build`; without one, files keep their plain names."""
+        try:
+            with open(os.path.join(self.app.static_folder, OUTPUT_DIR, MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as err:
+            print(f"Error reading asset manifest: {err}")  # Fall back to the unhashed files
+            return {}
+
+    def resolve(self, endpoint, values):
+        """url_defaults hook: point static URLs at the fingerprinted file."""
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]['path']
+
+    def serve(self, filename):
+        """Serve a static file; hashed files get immutable caching and a precompressed body."""
+        encodings = self.hashed.get(filename)
+        if encodings is None:
+            return self.app.send_static_file(filename)  # Unhashed files keep Flask's revalidating headers
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if self.accel_prefix:
+            response = self.app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = self.accel_prefix + filename
+        else:
+            encoding = negotiate(request.headers.get('Accept-Encoding'), encodings)
+            response = send_from_directory(self.app.static_folder, filename + SUFFIXES.get(encoding, ''), mimetype=mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+                del response.headers['Content-Disposition']  # Would name the .gz/.br file
+        response.headers['Cache-Control'] = IMMUTABLE
+        response.vary.add('Accept-Encoding')
+        return response
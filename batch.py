@@ -0,0 +1,318 @@
+"""Batch edits: many creates, updates and deletes across the CV sections, applied in one transaction.
+
+POST /api/batch takes {"operations": [...]}, each operation one of
+
+    {"op": "create", "section": "skills", "values": {...}}
+    {"op": "update", "section": "skills", "id": 7, "version": 3, "values": {...}}
+    {"op": "delete", "section": "skills", "id": 7, "version": 3}
+
+`values` holds every column of the row, as the edit forms do. `version` is
+optional: when given, the write only matches the row if nobody changed it
+since that version was read (GET /api/versions/<section> lists them, and
+every result carries the row's new version; pass ?ids=1,2,3 for just the
+rows about to be edited, or follow "next" through the pages).
+
+The operations run on one pooled connection in one transaction, so a batch
+pays for a single commit however many rows it touches. Each row is still a
+statement of its own: creates run one by one to read each new id, and
+mysql-connector runs the executemany() of an UPDATE or DELETE as one
+execute() per row. If any row is missing or has moved on to another
+version the transaction is rolled back, nothing is written and the 409
+response says which operations failed. Caches are invalidated, and the
+changes passed on, once per table after the commit.
+"""
+import mysql.connector  # Database errors raised by the statements
+from flask import Blueprint, request, url_for  # Routes for /api/batch and /api/versions
+from api import json_response  # JSON responses, dates included
+from bulk import MAX_ERRORS, validator  # Same column checks as the bulk import
+from crud import Unavailable  # Raised when no connection could be obtained
+from db import db_connection  # Pooled connections
+from tenants import current_tenant  # Every statement is limited to the tenant being served
+
+ACTIONS = ('create', 'update', 'delete')
+FORM_ACTIONS = {'create': 'add', 'update': 'update', 'delete': 'delete'}  # Action names on_write() receives from the forms
+
+
+class InvalidBatch(Exception):
+    """Raised when operations fail validation; nothing has been written."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid operations")
+        self.errors = errors  # Human-readable messages, one per bad operation
+
+
+class BatchTable:
+    """The batch statements of one CV table, built from its crud Resource."""
+
+    def __init__(self, resource):
+        self.table = resource.table
+        self.columns = resource.columns  # Columns the forms write, in table order
+        self.nullable = resource.nullable  # Optional columns; blank values are stored as NULL
+        self.checks = [(column, validator(column)) for column in self.columns]
+        # The form statements, bumping the version on update, plus variants that only match an unchanged row
+        self.sql = {
+            ('create', False): resource.insert_sql,
+            ('update', False): resource.update_sql,
+            ('update', True): resource.update_sql + " AND version=%s",
+            ('delete', False): resource.delete_sql,
+            ('delete', True): resource.delete_sql + " AND version=%s",
+        }
+        self.versions_sql = f"SELECT id, version FROM {self.table} WHERE tenant_id=%s AND id > %s ORDER BY id LIMIT %s"
+
+    def values(self, values):
+        """Return a row's values in table order; raise ValueError naming the first bad column."""
+        if not isinstance(values, dict):
+            raise ValueError("values must be an object")
+        unknown = [column for column in values if column not in self.columns]
+        if unknown:
+            raise ValueError(f"unknown columns {', '.join(unknown)}")
+        row = []
+        for column, check in self.checks:
+            value = values.get(column)
+            if value is None or str(value).strip() == '':
+                if column not in self.nullable:
+                    raise ValueError(f"missing {column}")
+                value = None
+            elif check:
+                try:
+                    check(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"invalid {column} {value!r}")
+            row.append(value)
+        return tuple(row)
+
+    def params(self, operation, tenant_id):
+        """Return the parameters of an operation's statement."""
+        if operation.action == 'create':
+            return (tenant_id,) + operation.values
+        params = (operation.values or ()) + (tenant_id, operation.id)
+        return params + (operation.version,) if operation.version is not None else params
+
+    def versions(self, cursor, tenant_id, ids):
+        """Return {id: version} of the tenant's rows among `ids`."""
+        cursor.execute(f"SELECT id, version FROM {self.table} WHERE tenant_id=%s AND id IN ({', '.join(['%s'] * len(ids))})", (tenant_id, *ids))
+        return dict(cursor.fetchall())
+
+
+class Operation:
+    """One validated entry of a batch and, once applied, its outcome."""
+
+    def __init__(self, index, action, section, table, row_id=None, version=None, values=None):
+        self.index = index  # Position in the request
+        self.action = action  # create, update or delete
+        self.section = section  # URL name of the section, e.g. work-experience
+        self.table = table  # BatchTable
+        self.id = row_id  # Assigned by the database for creates
+        self.version = version  # Version the client read; None skips the check
+        self.values = values  # Column values in table order; None for deletes
+        self.status = None
+        self.new_version = None
+
+    def result(self):
+        result = {'op': self.action, 'section': self.section, 'id': self.id, 'status': self.status}
+        if self.new_version is not None:
+            result['version'] = self.new_version
+        return result
+
+
+def integer(value, name):
+    if isinstance(value, bool):
+        raise ValueError(f"invalid {name} {value!r}")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"missing or invalid {name}")
+
+
+def parse_operation(index, entry, tables, sections, seen):
+    """Validate one entry; `seen` collects the rows already named so one row cannot be written twice."""
+    if not isinstance(entry, dict):
+        raise ValueError("not an object")
+    action = entry.get('op')
+    if action not in ACTIONS:
+        raise ValueError(f"op must be one of {', '.join(ACTIONS)}")
+    section = entry.get('section')
+    if section not in sections:
+        raise ValueError(f"unknown section {section!r}; choose from {', '.join(sections)}")
+    table = tables[sections[section]]
+    row_id = version = values = None
+    if action != 'create':
+        row_id = integer(entry.get('id'), 'id')
+        if (table.table, row_id) in seen:
+            raise ValueError(f"{section} {row_id} appears more than once")
+        seen.add((table.table, row_id))
+        if entry.get('version') is not None:
+            version = integer(entry['version'], 'version')
+    if action != 'delete':
+        values = table.values(entry.get('values'))
+    return Operation(index, action, section, table, row_id, version, values)
+
+
+def parse_operations(entries, tables, sections):
+    """Validate every entry; return the Operations or raise InvalidBatch."""
+    operations, errors, seen = [], [], set()
+    for index, entry in enumerate(entries):
+        try:
+            operations.append(parse_operation(index, entry, tables, sections, seen))
+        except ValueError as err:
+            errors.append(f"Operation {index}: {err}")
+            if len(errors) >= MAX_ERRORS:
+                break
+    if errors:
+        raise InvalidBatch(errors)
+    return operations
+
+
+def apply_operations(operations):
+    """Run the operations in one transaction; return True if committed, False if rolled back on a conflict.
+
+    Each operation's status (and id and version, where known) is filled in either way.
+    """
+    tenant_id = current_tenant()  # Read once: the whole batch belongs to the same tenant
+    groups = {}  # (table, action, version checked) -> operations, in order of first appearance
+    for operation in operations:
+        groups.setdefault((operation.table.table, operation.action, operation.version is not None), []).append(operation)
+    with db_connection() as mydb:  # One pooled primary connection and one transaction for the whole batch
+        if not mydb:
+            raise Unavailable()
+        cursor = mydb.cursor()
+        try:
+            for (_, action, checked), group in groups.items():
+                table = group[0].table
+                if action == 'create':
+                    for operation in group:  # One at a time: ids need not be consecutive (auto_increment_increment)
+                        cursor.execute(table.sql[action, checked], table.params(operation, tenant_id))
+                        operation.id, operation.new_version, operation.status = cursor.lastrowid, 1, 'created'
+                    continue
+                cursor.executemany(table.sql[action, checked], [table.params(operation, tenant_id) for operation in group])
+                if cursor.rowcount != len(group):  # A row was missing or had another version
+                    mydb.rollback()
+                    report_failures(cursor, operations, tenant_id)
+                    return False
+            # Updates without a version: read the new one inside the transaction, one query per table
+            unchecked = {}
+            for operation in operations:
+                if operation.action == 'update':
+                    if operation.version is None:
+                        unchecked.setdefault(operation.table, []).append(operation)
+                    else:
+                        operation.new_version = operation.version + 1
+                if operation.action != 'create':
+                    operation.status = operation.action + 'd'
+            for table, group in unchecked.items():
+                versions = table.versions(cursor, tenant_id, [operation.id for operation in group])
+                for operation in group:
+                    operation.new_version = versions.get(operation.id)
+            mydb.commit()  # One commit for every row of the batch
+        finally:
+            cursor.close()
+    return True
+
+
+def report_failures(cursor, operations, tenant_id):
+    """After a rollback, mark the operations whose row is gone or has another version; the rest were not applied."""
+    ids = {}
+    for operation in operations:
+        if operation.action != 'create':
+            ids.setdefault(operation.table, []).append(operation.id)
+    current = {table: table.versions(cursor, tenant_id, table_ids) for table, table_ids in ids.items()}
+    for operation in operations:
+        operation.status = 'aborted'
+        if operation.action == 'create':
+            operation.id = operation.new_version = None
+            continue
+        version = current[operation.table].get(operation.id)
+        if version is None:
+            operation.status = 'not_found'
+        elif operation.version is not None and version != operation.version:
+            operation.status, operation.new_version = 'conflict', version  # The version the client should re-read from
+
+
+def create_batch(resources, query_cache, sections, on_writes=None, max_operations=500):
+    """Build the blueprint providing POST /api/batch and GET /api/versions/<section>.
+
+    `sections` maps URL names to tables, as for the JSON API. After the
+    commit, `on_writes(table, changes)` is called once per table written,
+    with the (action, id, row) of each change as the form routes pass them.
+    """
+    batch_api = Blueprint('batch', __name__, url_prefix='/api')
+    by_table = {resource.table: resource for resource in resources}
+    tables = {table: BatchTable(by_table[table]) for table in sections.values()}
+
+    @batch_api.route('/batch', methods=['POST'])
+    def batch():
+        """Validate and apply a list of operations, all or nothing."""
+        payload = request.get_json(silent=True)
+        entries = payload.get('operations') if isinstance(payload, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return json_response({'error': 'Post a JSON object with a non-empty "operations" list.'}, 400)
+        if len(entries) > max_operations:
+            return json_response({'error': f"At most {max_operations} operations per batch."}, 400)
+        try:
+            operations = parse_operations(entries, tables, sections)
+        except InvalidBatch as err:
+            return json_response({'error': "Validation failed; nothing was written.", 'details': err.errors}, 422)
+        try:
+            committed = apply_operations(operations)
+        except Unavailable:
+            return json_response({'error': "Database connection failed."}, 503)
+        except mysql.connector.Error as err:
+            print(f"Error applying batch: {err}")  # Log any database errors
+            return json_response({'error': "Unable to apply the batch; nothing was written."}, 500)
+        results = [operation.result() for operation in operations]
+        if not committed:
+            return json_response({'error': "Some rows were changed or deleted since they were read; nothing was written.", 'results': results}, 409)
+        for table in {operation.table.table for operation in operations}:
+            query_cache.invalidate(table)  # Expire cached queries and pages, once per table
+        if on_writes:
+            changes = {}  # table -> [(action, id, row)], in order
+            for operation in operations:
+                row = dict(zip(operation.table.columns, operation.values)) if operation.values is not None else None
+                changes.setdefault(operation.table.table, []).append((FORM_ACTIONS[operation.action], operation.id, row))
+            for table, table_changes in changes.items():
+                on_writes(table, table_changes)
+        return json_response({'results': results})
+
+    @batch_api.route('/versions/<section>')
+    def versions(section):
+        """Return the current versions of a section's rows, for the next batch's checks.
+
+        ?ids=1,2,3 picks rows (up to max_operations, as a batch would); otherwise
+        rows come in id order, ?limit= at a time, continuing from ?after=.
+        """
+        if section not in sections:
+            return json_response({'error': f"Unknown section; choose from {', '.join(sections)}"}, 404)
+        table = tables[sections[section]]
+        try:
+            ids = [integer(item, 'id') for item in request.args.get('ids', '').split(',') if item.strip()]
+            after = integer(request.args.get('after', 0), 'after')
+            limit = integer(request.args.get('limit', max_operations), 'limit')
+        except ValueError as err:
+            return json_response({'error': str(err).capitalize()}, 400)
+        if len(ids) > max_operations:
+            return json_response({'error': f"At most {max_operations} ids per request."}, 400)
+        if not 1 <= limit <= max_operations:
+            return json_response({'error': f"limit must be between 1 and {max_operations}."}, 400)
+        try:
+            with db_connection() as mydb:  # The primary: versions must include the latest writes
+                if not mydb:
+                    return json_response({'error': "Database connection failed."}, 503)
+                if ids:
+                    cursor = mydb.cursor()
+                    try:
+                        rows = sorted(table.versions(cursor, current_tenant(), ids).items())
+                    finally:
+                        cursor.close()
+                else:
+                    rows = mydb.prepared(table.versions_sql).execute((current_tenant(), after, limit)).fetchall()
+        except mysql.connector.Error as err:
+            print(f"Error fetching {section} versions: {err}")  # Log any database errors
+            return json_response({'error': f"Unable to load {section} versions."}, 500)
+        more = not ids and len(rows) == limit
+        return json_response({
+            'section': section,
+            'versions': {str(row_id): version for row_id, version in rows},
+            'next': url_for('batch.versions', section=section, after=rows[-1][0], limit=limit) if more else None,
+        })
+
+    return batch_api
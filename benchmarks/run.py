@@ -0,0 +1,347 @@
+"""Load-test every GET/POST route and compare the results with a stored baseline.
+
+The app runs in a separate process behind a threaded WSGI server, on top of
+the SQLite shim (benchmarks/sqlite_shim.py), with the five CV tables seeded to a configurable size. Each route is
+driven by concurrent clients and reported with throughput, p50/p95/p99
+latency, error count and peak traced memory.
+
+    python -m benchmarks.run --rows 1000 --clients 8 --requests 400
+    python -m benchmarks.run --save-baseline          # Record benchmarks/baseline.json
+    python -m benchmarks.run --tolerance 0.25         # Fail if 25% slower than the baseline
+
+Baselines are only meaningful on the machine that recorded them.
+"""
+import argparse  # Command-line options
+import http.client  # Benchmark clients
+import json  # Baseline and result files
+import os  # Environment for the app under test
+import shutil  # Removes the scratch directory
+import signal  # Stops the server process
+import subprocess  # Runs the server in its own process
+import sys  # Exit status and import path
+import tempfile  # Scratch directory for the database, journals and versions
+import threading  # Concurrent clients and the server thread
+import time  # Latency measurement
+import tracemalloc  # Per-route memory measurement
+import uuid  # Multipart boundary
+from urllib.parse import urlencode  # Form bodies
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+SKIPPED = {'static', 'metrics'}  # Not part of the application's own workload
+
+
+def sample_value(column, n):
+    """Return a plausible value for a column, based on its name."""
+    if column.endswith('_year'):
+        return str(1990 + n % 35)
+    if column.endswith('_date'):
+        return f"{2000 + n % 25}-{1 + n % 12:02d}-{1 + n % 28:02d}"
+    if column == 'email':
+        return f"user{n}@example.com"
+    if column in ('category', 'proficiency_level', 'company'):
+        return f"{column}-{n % 10}"
+    return f"{column.replace('_', ' ')} {n} " + 'lorem ipsum ' * 4
+
+
+def seed(app_module, rows, tenant_id=1):
+    """Insert `rows` rows into each CV table of a tenant through the app's own pool."""
+    ids = {}
+    with app_module.db_connection() as mydb:
+        cursor = mydb.cursor()
+        for table, listing in app_module.LISTINGS.items():
+            columns = [column for column in listing.columns if column != 'id']
+            sql = f"INSERT INTO {table} (tenant_id, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})"
+            cursor.executemany(sql, [(tenant_id,) + tuple(sample_value(column, n) for column in columns) for n in range(rows)])
+            mydb.commit()
+            cursor.execute(f"SELECT id FROM {table} WHERE tenant_id = %s ORDER BY id", (tenant_id,))
+            ids[table] = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    return ids
+
+
+def table_for(endpoint, listings):
+    """Map add_skill / edit_project / delete_education to the table it changes."""
+    name = endpoint.split('_', 1)[1] if '_' in endpoint else endpoint
+    for candidate in (name, name + 's'):
+        if candidate in listings:
+            return candidate
+    return None
+
+
+class Scenario:
+    """How to build requests for one route."""
+
+    def __init__(self, name, method, make_request, order):
+        self.name = name  # e.g. "GET /skills"
+        self.method = method
+        self.make_request = make_request  # n -> (path, body, headers)
+        self.order = order  # Reads first, then writes, then deletes
+
+
+def build_scenarios(app, listings, ids, rows):
+    """Create a scenario for every GET/POST route in the URL map."""
+    scenarios = []
+    form = {'Content-Type': 'application/x-www-form-urlencoded'}
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint in SKIPPED:
+            continue
+        endpoint = rule.endpoint.rsplit('.', 1)[-1]
+        table = table_for(endpoint, listings)
+        for method in ('GET', 'POST'):
+            if method not in rule.methods:
+                continue
+            name = f"{method} {rule.rule}"
+            if not rule.arguments:
+                if method == 'GET':
+                    make = lambda n, path=rule.rule: (path, None, {})
+                elif endpoint == 'batch':
+                    columns = [column for column in listings['skills'].columns if column != 'id']
+                    make = lambda n, columns=columns, skill_ids=ids['skills']: ('/api/batch', json.dumps({'operations': [
+                        {'op': 'update', 'section': 'skills', 'id': skill_ids[(n + k) % (len(skill_ids) // 2 or 1)], 'values': {c: sample_value(c, n + k) for c in columns}}
+                        for k in range(20)
+                    ] + [{'op': 'create', 'section': 'skills', 'values': {c: sample_value(c, n) for c in columns}}]}), {'Content-Type': 'application/json'})
+                elif endpoint == 'contact':
+                    make = lambda n: ('/contact', urlencode({'name': f'Bench {n}', 'email': f'bench{n}@example.com', 'message': 'Hello ' * 20}), form)
+                elif table:
+                    columns = [column for column in listings[table].columns if column != 'id']
+                    make = lambda n, path=rule.rule, columns=columns: (path, urlencode({c: sample_value(c, n) for c in columns}), form)
+                else:
+                    continue
+                scenarios.append(Scenario(name, method, make, 0 if method == 'GET' else 1))
+            elif rule.arguments == {'id'} and table:
+                table_ids = ids[table]
+                if endpoint.startswith('delete_'):
+                    make = lambda n, rule=rule, table_ids=table_ids: (rule.rule.replace('<int:id>', str(table_ids[-1 - n % len(table_ids)])), None, {})
+                    order = 2  # Deletes run last and consume ids from the end
+                elif method == 'POST':
+                    columns = [column for column in listings[table].columns if column != 'id']
+                    make = lambda n, rule=rule, columns=columns, table_ids=table_ids: (
+                        rule.rule.replace('<int:id>', str(table_ids[n % (len(table_ids) // 2 or 1)])),
+                        urlencode({c: sample_value(c, n) for c in columns}), form)
+                    order = 1
+                else:
+                    make = lambda n, rule=rule, table_ids=table_ids: (rule.rule.replace('<int:id>', str(table_ids[n % len(table_ids)])), None, {})
+                    order = 0
+                scenarios.append(Scenario(name, method, make, order))
+            elif rule.arguments == {'section', 'fmt'}:
+                scenarios.append(Scenario(name, method, lambda n: ('/export/skills.csv', None, {}), 0))
+            elif rule.arguments == {'fmt'}:
+                scenarios.append(Scenario(name, method, lambda n: (f"/cv.{('pdf', 'docx', 'md')[n % 3]}", None, {}), 0))
+            elif rule.arguments == {'section'} and method == 'GET':
+                scenarios.append(Scenario(name, method, lambda n, rule=rule: (rule.rule.replace('<section>', 'skills'), None, {}), 0))
+            elif rule.arguments == {'section'} and method == 'POST':
+                columns = [column for column in listings['skills'].columns if column != 'id']
+                csv_body = ','.join(columns) + '\n' + ''.join(','.join(sample_value(c, n) for c in columns) + '\n' for n in range(20))
+
+                def make(n, csv_body=csv_body):
+                    boundary = uuid.uuid4().hex
+                    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="skills.csv"\r\n'
+                            f'Content-Type: text/csv\r\n\r\n{csv_body}\r\n--{boundary}--\r\n')
+                    return '/import/skills', body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+                scenarios.append(Scenario(name, method, make, 1))
+            else:
+                print(f"Skipping {name}: no request generator for its arguments")
+    scenarios.sort(key=lambda scenario: (scenario.order, scenario.name))
+    return scenarios
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def drive(port, scenario, clients, numbers):
+    """Send one request per number from `clients` threads; return (latencies, errors, wall time)."""
+    latencies, errors = [], []
+    counter = iter(numbers)
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            path, body, headers = scenario.make_request(n)
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            started = time.perf_counter()
+            try:
+                conn.request(scenario.method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except OSError as err:
+                status = str(err)
+            finally:
+                conn.close()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not (isinstance(status, int) and status < 400):
+                    errors.append(status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_scenario(port, scenario, clients, requests, warmup=0, repeat=1):
+    """Drive one route with concurrent clients; return its statistics.
+
+    The first `warmup` requests fill caches and pools and are not measured.
+    With repeat > 1 the fastest run (by p50) is kept, which filters out
+    interference from the rest of the machine the way timeit does.
+    """
+    if warmup:
+        drive(port, scenario, clients, range(warmup))
+    best = None
+    for attempt in range(repeat):
+        start = warmup + attempt * requests
+        run = drive(port, scenario, clients, range(start, start + requests))
+        run[0].sort()
+        if best is None or percentile(run[0], 0.5) < percentile(best[0], 0.5):
+            best = run
+    latencies, errors, wall = best
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_sample': [str(error) for error in errors[:3]],
+        'rps': len(latencies) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def measure_memory(app, scenario, requests):
+    """Peak Python heap growth (KiB) while the app serves a few sequential requests.
+
+    Uses an in-process test client so only the app's own allocations are counted.
+    """
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for n in range(requests):
+            path, body, headers = scenario.make_request(10_000 + n)
+            client.open(path, method=scenario.method, data=body, headers=headers).close()
+        return (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baseline, tolerance, tail_tolerance, min_delta_ms):
+    """Return regression messages for routes slower than the baseline allows.
+
+    p50 and throughput use `tolerance`; p95 is noisier, so it gets `tail_tolerance`.
+    Latency differences below `min_delta_ms` are ignored as timer noise.
+    """
+    failures = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for key, allowed in (('p50_ms', tolerance), ('p95_ms', tail_tolerance)):
+            limit = max(before[key] * (1 + allowed), before[key] + min_delta_ms)
+            if result[key] > limit:
+                failures.append(f"{name}: {key[:3]} {result[key]:.1f}ms vs baseline {before[key]:.1f}ms")
+        if result['rps'] < before['rps'] * (1 - tolerance):
+            failures.append(f"{name}: {result['rps']:.0f} req/s vs baseline {before['rps']:.0f} req/s")
+        if result['errors'] > before['errors']:
+            failures.append(f"{name}: {result['errors']} errors vs baseline {before['errors']}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000, help="Rows seeded into each table")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent clients per route")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per route")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per route; the fastest is reported")
+    parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests per route before timing starts")
+    parser.add_argument('--memory-requests', type=int, default=10, help="Sequential requests per route under tracemalloc (0 to skip)")
+    parser.add_argument('--routes', help="Only run routes whose 'METHOD /path' contains one of these comma-separated strings")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results to the baseline file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p50/throughput slowdown before the run fails (0.2 = 20%%)")
+    parser.add_argument('--tail-tolerance', type=float, default=0.5, help="Allowed p95 slowdown")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="Latency differences below this are ignored")
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.mkdtemp(prefix='cv-bench-')
+    os.environ.update(
+        BENCH_DB=os.path.join(scratch, 'bench.db'),
+        CACHE_VERSIONS_DIR=os.path.join(scratch, 'versions'),  # Shared with the server so seeding and writes invalidate its caches
+        CONTACT_SPILL_DIR=os.path.join(scratch, 'contact-queue'),
+        DOCUMENT_CACHE_DIR=os.path.join(scratch, 'documents'),  # The /cv.<format> scenarios render into it
+        DB_POOL_SIZE=str(max(args.clients, 5)),
+        RATE_LIMIT_ENABLED='false',  # The load comes from one client IP
+        SLOW_REQUEST_THRESHOLD=os.environ.get('SLOW_REQUEST_THRESHOLD', '3600'),  # Keep the report readable
+    )
+    sys.path.insert(0, ROOT)
+    from benchmarks import sqlite_shim
+    sqlite_shim.install(os.environ['BENCH_DB'])
+    import app as app_module  # Used here for seeding, the URL map and the memory pass
+    application = app_module.create_app({'CACHE_WARMUP': False, 'SEARCH_WARMUP': False})  # The tables are only seeded afterwards
+    server = None
+    try:
+        ids = seed(app_module, args.rows)
+        # The server gets its own process so client threads do not compete with it for the GIL
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.serve'], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        port = int(server.stdout.readline())
+        scenarios = build_scenarios(application, app_module.LISTINGS, ids, args.rows)
+        if args.routes:
+            wanted = args.routes.split(',')
+            scenarios = [scenario for scenario in scenarios if any(part in scenario.name for part in wanted)]
+
+        results = {}
+        print(f"{'route':<42} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'mem KiB':>8}")
+        for scenario in scenarios:
+            result = run_scenario(port, scenario, args.clients, args.requests, args.warmup, args.repeat)
+            result['memory_kib'] = measure_memory(application, scenario, args.memory_requests) if args.memory_requests else None
+            results[scenario.name] = result
+            memory = f"{result['memory_kib']:.0f}" if result['memory_kib'] is not None else '-'
+            print(f"{scenario.name:<42} {result['rps']:>8.0f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['errors']:>6} {memory:>8}")
+            if result['errors']:
+                print(f"    e.g. {', '.join(result['error_sample'])}")
+    finally:
+        if server:
+            server.send_signal(signal.SIGINT)  # Lets the server flush its contact queue
+            server.wait(10)
+        application.extensions['cv']['contact_queue'].close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {'settings': {'rows': args.rows, 'clients': args.clients, 'requests': args.requests, 'repeat': args.repeat}, 'routes': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline to record one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != report['settings']:
+        print(f"Warning: baseline was recorded with {baseline.get('settings')}")
+    failures = compare(results, baseline.get('routes', {}), args.tolerance, args.tail_tolerance, args.min_delta_ms)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    print("Regressions found." if failures else "No regressions against the baseline.")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
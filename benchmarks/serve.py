@@ -0,0 +1,32 @@
+"""Serve the app over HTTP on the SQLite shim, in its own process, for benchmarks/run.py.
+
+Prints the port it listens on as the first line of stdout. Configured by the
+same environment variables as the app, plus BENCH_DB for the SQLite file and
+BENCH_DB_LATENCY for a simulated per-statement round-trip. `benchmarks.serve:app`
+can also be loaded by gunicorn.
+"""
+import os  # BENCH_DB and the app's settings
+import sys  # Import path
+from werkzeug.serving import make_server, WSGIRequestHandler  # Threaded WSGI server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import sqlite_shim  # noqa: E402
+
+sqlite_shim.install(os.environ['BENCH_DB'], float(os.getenv('BENCH_DB_LATENCY', '0')))
+import app as app_module  # noqa: E402  Imported after the shim so the pool opens SQLite connections
+
+app = app_module.create_app()  # Also the WSGI app for gunicorn
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass  # One access-log line per request would swamp the report
+
+
+if __name__ == '__main__':
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    print(server.server_port, flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        app.extensions['cv']['contact_queue'].close()
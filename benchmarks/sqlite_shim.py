@@ -0,0 +1,159 @@
+"""A mysql.connector stand-in backed by SQLite, so the app can be benchmarked without a MySQL server.
+
+Only the parts of the connector API that db.py and the routes use are
+provided. install() swaps it in for mysql.connector.connect; everything
+above the driver (pool, caches, routes) runs unchanged.
+"""
+import sqlite3  # Embedded database behind the shim
+import threading  # Serialises schema creation across pool threads
+import time  # Simulated network round-trip
+import mysql.connector  # Error classes re-raised by the shim
+
+# SQLite's AUTOINCREMENT needs id alone as the primary key, so the (tenant_id, id)
+# clustering of schema/migrations/0004_tenants.sql becomes a (tenant_id, id) index
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenants (id INTEGER PRIMARY KEY AUTOINCREMENT, slug TEXT NOT NULL UNIQUE, name TEXT NOT NULL DEFAULT '');
+INSERT OR IGNORE INTO tenants (id, slug, name) VALUES (1, 'default', '');
+CREATE TABLE IF NOT EXISTS personal_info (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, name TEXT NOT NULL, email TEXT NOT NULL, phone TEXT NOT NULL, bio TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE IF NOT EXISTS education (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, school TEXT NOT NULL, achievement TEXT NOT NULL, start_year INTEGER NOT NULL, end_year INTEGER, version INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE IF NOT EXISTS work_experience (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, company TEXT NOT NULL, position TEXT NOT NULL, start_year INTEGER NOT NULL, end_year INTEGER, description TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE IF NOT EXISTS skills (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, skill_name TEXT NOT NULL, category TEXT NOT NULL, proficiency_level TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, project_name TEXT NOT NULL, description TEXT NOT NULL, start_date TEXT NOT NULL, end_date TEXT, version INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE IF NOT EXISTS contact (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, name TEXT NOT NULL, email TEXT NOT NULL, message TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_personal_info_tenant ON personal_info (tenant_id, id);
+CREATE INDEX IF NOT EXISTS idx_education_tenant ON education (tenant_id, id);
+CREATE INDEX IF NOT EXISTS idx_work_experience_tenant ON work_experience (tenant_id, id);
+CREATE INDEX IF NOT EXISTS idx_skills_tenant ON skills (tenant_id, id);
+CREATE INDEX IF NOT EXISTS idx_projects_tenant ON projects (tenant_id, id);
+CREATE INDEX IF NOT EXISTS idx_personal_info_tenant_name ON personal_info (tenant_id, name, id);
+CREATE INDEX IF NOT EXISTS idx_education_tenant_start_year ON education (tenant_id, start_year, id);
+CREATE INDEX IF NOT EXISTS idx_work_experience_tenant_start_year ON work_experience (tenant_id, start_year, id);
+CREATE INDEX IF NOT EXISTS idx_skills_tenant_category ON skills (tenant_id, category, id);
+CREATE INDEX IF NOT EXISTS idx_projects_tenant_start_date ON projects (tenant_id, start_date, id);
+"""
+
+_schema_lock = threading.Lock()
+_latency = 0.0  # Seconds added to every statement, set by install()
+
+
+def translate_error(err):
+    """Map a sqlite3 exception onto the matching mysql.connector class."""
+    if isinstance(err, sqlite3.IntegrityError):
+        return mysql.connector.IntegrityError(msg=str(err))
+    if isinstance(err, sqlite3.OperationalError):
+        return mysql.connector.OperationalError(msg=str(err))
+    if isinstance(err, sqlite3.ProgrammingError):
+        return mysql.connector.ProgrammingError(msg=str(err))
+    return mysql.connector.DatabaseError(msg=str(err))
+
+
+class Cursor:
+    """Cursor translating %s placeholders to SQLite's ?."""
+
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+        self._first_id = None  # First id of the last executemany() INSERT
+
+    @staticmethod
+    def _sql(sql):
+        return sql.replace('%s', '?')
+
+    def execute(self, sql, params=(), *args, **kwargs):
+        self._first_id = None
+        if _latency:
+            time.sleep(_latency)  # Stands in for the MySQL round-trip; yields under gevent like a socket read would
+        try:
+            self._cursor.execute(self._sql(sql), tuple(params or ()))
+        except sqlite3.Error as err:
+            raise translate_error(err) from err
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        rows = [tuple(params) for params in seq_params]
+        inserting = sql.lstrip()[:6].upper() == 'INSERT'
+        if _latency and rows:
+            time.sleep(_latency if inserting else _latency * len(rows))  # mysql.connector sends one multi-row INSERT, other statements row by row
+        try:
+            self._cursor.executemany(self._sql(sql), rows)
+            if inserting and rows:
+                # Like MySQL's multi-row INSERT, lastrowid is the first row's id; the ids are consecutive
+                self._first_id = self._cursor.connection.execute('SELECT last_insert_rowid()').fetchone()[0] - len(rows) + 1
+        except sqlite3.Error as err:
+            raise translate_error(err) from err
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._first_id if self._first_id is not None else self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class Connection:
+    """Connection exposing the mysql.connector methods the pool relies on."""
+
+    unread_result = False  # SQLite cursors never block the connection with pending rows
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)  # The pool hands connections between threads
+        with _schema_lock:
+            self._db.execute('PRAGMA journal_mode=WAL')  # Readers do not block the writer
+            self._db.executescript(SCHEMA)
+
+    @property
+    def in_transaction(self):
+        return self._db.in_transaction
+
+    def cursor(self, *args, **kwargs):
+        return Cursor(self._db)
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def start_transaction(self, *args, **kwargs):
+        if not self._db.in_transaction:
+            self._db.execute('BEGIN')
+
+    def ping(self, reconnect=False, *args, **kwargs):
+        self._db.execute('SELECT 1')
+
+    def is_connected(self):
+        return True
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        self._db.close()
+
+
+def install(path, latency=0.0):
+    """Route every mysql.connector.connect() call to a SQLite database file.
+
+    `latency` seconds are added to each statement to model a database on another host.
+    """
+    global _latency
+    _latency = latency
+    mysql.connector.connect = lambda **kwargs: Connection(path)
@@ -0,0 +1,142 @@
+"""Measure how long a worker takes to become ready, with and without gunicorn's --preload.
+
+The tables are seeded once into a SQLite database behind the shim. Then:
+
+- fresh: each worker is a new process that imports app.py, calls
+  create_app() (building and warming everything) and serves its first
+  request, as every gunicorn worker does without --preload;
+- preload: one master process imports and builds the app, then forks the
+  workers, as `gunicorn --preload` does; a worker only pays for the fork
+  and its first request, which opens its own database connection.
+
+For each worker the report gives the import, create_app(), fork and
+first-request times, and the total until the first response. Interpreter
+start-up is excluded. Compiled templates are on disk from the seeding run,
+as after any restart.
+
+    python -m benchmarks.startup --workers 4
+    python -m benchmarks.startup --route /api/cv --rows 2000
+"""
+import argparse  # Command-line options
+import json  # Results passed from the child processes
+import os  # Environment for the app under test, fork and pipes
+import shutil  # Removes the scratch directory
+import subprocess  # One fresh process per worker
+import sys  # Import path
+import tempfile  # Scratch directory for the database, journals and caches
+import time  # Phase timings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def boot():
+    """Import and build the app on the SQLite shim; return (app, import seconds, create seconds)."""
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from benchmarks import sqlite_shim  # Brings in mysql.connector, which the app imports anyway
+    sqlite_shim.install(os.environ['BENCH_DB'])
+    import app as app_module
+    imported = time.perf_counter()
+    application = app_module.create_app()
+    return application, imported - started, time.perf_counter() - imported
+
+
+def first_request(application, route):
+    """Serve one request; return its duration in seconds."""
+    started = time.perf_counter()
+    response = application.test_client().get(route)
+    if response.status_code != 200:
+        raise RuntimeError(f"{route} answered {response.status_code}")
+    return time.perf_counter() - started
+
+
+def child_seed(rows):
+    from benchmarks.run import seed
+    application, _, _ = boot()
+    import app as app_module
+    seed(app_module, rows)
+    application.extensions['cv']['contact_queue'].close()
+
+
+def child_fresh(route):
+    application, imported, created = boot()
+    served = first_request(application, route)
+    print(json.dumps({'import': imported, 'create': created, 'fork': 0, 'first_request': served}))
+
+
+def child_preload(route, workers):
+    """Build the app once, then fork `workers` workers one after the other, like the gunicorn master."""
+    application, imported, created = boot()
+    results = [{'import': imported, 'create': created, 'fork': 0, 'first_request': 0}]
+    for _ in range(workers):
+        read_end, write_end = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:  # The worker
+            os.close(read_end)
+            started = time.perf_counter()  # Same clock as the master's: CLOCK_MONOTONIC is system-wide
+            served = first_request(application, route)
+            os.write(write_end, json.dumps({'import': 0, 'create': 0, 'fork': started - forked, 'first_request': served}).encode())
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            results.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    print(json.dumps(results))
+
+
+def run_child(*args):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', *args], cwd=ROOT, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1]) if output.strip() else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help="Workers started in each mode")
+    parser.add_argument('--rows', type=int, default=500, help="Rows seeded into each table")
+    parser.add_argument('--route', default='/skills', help="Route of each worker's first request")
+    parser.add_argument('--child', choices=('seed', 'fresh', 'preload'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child == 'seed':
+        child_seed(args.rows)
+        return 0
+    if args.child == 'fresh':
+        child_fresh(args.route)
+        return 0
+    if args.child == 'preload':
+        child_preload(args.route, args.workers)
+        return 0
+
+    scratch = tempfile.mkdtemp(prefix='cv-startup-')
+    try:
+        os.environ.update(
+            BENCH_DB=os.path.join(scratch, 'bench.db'),
+            CACHE_VERSIONS_DIR=os.path.join(scratch, 'versions'),
+            CONTACT_SPILL_DIR=os.path.join(scratch, 'contact-queue'),
+            TEMPLATE_CACHE_DIR=os.path.join(scratch, 'jinja'),
+            DOCUMENT_CACHE_DIR=os.path.join(scratch, 'documents'),
+            RATE_LIMIT_FILE=os.path.join(scratch, 'rate-limits'),
+            SLOW_REQUEST_THRESHOLD='3600',
+        )
+        run_child('--child', 'seed', '--rows', str(args.rows))
+        fresh = [run_child('--child', 'fresh', '--route', args.route) for _ in range(args.workers)]
+        preload = run_child('--child', 'preload', '--route', args.route, '--workers', str(args.workers))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"{'mode':<8} {'worker':>6} {'import ms':>10} {'create ms':>10} {'fork ms':>8} {'1st req ms':>11} {'ready ms':>9}")
+    rows = [('fresh', str(n), result) for n, result in enumerate(fresh, start=1)]
+    rows += [('preload', 'master' if n == 0 else str(n), result) for n, result in enumerate(preload)]
+    for mode, worker, result in rows:
+        ready = sum(result[phase] for phase in ('import', 'create', 'fork', 'first_request'))
+        print(f"{mode:<8} {worker:>6} {result['import'] * 1000:>10.1f} {result['create'] * 1000:>10.1f} "
+              f"{result['fork'] * 1000:>8.1f} {result['first_request'] * 1000:>11.1f} {ready * 1000:>9.1f}")
+    fresh_ready = sum(sum(result.values()) for result in fresh) / len(fresh)
+    preload_ready = sum(sum(result.values()) for result in preload[1:]) / len(preload[1:])
+    print(f"Mean time to a worker's first response: fresh {fresh_ready * 1000:.1f} ms, preloaded {preload_ready * 1000:.1f} ms "
+          f"(plus {sum(preload[0].values()) * 1000:.1f} ms once in the master)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Check that the cost of a request stays flat as the number of tenants grows.
+
+For each tenant count, a fresh process seeds that many tenants (each with the
+same number of rows per table) into a SQLite database behind the shim, runs
+the app with TENANT_MODE=subdomain and caching disabled, and sends requests
+for random tenants through the Flask test client. Every request therefore
+resolves its tenant, runs its tenant-scoped SQL and renders, exactly like a
+cache miss in production. Slugs are resolved once before timing starts, as
+they would be in a warm worker.
+
+    python -m benchmarks.tenants --tenants 1,100,1000,10000 --requests 500
+    python -m benchmarks.tenants --tolerance 0.5   # Fail if p50 at the most tenants is 50% above p50 at the fewest
+"""
+import argparse  # Command-line options
+import json  # Results passed from the child processes
+import os  # Environment for the app under test
+import random  # Which tenant each request is for
+import shutil  # Removes the scratch directories
+import subprocess  # One process per tenant count, so each imports the app fresh
+import sys  # Exit status and import path
+import tempfile  # Scratch directory for the database, journals and versions
+import time  # Latency measurement
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DOMAIN = 'bench.test'
+ROUTES = ('/skills', '/education?sort=start_year', '/projects?order=desc', '/api/work-experience', '/api/cv')
+
+
+def seed_tenants(app_module, tenants, rows):
+    """Create tenants 2..N next to the default tenant and give each `rows` rows per table; return their slugs."""
+    from benchmarks.run import sample_value
+    slugs = ['default'] + [f"tenant-{n}" for n in range(2, tenants + 1)]
+    with app_module.db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.executemany("INSERT INTO tenants (slug, name) VALUES (%s, %s)", [(slug, slug) for slug in slugs[1:]])
+        cursor.execute("SELECT id FROM tenants ORDER BY id")
+        tenant_ids = [row[0] for row in cursor.fetchall()]
+        for table, listing in app_module.LISTINGS.items():
+            columns = [column for column in listing.columns if column != 'id']
+            sql = f"INSERT INTO {table} (tenant_id, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})"
+            cursor.executemany(sql, [
+                (tenant_id,) + tuple(sample_value(column, n) for column in columns)
+                for tenant_id in tenant_ids for n in range(rows)
+            ])
+        mydb.commit()
+        cursor.close()
+    return slugs
+
+
+def child(tenants, rows, requests, seed):
+    """Run inside a fresh process: seed, warm up, time `requests` requests; print the latencies as JSON."""
+    scratch = tempfile.mkdtemp(prefix='cv-tenants-')
+    try:
+        os.environ.update({
+            'TENANT_MODE': 'subdomain',
+            'TENANT_BASE_DOMAIN': BASE_DOMAIN,
+            'CACHE_MAX_ENTRIES': '0',  # Every lookup misses: measure the database path, not the cache
+            'CACHE_VERSIONS_DIR': os.path.join(scratch, 'versions'),
+            'CONTACT_SPILL_DIR': os.path.join(scratch, 'contact'),
+            'TEMPLATE_CACHE_DIR': os.path.join(scratch, 'jinja'),
+            'COMPRESSION_ENABLED': 'false',
+        })
+        sys.path.insert(0, ROOT)
+        from benchmarks import sqlite_shim
+        sqlite_shim.install(os.path.join(scratch, 'bench.db'))
+        import app as app_module  # Imported after the shim so the pool opens SQLite connections
+        application = app_module.create_app()
+        services = application.extensions['cv']
+        try:
+            started = time.perf_counter()
+            slugs = seed_tenants(app_module, tenants, rows)
+            seeded = time.perf_counter() - started
+            for slug in slugs:
+                services['tenant_directory'].resolve(slug)
+            client = application.test_client()
+            rng = random.Random(seed)
+            for route in ROUTES:  # Open the pooled connections and prepare the statements
+                client.get(route, headers={'Host': f"{slugs[0]}.{BASE_DOMAIN}"})
+            latencies, errors = [], 0
+            for n in range(requests):
+                host = f"{rng.choice(slugs)}.{BASE_DOMAIN}"
+                route = ROUTES[n % len(ROUTES)]
+                started = time.perf_counter()
+                response = client.get(route, headers={'Host': host})
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+            print(json.dumps({'tenants': tenants, 'seconds_to_seed': seeded, 'latencies': latencies, 'errors': errors}))
+        finally:
+            services['contact_queue'].close()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', default='1,100,1000,10000', help="Comma-separated tenant counts to compare")
+    parser.add_argument('--rows', type=int, default=20, help="Rows per table for every tenant")
+    parser.add_argument('--requests', type=int, default=500, help="Timed requests per tenant count")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed choosing the tenant of each request")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed p50 growth from the fewest to the most tenants (0.5 = 50%%)")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(args.child, args.rows, args.requests, args.seed)
+        return 0
+
+    results = []
+    for tenants in sorted(int(value) for value in args.tenants.split(',')):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.tenants', '--child', str(tenants), '--rows', str(args.rows),
+             '--requests', str(args.requests), '--seed', str(args.seed)],
+            cwd=ROOT, check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        latencies = result['latencies']
+        print(f"{tenants:>7} tenants  p50 {percentile(latencies, 0.5) * 1000:7.2f} ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:7.2f} ms  errors {result['errors']}  "
+              f"(seeded in {result['seconds_to_seed']:.1f} s)", flush=True)
+
+    failed = any(result['errors'] for result in results)
+    if len(results) > 1:
+        first, last = (percentile(result['latencies'], 0.5) for result in (results[0], results[-1]))
+        growth = last / first - 1
+        print(f"p50 growth from {results[0]['tenants']} to {results[-1]['tenants']} tenants: {growth:+.0%}")
+        failed = failed or growth > args.tolerance
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Bulk import and export of the CV tables as CSV or JSON Lines."""
+import csv  # CSV reading and writing
+import io  # Text wrappers around uploaded files and streamed output
+import json  # JSON Lines reading and writing
+from contextlib import contextmanager  # Reopens an upload as text without closing it
+from datetime import date  # Validates *_date columns
+import click  # Command-line interface for `flask data ...`
+import mysql.connector  # Database errors raised while importing
+from flask import Blueprint, current_app, request, stream_with_context  # Routes for HTTP import/export
+from db import db_connection, stream_rows  # Pooled connections and unbuffered exports
+from tenants import DEFAULT_TENANT_ID, current_tenant, set_tenant  # Imports and exports cover one tenant's rows
+
+FORMATS = ('csv', 'jsonl')  # Supported file formats
+CHUNK_SIZE = 5000  # Rows per INSERT batch and per transaction
+MAX_ERRORS = 20  # Validation errors reported before giving up
+YEAR_MIN, YEAR_MAX = 0, 65535  # What the SMALLINT UNSIGNED year columns hold; anything else fails mid-import
+
+
+class ImportErrors(Exception):
+    """Raised when validation finds bad rows; nothing has been written."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors  # Human-readable messages, one per bad row
+
+
+def check_year(value):
+    if not YEAR_MIN <= int(value) <= YEAR_MAX:
+        raise ValueError(f"year {value} out of range")
+
+
+def check_date(value):
+    date.fromisoformat(str(value))
+
+
+def validator(column):
+    """Return the check applied to a column's values, based on its name."""
+    if column.endswith('_year'):
+        return check_year
+    if column.endswith('_date'):
+        return check_date
+    return None
+
+
+def read_records(stream, fmt):
+    """Yield one dict per row of a CSV or JSON Lines text stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+class BulkTable:
+    """Import/export for one table described by a pagination Listing."""
+
+    def __init__(self, listing):
+        self.table = listing.table
+        self.columns = [column for column in listing.columns if column != 'id']  # Columns the forms write
+        self.nullable = listing.nullable  # Optional columns; blank values are imported as NULL
+        self.select = listing.select() + " WHERE tenant_id = %s ORDER BY id"  # Export query, id included
+
+    def insert_sql(self, keep_ids):
+        columns = ['tenant_id'] + (['id'] if keep_ids else []) + self.columns
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def value(self, value, column):
+        """Blank optional values become NULL; CSV has no other way to write one."""
+        if column in self.nullable and (value is None or str(value).strip() == ''):
+            return None
+        return value
+
+    def values(self, record, keep_ids, tenant_id):
+        """Return the INSERT parameters for one record."""
+        values = tuple(self.value(record.get(column), column) for column in self.columns)
+        return (tenant_id,) + ((int(record['id']),) + values if keep_ids else values)
+
+    def validate(self, records, keep_ids=False):
+        """Check every record without keeping them in memory; return the row count."""
+        checks = [(column, validator(column)) for column in self.columns]
+        errors = []
+        count = 0
+        try:
+            for count, record in enumerate(records, start=1):
+                if not isinstance(record, dict):
+                    errors.append(f"Row {count}: not an object")
+                    continue
+                for column, check in checks:
+                    value = self.value(record.get(column), column)
+                    if value is None and column in self.nullable:
+                        continue
+                    if value is None or str(value).strip() == '':
+                        errors.append(f"Row {count}: missing {column}")
+                        break
+                    if check:
+                        try:
+                            check(value)
+                        except (TypeError, ValueError):
+                            errors.append(f"Row {count}: invalid {column} {value!r}")
+                            break
+                else:
+                    if keep_ids:
+                        try:
+                            int(record['id'])
+                        except (KeyError, TypeError, ValueError):
+                            errors.append(f"Row {count}: missing or invalid id")
+                if len(errors) >= MAX_ERRORS:
+                    break
+        except csv.Error as err:  # Malformed CSV, e.g. an unterminated quote or a NUL byte
+            errors.append(f"Row {count + 1}: {err}")
+        if errors:
+            raise ImportErrors(errors)
+        return count
+
+    def load(self, records, keep_ids=False, chunk_size=CHUNK_SIZE, progress=None):
+        """Insert records in chunks, one transaction per chunk; return the number inserted."""
+        sql = self.insert_sql(keep_ids)
+        tenant_id = current_tenant()  # Read once: the rows of one import all belong to the same tenant
+        inserted = 0
+        with db_connection() as mydb:  # One pooled connection for the whole import
+            if not mydb:
+                raise mysql.connector.Error(msg="Database connection failed.")
+            cursor = mydb.cursor()
+            chunk = []
+            for record in records:
+                chunk.append(self.values(record, keep_ids, tenant_id))
+                if len(chunk) >= chunk_size:
+                    inserted += self._write(mydb, cursor, sql, chunk, progress, inserted)
+                    chunk = []
+            if chunk:
+                inserted += self._write(mydb, cursor, sql, chunk, progress, inserted)
+            cursor.close()
+        return inserted
+
+    @staticmethod
+    def _write(mydb, cursor, sql, chunk, progress, done):
+        cursor.executemany(sql, chunk)  # Sent as a single multi-row INSERT
+        mydb.commit()  # One transaction per chunk keeps undo logs and lock times small
+        if progress:
+            progress(done + len(chunk))
+        return len(chunk)
+
+    def export(self, fmt, batch_size=CHUNK_SIZE):
+        """Yield the table as CSV or JSON Lines text, one batch of rows at a time."""
+        rows = stream_rows(self.select, (current_tenant(),), batch_size, reads=(self.table,))  # Unbuffered cursor: memory stays flat
+        if rows is None:
+            raise mysql.connector.Error(msg="Database connection failed.")
+        columns = self.columns + ['id']
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == 'csv' else None
+        try:
+            if writer:
+                writer.writerow(columns)
+            for count, row in enumerate(rows, start=1):
+                if writer:
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, row)), default=str) + '\n')
+                if count % batch_size == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            rows.close()
+
+    def import_stream(self, open_stream, fmt, keep_ids=False, chunk_size=CHUNK_SIZE, progress=None):
+        """Validate a whole file, then load it; open_stream() must give a fresh text stream context each call."""
+        with open_stream() as stream:
+            total = self.validate(read_records(stream, fmt), keep_ids)
+        with open_stream() as stream:
+            inserted = self.load(read_records(stream, fmt), keep_ids, chunk_size, progress)
+        return total, inserted
+
+
+def guess_format(filename, fmt=None):
+    """Pick the file format from an explicit choice or the file extension."""
+    fmt = fmt or filename.rsplit('.', 1)[-1].lower()
+    if fmt == 'json':
+        fmt = 'jsonl'
+    if fmt not in FORMATS:
+        raise click.BadParameter(f"Unsupported format {fmt!r}; use csv or jsonl")
+    return fmt
+
+
+def create_bulk(listings, query_cache, sections):
+    """Build the blueprint providing /export, /import and the `flask data` commands."""
+    bulk = Blueprint('bulk', __name__, cli_group='data')
+    tables = {table: BulkTable(listings[table]) for table in sections.values()}
+
+    @bulk.cli.command('export')
+    @click.argument('table', type=click.Choice(list(tables)))
+    @click.argument('output', type=click.Path(dir_okay=False, writable=True))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help="Defaults to the output file extension.")
+    @click.option('--tenant', 'tenant_id', default=DEFAULT_TENANT_ID, show_default=True, help="Id of the tenant whose rows are exported.")
+    def export_command(table, output, fmt, tenant_id):
+        """Export TABLE to OUTPUT as CSV or JSON Lines."""
+        fmt = guess_format(output, fmt)
+        set_tenant(tenant_id)
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            for text in tables[table].export(fmt):
+                f.write(text)
+        click.echo(f"Exported {table} to {output}")
+
+    @bulk.cli.command('import')
+    @click.argument('table', type=click.Choice(list(tables)))
+    @click.argument('source', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help="Defaults to the file extension.")
+    @click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, help="Rows per INSERT and per transaction.")
+    @click.option('--keep-ids', is_flag=True, help="Insert the id column from the file instead of letting MySQL assign one.")
+    @click.option('--tenant', 'tenant_id', default=DEFAULT_TENANT_ID, show_default=True, help="Id of the tenant the rows are imported for.")
+    def import_command(table, source, fmt, chunk_size, keep_ids, tenant_id):
+        """Validate SOURCE, then bulk-insert it into TABLE."""
+        fmt = guess_format(source, fmt)
+        set_tenant(tenant_id)  # Also scopes the cache invalidation below
+        open_stream = lambda: open(source, newline='', encoding='utf-8')
+        try:
+            with open_stream() as stream:
+                total = tables[table].validate(read_records(stream, fmt), keep_ids)
+        except ImportErrors as err:
+            for message in err.errors:
+                click.echo(message, err=True)
+            raise click.ClickException("Validation failed; nothing was imported.")
+        except ValueError as err:
+            raise click.ClickException(f"Unreadable file: {err}")
+        click.echo(f"Validated {total} rows")
+        with click.progressbar(length=total, label=f"Importing {table}") as bar:
+            progress = lambda done: bar.update(done - bar.pos)
+            try:
+                with open_stream() as stream:
+                    inserted = tables[table].load(read_records(stream, fmt), keep_ids, chunk_size, progress)
+            finally:
+                query_cache.invalidate(table)  # Expire cached queries and pages, even after a partial import
+        click.echo(f"Imported {inserted} rows into {table}")
+
+    @bulk.route('/export/<section>.<fmt>')
+    def export_section(section, fmt):
+        """Stream a whole section as a CSV or JSON Lines download."""
+        if section not in sections or fmt not in FORMATS:
+            return {'error': "Unknown section or format."}, 404
+        try:
+            chunks = tables[sections[section]].export(fmt)
+            first = next(chunks)  # Runs the query now so errors become a proper status code
+        except mysql.connector.Error as err:
+            print(f"Error exporting {section}: {err}")  # Log any database errors
+            return {'error': f"Unable to export {section}."}, 503
+
+        def generate():
+            yield first
+            yield from chunks  # Closing the response closes this generator and frees the connection
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = current_app.response_class(stream_with_context(generate()), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{sections[section]}.{fmt}"'
+        return response
+
+    @bulk.route('/import/<section>', methods=['POST'])
+    def import_section(section):
+        """Validate and import an uploaded CSV or JSON Lines file."""
+        upload = request.files.get('file')
+        if section not in sections or upload is None:
+            return {'error': "Post a file field to /import/<section>."}, 400
+        try:
+            fmt = guess_format(upload.filename or '', request.form.get('format'))
+        except click.BadParameter as err:
+            return {'error': err.message}, 400
+        table = sections[section]
+        chunk_size = request.form.get('chunk_size', CHUNK_SIZE, type=int)
+
+        @contextmanager
+        def open_stream():
+            upload.stream.seek(0)  # Large uploads are spooled to a temporary file, so they can be read twice
+            text = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+            try:
+                yield text
+            finally:
+                text.detach()  # Keep the upload open for the second pass
+        try:
+            total, inserted = tables[table].import_stream(open_stream, fmt, chunk_size=chunk_size)
+        except ImportErrors as err:
+            return {'error': "Validation failed; nothing was imported.", 'details': err.errors}, 422
+        except (ValueError, KeyError) as err:
+            return {'error': f"Unreadable file: {err}"}, 400
+        except mysql.connector.Error as err:
+            print(f"Error importing {section}: {err}")  # Log any database errors
+            query_cache.invalidate(table)
+            return {'error': f"Import of {section} failed part-way; completed chunks were kept."}, 500
+        query_cache.invalidate(table)  # Expire cached queries and pages
+        return {'table': table, 'validated': total, 'imported': inserted}
+
+    return bulk
@@ -0,0 +1,359 @@
+"""Read-through cache for table queries, invalidated by the mutation routes."""
+import os  # File paths for the shared version counters
+import pickle  # Serialises rows for the memcached/redis backends
+import sys  # Estimates the memory held by cached values
+import tempfile  # Default location for the version counter files
+import threading  # Lock protecting the in-process LRU
+import time  # Expiry timestamps for cached entries
+from collections import OrderedDict  # Keeps LRU entries in recency order
+
+try:
+    import fcntl  # File locks so workers do not lose each other's version bumps
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+def estimate_size(value):
+    """Approximate bytes held by a cached value: rows are tuples of str/int/date, pages bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return size
+
+
+def scoped_name(scope, table):
+    """Name a table's version counter and cache keys within the current scope (the tenant)."""
+    return f"{scope()}.{table}" if scope else table
+
+
+class LRUCache:
+    """In-process least-recently-used cache with a per-entry time to live and an optional byte quota."""
+
+    def __init__(self, maxsize=1024, ttl=300, max_bytes=0):
+        self.maxsize = maxsize  # Maximum number of entries kept
+        self.ttl = ttl  # Default lifetime of an entry in seconds (0 means no expiry)
+        self.max_bytes = max_bytes  # Approximate memory the entries may hold (0 means no limit)
+        self.bytes = 0  # Approximate memory held, only tracked with a quota
+        self.evictions = 0  # Entries dropped to stay within maxsize/max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._lock = threading.Lock()  # Guards self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the cached value or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]  # Drop expired entries lazily
+                self.bytes -= size
+                return None
+            self._data.move_to_end(key)  # Mark as most recently used
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries while over a limit."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0
+        size = estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old:
+                self.bytes -= old[2]
+            self._data[key] = (expires_at, value, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+                self.bytes -= self._data.popitem(last=False)[1][2]  # Evict the oldest entry
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove a key if present."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry:
+                self.bytes -= entry[2]
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+
+class PartitionedLRUCache:
+    """In-process LRU split into one LRUCache per partition (tenant), each with its own byte quota.
+
+    A busy tenant can only evict its own entries, never another tenant's.
+    Partitions are themselves kept in LRU order: past `max_partitions`, the
+    partition used least recently is dropped whole, so memory stays below
+    max_partitions * max_bytes however many tenants there are.
+    """
+
+    def __init__(self, partition, maxsize=1024, ttl=300, max_bytes=4 * 1024 * 1024, max_partitions=1000):
+        self.partition = partition  # Callable returning the current partition key
+        self.maxsize = maxsize  # Entries per partition
+        self.ttl = ttl
+        self.max_bytes = max_bytes  # Memory quota per partition
+        self.max_partitions = max_partitions  # Partitions kept in memory
+        self.dropped = 0  # Partitions dropped to stay within max_partitions
+        self._evicted = 0  # Evictions counted by partitions since dropped
+        self._partitions = OrderedDict()  # partition key -> LRUCache
+        self._lock = threading.Lock()  # Guards self._partitions
+
+    def _get_partition(self, create):
+        key = self.partition()
+        with self._lock:
+            cache = self._partitions.get(key)
+            if cache is not None:
+                self._partitions.move_to_end(key)
+            elif create:
+                cache = self._partitions[key] = LRUCache(self.maxsize, self.ttl, self.max_bytes)
+                while len(self._partitions) > self.max_partitions:
+                    _, oldest = self._partitions.popitem(last=False)
+                    self._evicted += oldest.evictions + len(oldest)
+                    self.dropped += 1
+            return cache
+
+    def get(self, key):
+        cache = self._get_partition(False)
+        return None if cache is None else cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._get_partition(True).set(key, value, ttl)
+
+    def delete(self, key):
+        cache = self._get_partition(False)
+        if cache is not None:
+            cache.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+
+    def stats(self):
+        """Partition count, approximate bytes held and entries evicted, across all partitions."""
+        with self._lock:
+            partitions = list(self._partitions.values())
+            evicted = self._evicted
+        return {
+            'partitions': len(partitions),
+            'bytes': sum(cache.bytes for cache in partitions),
+            'evictions': evicted + sum(cache.evictions for cache in partitions),
+            'partitions_dropped': self.dropped,
+        }
+
+
+class MemcachedCache:
+    """Cache backend for a local memcached server (requires pymemcache)."""
+
+    def __init__(self, host='127.0.0.1', port=11211, ttl=300):
+        from pymemcache.client.base import Client  # Imported lazily: only needed for this backend
+        self.client = Client((host, port), connect_timeout=1, timeout=1)
+        self.ttl = ttl
+
+    def get(self, key):
+        data = self.client.get(key)
+        return None if data is None else pickle.loads(data)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, pickle.dumps(value), expire=self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        """Atomically increment a counter, creating it if missing."""
+        value = self.client.incr(key, 1)
+        if value is None:
+            self.client.add(key, str(time.time_ns()).encode(), expire=0)  # Start from a unique value after eviction
+            value = self.client.incr(key, 1)
+        return value
+
+    def counter(self, key):
+        value = self.client.get(key)
+        return None if value is None else int(value)
+
+
+class RedisCache:
+    """Cache backend for a redis-compatible server (requires redis-py)."""
+
+    def __init__(self, url='redis://127.0.0.1:6379/0', ttl=300):
+        import redis  # Imported lazily: only needed for this backend
+        self.client = redis.Redis.from_url(url, socket_timeout=1)
+        self.ttl = ttl
+
+    def get(self, key):
+        data = self.client.get(key)
+        return None if data is None else pickle.loads(data)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        """Atomically increment a counter, creating it if missing."""
+        self.client.set(key, time.time_ns(), nx=True)  # Start from a unique value after eviction
+        return self.client.incr(key)
+
+    def counter(self, key):
+        value = self.client.get(key)
+        return None if value is None else int(value)
+
+
+class FileVersions:
+    """Per-table version counters stored as small files shared by all workers."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table):
+        return os.path.join(self.directory, table)
+
+    def get(self, table):
+        """Return the current version of a table (0 if never changed)."""
+        try:
+            with open(self._path(table)) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def modified(self, table):
+        """Return the Unix time the table was last changed, or 0 if never."""
+        try:
+            return os.stat(self._path(table)).st_mtime
+        except FileNotFoundError:
+            return 0
+
+    def bump(self, table):
+        """Increment a table's version and return the new value."""
+        path = self._path(table)
+        with open(path + '.lock', 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # Serialise bumps from concurrent workers
+            version = self.get(table) + 1
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                f.write(str(version))
+            os.replace(tmp, path)  # Readers see either the old or the new value, never half a file
+        return version
+
+
+class BackendVersions:
+    """Per-table version counters kept in a shared memcached/redis backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, table):
+        value = self.backend.counter(f"version:{table}")
+        return value if value is not None else self.bump(table)
+
+    def modified(self, table):
+        return self.backend.get(f"modified:{table}") or 0
+
+    def bump(self, table):
+        self.backend.set(f"modified:{table}", time.time(), 0)  # Remember when, for Last-Modified headers
+        return self.backend.incr(f"version:{table}")
+
+
+class ReadThroughCache:
+    """Caches query results per table; a table's entries die when its version changes.
+
+    With `scope` (a callable returning the current tenant), each tenant's copy of
+    a table has its own version counter and keys, so one tenant's writes never
+    expire another's entries.
+    """
+
+    def __init__(self, backend, versions, ttl=None, scope=None):
+        self.backend = backend  # Where cached values live
+        self.versions = versions  # Where per-table version counters live
+        self.ttl = ttl  # Lifetime of entries, None for the backend default
+        self.scope = scope  # Current tenant, or None for one shared scope
+        self.listeners = []  # Callables told the (unscoped) name of every invalidated table
+        self.hits = 0  # Lookups answered from the cache
+        self.misses = 0  # Lookups that ran the loader
+
+    def version(self, table):
+        """Return the current version of a table."""
+        return self.versions.get(scoped_name(self.scope, table))
+
+    def modified(self, table):
+        """Return the Unix time the table was last changed, or 0 if never."""
+        return self.versions.modified(scoped_name(self.scope, table))
+
+    def get_or_load(self, table, loader, key='all'):
+        """Return the cached value for (table, key), calling loader() on a miss.
+
+        A loader result of None is passed through without being cached.
+        """
+        try:
+            name = scoped_name(self.scope, table)
+            cache_key = f"{name}:{self.versions.get(name)}:{key}"
+            value = self.backend.get(cache_key)
+        except Exception as err:  # A broken cache server must not take the site down
+            print(f"Error reading cache: {err}")
+            return loader()
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        if value is not None:
+            try:
+                self.backend.set(cache_key, value, self.ttl)
+            except Exception as err:
+                print(f"Error writing cache: {err}")
+        return value
+
+    def on_invalidate(self, listener):
+        """Decorator registering `listener(table)` to run after a table is invalidated."""
+        self.listeners.append(listener)
+        return listener
+
+    def invalidate(self, table):
+        """Expire every cached entry for a table."""
+        try:
+            version = self.versions.bump(scoped_name(self.scope, table))
+        except Exception as err:
+            print(f"Error invalidating cache for {table}: {err}")
+            return None
+        for listener in self.listeners:
+            try:
+                listener(table)
+            except Exception as err:  # Derived output going stale must not fail the write that caused it
+                print(f"Error in invalidation listener for {table}: {err}")
+        return version
+
+
+def create_cache(url='', maxsize=1024, ttl=300, versions_dir=None, scope=None, partition_bytes=4 * 1024 * 1024, max_partitions=1000):
+    """Build a ReadThroughCache from a URL such as memory://, memcached://host:port or redis://host.
+
+    With `scope`, keys and versions are per tenant, and the in-process backend
+    gives each tenant its own partition of at most `partition_bytes`. memcached
+    and redis enforce their own memory limit across all tenants.
+    """
+    if url.startswith('memcached://'):
+        host, _, port = url[len('memcached://'):].partition(':')
+        backend = MemcachedCache(host or '127.0.0.1', int(port or 11211), ttl=ttl)
+        return ReadThroughCache(backend, BackendVersions(backend), scope=scope)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        backend = RedisCache(url, ttl=ttl)
+        return ReadThroughCache(backend, BackendVersions(backend), scope=scope)
+    versions_dir = versions_dir or os.path.join(tempfile.gettempdir(), 'cv-website-versions')
+    if scope:
+        backend = PartitionedLRUCache(scope, maxsize, ttl, partition_bytes, max_partitions)
+    else:
+        backend = LRUCache(maxsize, ttl)
+    return ReadThroughCache(backend, FileVersions(versions_dir), scope=scope)
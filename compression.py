@@ -0,0 +1,105 @@
+"""Negotiated gzip/brotli/zstd compression of response bodies."""
+import gzip  # Always available
+from flask import request  # Accept-Encoding of the current request
+
+try:
+    import brotli  # Optional: better ratios than gzip for text
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # Optional: close to brotli's ratio at a fraction of the CPU
+except ImportError:
+    zstandard = None
+
+MIN_SIZE = 1024  # Bodies smaller than this are not worth compressing
+COMPRESSIBLE_TYPES = {  # Images, archives and fonts are compressed already
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'application/json',
+    'application/x-ndjson', 'application/javascript', 'image/svg+xml',
+}
+
+
+def available_encodings():
+    """Encodings this process can produce, best first."""
+    return (['br'] if brotli else []) + (['zstd'] if zstandard else []) + ['gzip']
+
+
+def negotiate(accept_encoding, encodings=None):
+    """Pick the best encoding the client accepts, or None for identity.
+
+    `encodings` limits the choice, best first; it defaults to available_encodings().
+    """
+    offered = {}  # encoding -> q value
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    for encoding in available_encodings() if encodings is None else encodings:
+        if offered.get(encoding, offered.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    """Compress bytes with the given encoding."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)  # Quality 5 balances speed and ratio for dynamic content
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=6).compress(data)  # One compressor per call; they are not thread-safe
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+class Compression:
+    """Compresses every eligible response after the view has run.
+
+    Views cached by PageCache arrive already encoded (the page cache keeps one
+    compressed copy per encoding) and are left alone here.
+    """
+
+    def __init__(self, app, min_size=MIN_SIZE, encodings=None):
+        self.min_size = min_size  # Bodies smaller than this are sent as they are
+        self.encodings = encodings or available_encodings()  # Offered encodings, best first
+        self.responses = 0  # Responses sent compressed
+        self.bytes_in = 0  # Their size before compression
+        self.bytes_out = 0  # Their size on the wire
+        app.after_request(self.compress_response)
+
+    def choose(self, response):
+        """Return the encoding to send a response with, or None to send it unencoded."""
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return None
+        response.vary.add('Accept-Encoding')  # Caches must key on it even when this copy is not compressed
+        if response.status_code != 200 or response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return None  # Streams and send_file() responses are never buffered
+        return negotiate(request.headers.get('Accept-Encoding'), self.encodings)
+
+    def apply(self, response, data, body, encoding):
+        """Replace a response body of `data` with its `encoding`-compressed `body`."""
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)  # Each encoding is a different representation
+        self.responses += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(body)
+
+    def compress_response(self, response):
+        """after_request hook compressing the body when the client accepts it and it is large enough."""
+        encoding = self.choose(response)
+        if encoding:
+            data = response.get_data()
+            if len(data) >= self.min_size:
+                self.apply(response, data, compress(data, encoding), encoding)
+        return response
+
+    def stats(self):
+        """Counters for the metrics endpoint."""
+        return {'responses': self.responses, 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out}
@@ -0,0 +1,122 @@
+"""Settings, read from the environment (and a .env file) once, when this module is first imported.
+
+create_app() copies every upper-case name into app.config, where a caller
+can override them: create_app({'CACHE_MAX_ENTRIES': 0}).
+"""
+import os  # Importing the OS module for operating system dependent functionality
+from dotenv import load_dotenv  # Importing dotenv to load environment variables from a .env file
+
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')  # Default home of the journals, caches and rendered files
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Access the environment variables
+DB_HOST = os.getenv('DB_HOST')  # Database host
+DB_USER = os.getenv('DB_USER')  # Database user
+DB_PASSWORD = os.getenv('DB_PASSWORD')  # Database password
+DB_NAME = os.getenv('DB_NAME')  # Database name
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))  # Connections kept open per worker
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '10'))  # Extra connections allowed under load
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))  # Reopen connections older than this many seconds
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'  # Ping connections before reuse
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'  # Server-side prepared statements for hot queries
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '64'))  # Prepared statements kept per pooled connection
+# Read replica settings
+DB_REPLICAS = [host.strip() for host in os.getenv('DB_REPLICAS', '').split(',') if host.strip()]  # host[:port] of each read replica
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))  # Replicas further behind than this many seconds get no reads
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))  # Seconds between health/lag checks of a replica
+DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '2'))  # Seconds before an unreachable replica is skipped
+READ_YOUR_WRITES_WINDOW = DB_REPLICA_MAX_LAG + DB_REPLICA_CHECK_INTERVAL  # Longest a usable replica can be behind a write
+DB_USE_PURE = os.getenv('DB_USE_PURE')  # "false" selects the C extension, "true" the pure-Python driver; unset uses the driver default
+
+# Serving mode: "sync" (one request per worker) or "async" (gevent workers, see gunicorn.conf.py)
+SERVER_MODE = os.getenv('SERVER_MODE', 'sync')
+
+# Query cache settings
+CACHE_URL = os.getenv('CACHE_URL', 'memory://')  # memory://, memcached://host:port or redis://host:port/db
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))  # Entries kept by the in-process LRU
+CACHE_TTL = int(os.getenv('CACHE_TTL', '300'))  # Seconds before a cached query result expires
+CACHE_VERSIONS_DIR = os.getenv('CACHE_VERSIONS_DIR')  # Directory for the table version files shared by workers
+CACHE_WARMUP = os.getenv('CACHE_WARMUP', 'true').lower() == 'true'  # Load the first page of every listing into the cache when the app is created
+
+# Multi-tenant settings
+TENANT_MODE = os.getenv('TENANT_MODE', 'off')  # "off" (one CV), "subdomain" (<slug>.TENANT_BASE_DOMAIN) or "path" (/<slug>/...)
+TENANT_BASE_DOMAIN = os.getenv('TENANT_BASE_DOMAIN', 'localhost')  # Domain whose subdomains are tenants; the bare domain is tenant 1
+TENANT_LOOKUP_TTL = float(os.getenv('TENANT_LOOKUP_TTL', '60'))  # Seconds a worker remembers which id a slug maps to
+CACHE_TENANT_MAX_BYTES = int(os.getenv('CACHE_TENANT_MAX_BYTES', str(4 * 1024 * 1024)))  # In-process cache memory per tenant
+CACHE_MAX_TENANTS = int(os.getenv('CACHE_MAX_TENANTS', '1000'))  # Tenants with entries in the in-process cache at once
+
+# Page cache settings
+PAGE_CACHE_CONTROL = os.getenv('PAGE_CACHE_CONTROL', 'public, no-cache')  # Default Cache-Control for cached pages
+PAGE_CACHE_POLICIES = {  # Per-route overrides, e.g. PAGE_CACHE_CONTROL_SKILLS="public, s-maxage=300"
+    key[len('PAGE_CACHE_CONTROL_'):].lower(): value
+    for key, value in os.environ.items() if key.startswith('PAGE_CACHE_CONTROL_')
+}
+
+# Pagination settings
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '50'))  # Rows per listing page unless ?limit= is given
+LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', '200'))  # Upper bound for ?limit=
+
+# Streaming settings
+STREAM_ROUTES = set(filter(None, os.getenv('STREAM_ROUTES', '').split(',')))  # Listings rendered while rows are fetched, e.g. "work_experience,projects"
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '500'))  # Rows per fetchmany() round-trip when streaming
+STREAM_MAX_PAGE_SIZE = int(os.getenv('STREAM_MAX_PAGE_SIZE', '10000'))  # Upper bound for ?limit= on streamed listings
+
+# Batch edit settings
+BATCH_MAX_OPERATIONS = int(os.getenv('BATCH_MAX_OPERATIONS', '500'))  # Operations one POST /api/batch may apply
+
+# Contact queue settings
+CONTACT_SPILL_DIR = os.getenv('CONTACT_SPILL_DIR', os.path.join(INSTANCE_DIR, 'contact-queue'))  # Journal files for queued messages
+CONTACT_QUEUE_SIZE = int(os.getenv('CONTACT_QUEUE_SIZE', '10000'))  # Messages held per worker before the form answers 503
+CONTACT_BATCH_SIZE = int(os.getenv('CONTACT_BATCH_SIZE', '100'))  # Messages per INSERT batch
+CONTACT_FLUSH_INTERVAL = float(os.getenv('CONTACT_FLUSH_INTERVAL', '1.0'))  # Longest a message waits before being written
+CONTACT_FSYNC = os.getenv('CONTACT_FSYNC', 'false').lower() == 'true'  # fsync the journal on every submission
+CONTACT_QUEUE_START = os.getenv('CONTACT_QUEUE_START', 'true').lower() == 'true'  # Start the writer and replay dead workers' journals in create_app(); gunicorn.conf.py does it per worker under --preload
+
+# Instrumentation settings
+METRICS_DIR = os.getenv('METRICS_DIR')  # Directory where each worker writes its metrics so /metrics covers them all
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # If set, /metrics requires "Authorization: Bearer <token>"
+SLOW_REQUEST_THRESHOLD = float(os.getenv('SLOW_REQUEST_THRESHOLD', '1.0'))  # Seconds after which a request is logged with its spans
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'  # Allow ?_profile= / X-Profile to profile a request
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')  # If set, the ?_profile= / X-Profile value must match it
+PROFILE_DIR = os.getenv('PROFILE_DIR')  # Where .prof files are saved; profiles are only printed if unset
+
+# Template settings
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(INSTANCE_DIR, 'jinja-cache'))  # Compiled templates shared by workers and restarts; empty disables
+TEMPLATE_WARMUP = os.getenv('TEMPLATE_WARMUP', 'true').lower() == 'true'  # Compile every template when the app is created
+
+# Compression settings
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'  # Compress HTML, JSON and CSV responses
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # Smaller bodies are sent uncompressed
+
+# Static file settings
+STATIC_ACCEL_PREFIX = os.getenv('STATIC_ACCEL_PREFIX')  # nginx internal location for X-Accel-Redirect, e.g. "/_static/"
+STATIC_X_SENDFILE = os.getenv('STATIC_X_SENDFILE', 'false').lower() == 'true'  # Let Apache/lighttpd send static files via X-Sendfile
+
+# Search settings
+SEARCH_CHECK_INTERVAL = float(os.getenv('SEARCH_CHECK_INTERVAL', '1.0'))  # Seconds between checks for edits made by other workers or imports
+SEARCH_WARMUP = os.getenv('SEARCH_WARMUP', 'true').lower() == 'true'  # Build the search index when the app is created
+
+# Static export settings
+STATIC_EXPORT_DIR = os.getenv('STATIC_EXPORT_DIR', '')  # Directory nginx serves pre-rendered pages from; when set, edits re-render the affected pages
+STATIC_EXPORT_DEBOUNCE = float(os.getenv('STATIC_EXPORT_DEBOUNCE', '0.5'))  # Seconds to collect edits before re-rendering
+
+# CV document settings
+DOCUMENT_CACHE_DIR = os.getenv('DOCUMENT_CACHE_DIR', os.path.join(INSTANCE_DIR, 'documents'))  # Rendered /cv.pdf, /cv.docx and /cv.md files, shared by workers
+DOCUMENT_WORKERS = int(os.getenv('DOCUMENT_WORKERS', '0' if SERVER_MODE == 'async' else '2'))  # Render processes per worker; 0 renders in a thread (process pools do not mix with gevent)
+DOCUMENT_RENDER_TIMEOUT = float(os.getenv('DOCUMENT_RENDER_TIMEOUT', '30'))  # Seconds a download waits for its document to be rendered
+DOCUMENT_PRUNE_AFTER = float(os.getenv('DOCUMENT_PRUNE_AFTER', '600'))  # Seconds an outdated document is kept, so downloads in flight in other workers still find it
+
+# Rate limit settings: "N/second|minute|hour|day", optionally "... burst M"; empty disables a limit
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_FILE = os.getenv('RATE_LIMIT_FILE', os.path.join(INSTANCE_DIR, 'rate-limits'))  # Bucket table shared by the workers; /dev/shm/... keeps it in memory
+RATE_LIMIT_SLOTS = int(os.getenv('RATE_LIMIT_SLOTS', '65536'))  # Buckets in the table (24 bytes each)
+RATE_LIMIT_CONTACT = os.getenv('RATE_LIMIT_CONTACT', '5/minute')  # Contact form submissions per client IP
+RATE_LIMIT_CONTACT_ROUTE = os.getenv('RATE_LIMIT_CONTACT_ROUTE', '120/minute')  # Contact form submissions per tenant from all clients
+RATE_LIMIT_WRITES = os.getenv('RATE_LIMIT_WRITES', '30/minute burst 10')  # Adds, edits, deletes and imports per client IP and route
+RATE_LIMIT_WRITES_ROUTE = os.getenv('RATE_LIMIT_WRITES_ROUTE', '')  # The same per tenant and route from all clients
+PROXY_FIX_HOPS = int(os.getenv('PROXY_FIX_HOPS', '0'))  # Trusted proxies setting X-Forwarded-For, so limits apply to the real client IP
@@ -0,0 +1,223 @@
+"""Background, batched ingestion of contact-form submissions with an on-disk journal."""
+import atexit  # Flush what is left when a worker shuts down cleanly
+import glob  # Finds journals left behind by dead workers
+import json  # Journal records are stored one JSON object per line
+import os  # File handling and the current process id
+import queue  # Bounded in-memory queue between requests and the writer thread
+import secrets  # Unique token naming this process's journal files
+import threading  # The background writer thread and its locks
+import time  # Batch deadlines and retry back-off
+
+try:
+    import fcntl  # Journal locks tell live workers' files from abandoned ones
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class QueueFull(Exception):
+    """Raised when the queue is at capacity and the submission should be retried later."""
+
+
+class ContactQueue:
+    """Queues submissions in memory, journals them to disk and writes them in batches.
+
+    Every submission is appended to a journal file before it is acknowledged.
+    A background thread writes queued records with `writer(records)` once
+    `batch_size` records are waiting or `flush_interval` seconds have passed,
+    then deletes the journal segments it has fully written. Journals owned by
+    workers that died are replayed by the next worker to start, so accepted
+    messages survive restarts (at-least-once: a crash between the database
+    commit and the journal clean-up can store a message twice). Call start()
+    when a worker boots so that recovery does not wait for the first
+    submission; submit() starts the queue itself if that was not done.
+    """
+
+    def __init__(self, writer, spill_dir, max_size=10000, batch_size=100, flush_interval=1.0,
+                 segment_size=1000, fsync=False, is_transient=lambda err: True):
+        self.writer = writer  # Callable inserting a list of records in one transaction
+        self.spill_dir = spill_dir  # Directory holding the journal files
+        self.max_size = max_size  # Submissions held in memory before QueueFull is raised
+        self.batch_size = batch_size  # Records per executemany() batch
+        self.flush_interval = flush_interval  # Longest a record waits before being written
+        self.segment_size = segment_size  # Records per journal segment before it is sealed
+        self.fsync = fsync  # fsync the journal on every submission (survives power loss, costs latency)
+        self.is_transient = is_transient  # Whether a writer error should be retried rather than dead-lettered
+        self.accepted = 0  # Submissions queued
+        self.rejected = 0  # Submissions refused because the queue was full
+        self.written = 0  # Records committed to the database
+        self.dead_lettered = 0  # Records the database refused outright
+        self.batches = 0  # Successful batch writes
+        self._pid = None  # Process that started the writer thread
+        self._stopping = False  # Set by close() to let the writer thread drain and exit
+        self._lock = threading.Lock()  # Guards the journal and sequence numbers
+
+    def start(self):
+        """Open this process's journal, recover abandoned ones and start the writer thread; once per process."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._pid = os.getpid()
+            self._token = f"{os.getpid()}-{secrets.token_hex(4)}"  # Prefix for this process's files
+            self._lock_file = open(self._path('lock'), 'w')  # Held for the life of the process
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._queue = queue.Queue()  # (sequence number, record) pairs
+            self._seq = 0  # Sequence number of the last journaled record
+            self._segment_count = 0  # Records in the active journal segment
+            self._sealed = []  # (last sequence number, path) of sealed segments
+            self._journal = open(self._path('active.jsonl'), 'a')
+            self._backlog, self._recovered = self._recover()  # Records from dead workers, and their files
+            self._thread = threading.Thread(target=self._run, name='contact-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _path(self, suffix):
+        return os.path.join(self.spill_dir, f"{self._token}.{suffix}")
+
+    def _recover(self):
+        """Claim the journals of workers that are no longer running."""
+        records, claimed = [], []
+        if not fcntl:
+            return records, claimed
+        for lock_path in glob.glob(os.path.join(self.spill_dir, '*.lock')):
+            owner = os.path.basename(lock_path)[:-len('.lock')]
+            if owner == self._token:
+                continue
+            with open(lock_path, 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)  # Succeeds only if the owner has exited
+                except OSError:
+                    continue
+                for index, path in enumerate(sorted(glob.glob(os.path.join(self.spill_dir, f"{owner}.*.jsonl")))):
+                    target = self._path(f"recovered-{owner}-{index}.jsonl")
+                    os.replace(path, target)  # Renamed under our token so a crash now is recovered again
+                    claimed.append(target)
+                os.remove(lock_path)
+        for path in claimed:
+            with open(path) as f:
+                records.extend(json.loads(line)['record'] for line in f if line.strip())
+        if records:
+            print(f"Recovered {len(records)} queued contact messages")
+        return [(None, record) for record in records], claimed
+
+    def submit(self, record):
+        """Journal and queue one submission, raising QueueFull when at capacity."""
+        self.start()
+        with self._lock:
+            if self._queue.qsize() >= self.max_size:
+                self.rejected += 1
+                raise QueueFull()
+            self._seq += 1
+            self._journal.write(json.dumps({'seq': self._seq, 'record': record}) + '\n')
+            self._journal.flush()  # Hand the line to the OS so a crashed worker does not lose it
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._queue.put((self._seq, record))
+            self.accepted += 1
+            self._segment_count += 1
+            if self._segment_count >= self.segment_size:
+                self._seal()
+
+    def _seal(self):
+        """Close the active journal segment and start a new one (lock held)."""
+        self._journal.close()
+        sealed = self._path(f"{self._seq:012d}.jsonl")
+        os.replace(self._path('active.jsonl'), sealed)
+        self._sealed.append((self._seq, sealed))
+        self._journal = open(self._path('active.jsonl'), 'a')
+        self._segment_count = 0
+
+    def _next_batch(self):
+        """Collect up to batch_size records, waiting at most flush_interval."""
+        if self._backlog:
+            batch, self._backlog = self._backlog[:self.batch_size], self._backlog[self.batch_size:]
+            return batch
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """Write a batch, dead-lettering records the database rejects outright."""
+        try:
+            self.writer([record for _, record in batch])
+            return
+        except Exception as err:
+            if self.is_transient(err):
+                raise
+            print(f"Error writing contact batch, retrying one by one: {err}")
+        for item in batch:  # Isolate the bad record so the rest still get stored
+            try:
+                self.writer([item[1]])
+            except Exception as err:
+                if self.is_transient(err):
+                    raise
+                print(f"Error writing contact message, moving it to the dead-letter file: {err}")
+                with open(os.path.join(self.spill_dir, 'rejected.jsonl'), 'a') as f:
+                    f.write(json.dumps(item[1]) + '\n')
+                self.dead_lettered += 1
+
+    def _written(self, batch):
+        """Drop journal data that is now safely in the database."""
+        self.written += len(batch)
+        self.batches += 1
+        done = max((seq for seq, _ in batch if seq is not None), default=None)
+        with self._lock:
+            if done is not None:
+                while self._sealed and self._sealed[0][0] <= done:
+                    os.remove(self._sealed.pop(0)[1])
+                if done == self._seq:
+                    self._journal.truncate(0)  # Everything journaled so far has been written
+                    self._segment_count = 0
+            if not self._backlog and self._recovered:
+                for path in self._recovered:
+                    os.remove(path)
+                self._recovered = []
+
+    def _run(self):
+        """Writer thread: batch, write, retry with back-off on transient errors."""
+        pending = []  # Batch that failed and must be retried first
+        delay = self.flush_interval
+        while True:
+            batch = pending or self._next_batch()
+            if not batch:
+                if self._stopping and self._queue.empty():
+                    return
+                continue
+            try:
+                self._write(batch)
+            except Exception as err:
+                print(f"Error writing contact messages, retrying in {delay:.1f}s: {err}")
+                pending = batch
+                time.sleep(delay)
+                delay = min(delay * 2, 30)  # Back off while the database is unavailable
+                continue
+            pending = []
+            delay = self.flush_interval
+            self._written(batch)
+
+    def close(self, timeout=5):
+        """Give the writer thread a few seconds to drain; the journal covers anything left."""
+        if self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Return the queue counters as a plain dict."""
+        return {
+            'queued': self._queue.qsize() if self._pid else 0,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'written': self.written,
+            'dead_lettered': self.dead_lettered,
+            'batches': self.batches,
+        }
@@ -0,0 +1,126 @@
+"""Table-driven list/add/edit/delete routes for the CV sections."""
+import mysql.connector  # Database errors raised by the statements
+from flask import render_template, request, redirect, url_for  # Views and responses
+from db import db_connection  # Pooled connections
+from tenants import current_tenant  # Every statement is limited to the tenant being served
+
+
+class Unavailable(Exception):
+    """Raised when no database connection could be obtained."""
+
+
+def run(sql, params, fetch=False):
+    """Execute one statement on a pooled connection; commit a write and return (rowcount, lastrowid), or return the first row of a read."""
+    with db_connection() as mydb:  # Borrow a pooled primary connection: edit forms must show the latest row
+        if not mydb:
+            raise Unavailable()
+        cursor = mydb.prepared(sql).execute(params)  # Parsed by the server once per pooled connection
+        if fetch:
+            rows = cursor.fetchall()  # Read the whole result so the statement can run again
+            return rows[0] if rows else None
+        mydb.commit()  # Commit the change
+        return cursor.rowcount, cursor.lastrowid  # Rows matched (updates always change the version) and the id of an inserted row
+
+
+class Resource:
+    """One CV table: its columns, URLs, templates and error messages.
+
+    `path` is the listing URL (/skills) and `item` the singular used by the
+    form URLs and endpoints (/add-skill -> add_skill, edit_skill.html).
+    """
+
+    def __init__(self, listing, path, item, noun, load_error):
+        self.table = listing.table  # Table name, also the listing endpoint and cache key
+        self.columns = [column for column in listing.columns if column != 'id']  # Columns the forms write
+        self.nullable = listing.nullable  # Optional columns, stored as NULL when left blank
+        self.path = path  # URL of the listing page
+        self.item = item  # URL segment of the form routes
+        self.name = item.replace('-', '_')  # Endpoint suffix, template suffix and edit-form variable
+        self.noun = noun  # Used in error messages: "Unable to add {noun}."
+        self.load_error = load_error  # Error message for the listing and edit pages
+        # Statements are built once here instead of on every request; ids are only looked up within the tenant.
+        # Every update bumps the row's version, so a batch edit based on the old row is refused (see batch.py)
+        self.insert_sql = f"INSERT INTO {self.table} (tenant_id, {', '.join(self.columns)}) VALUES ({', '.join(['%s'] * (len(self.columns) + 1))})"
+        self.update_sql = f"UPDATE {self.table} SET {', '.join(f'{column}=%s' for column in self.columns)}, version=version+1 WHERE tenant_id=%s AND id=%s"
+        self.select_sql = f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE tenant_id=%s AND id=%s"
+        self.delete_sql = f"DELETE FROM {self.table} WHERE tenant_id=%s AND id=%s"
+
+    def form_values(self):
+        """Read the submitted columns, in table order; a missing field answers 400."""
+        values = ((column, request.form[column]) for column in self.columns)
+        return tuple(None if column in self.nullable and not value.strip() else value for column, value in values)
+
+
+def error_page(message, status):
+    return render_template('error.html', error_message=message), status
+
+
+def register_resources(app, resources, query_cache, page_cache, render_list, on_write=None):
+    """Add the listing, add, edit and delete routes for every resource to the app.
+
+    Endpoint names and templates are the same as the hand-written routes they replace.
+    `on_write(table, action, id, row)` is called after every successful add,
+    update or delete, with the submitted columns as a dict (None for deletes).
+    """
+    for resource in resources:
+        _register(app, resource, query_cache, page_cache, render_list, on_write)
+
+
+def _write(resource, query_cache, on_write, action, sql, params, row_id=None, values=None):
+    """Run a mutation and redirect to the listing, or render the error page."""
+    try:
+        rowcount, last_id = run(sql, params)
+    except Unavailable:
+        return error_page("Database connection failed.", 503)
+    except mysql.connector.Error as err:
+        print(f"Error ({action} {resource.table}): {err}")  # Log any database errors
+        message = f"Unable to delete the {resource.noun}." if action == 'delete' else f"Unable to {action} {resource.noun}."
+        return error_page(message, 500)
+    if not rowcount:  # No such row for this tenant: nothing changed, so caches and the search index stay as they are
+        return error_page(f"No {resource.noun} with id {row_id}.", 404)
+    query_cache.invalidate(resource.table)  # Expire cached queries and pages for this table
+    if on_write:
+        row = dict(zip(resource.columns, values)) if values is not None else None
+        on_write(resource.table, action, row_id if row_id is not None else last_id, row)
+    return redirect(url_for(resource.table))
+
+
+def _register(app, resource, query_cache, page_cache, render_list, on_write):
+    table, name = resource.table, resource.name
+
+    @page_cache.page(table)
+    def listing():
+        """Render a page of the listing with data from the database."""
+        return render_list(table, f'{table}.html', resource.load_error)
+
+    def add():
+        """Show the add form, or insert the submitted row."""
+        if request.method == 'POST':
+            values = resource.form_values()
+            return _write(resource, query_cache, on_write, 'add', resource.insert_sql, (current_tenant(),) + values, values=values)
+        return render_template(f'add_{name}.html')
+
+    def edit(id):
+        """Show the edit form filled with the row, or update it."""
+        if request.method == 'POST':
+            values = resource.form_values()
+            return _write(resource, query_cache, on_write, 'update', resource.update_sql, values + (current_tenant(), id), id, values)
+        try:
+            row = run(resource.select_sql, (current_tenant(), id), fetch=True)
+        except Unavailable:
+            return error_page("Database connection failed.", 503)
+        except mysql.connector.Error as err:
+            print(f"Error fetching {table} {id}: {err}")  # Log any database errors
+            return error_page(resource.load_error, 500)
+        if row is None:
+            return error_page(f"No {resource.noun} with id {id}.", 404)
+        return render_template(f'edit_{name}.html', **{name: row})
+
+    def delete(id):
+        """Delete a row."""
+        return _write(resource, query_cache, on_write, 'delete', resource.delete_sql, (current_tenant(), id), id)
+
+    app.add_url_rule(f'/{resource.path}', table, listing)
+    app.add_url_rule(f'/add-{resource.item}', f'add_{name}', add, methods=['GET', 'POST'])
+    app.add_url_rule(f'/edit-{resource.item}/<int:id>', f'edit_{name}', edit, methods=['GET', 'POST'])
+    app.add_url_rule(f'/delete-{resource.item}/<int:id>', f'delete_{name}', delete, methods=['GET'])
@@ -0,0 +1,595 @@
+"""Pooled MySQL connections shared by every route in app.py, with optional read replicas."""
+import contextvars  # Per-request read routing state
+import itertools  # Round-robin over the healthy replicas
+import os  # Used to detect forked gunicorn workers via the process id
+import queue  # Thread-safe LIFO queue holding idle connections
+import threading  # Locks protecting the pool counters
+import time  # Timestamps for recycling and wait-time statistics
+from collections import OrderedDict  # LRU of prepared statements per connection
+from contextlib import contextmanager, ExitStack  # Turns db_connection() into a `with` block
+import mysql.connector  # MySQL driver used to open the physical connections
+
+
+class PoolTimeout(mysql.connector.Error):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PoolStats:
+    """Counters describing how the pool is being used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Guards all counters below
+        self.checkouts = 0  # Total successful checkouts
+        self.hits = 0  # Checkouts served by an idle pooled connection
+        self.misses = 0  # Checkouts that had to open a new connection
+        self.timeouts = 0  # Checkouts that gave up waiting
+        self.wait_time = 0.0  # Seconds spent waiting for a connection in total
+        self.max_wait = 0.0  # Longest single wait in seconds
+        self.recycled = 0  # Connections closed because they were too old
+        self.stale = 0  # Connections dropped because the pre-ping failed
+        self.discarded = 0  # Connections closed because they were unusable on return
+        self.statement_hits = 0  # Executions that reused a statement already prepared on the connection
+        self.statement_misses = 0  # Statements prepared (parsed by the server) for the first time on a connection
+        self.statement_evictions = 0  # Prepared statements closed to keep the per-connection cache bounded
+
+    def record(self, name, amount=1):
+        """Increment a counter by name."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_wait(self, seconds):
+        """Record how long a checkout waited."""
+        with self._lock:
+            self.wait_time += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def snapshot(self):
+        """Return a copy of the counters as a plain dict."""
+        with self._lock:
+            checkouts = self.checkouts or 1  # Avoid dividing by zero before the first checkout
+            return {
+                'checkouts': self.checkouts,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / checkouts,
+                'timeouts': self.timeouts,
+                'wait_time': self.wait_time,
+                'avg_wait': self.wait_time / checkouts,
+                'max_wait': self.max_wait,
+                'recycled': self.recycled,
+                'stale': self.stale,
+                'discarded': self.discarded,
+                'statement_hits': self.statement_hits,
+                'statement_misses': self.statement_misses,
+                'statement_hit_ratio': self.statement_hits / ((self.statement_hits + self.statement_misses) or 1),
+                'statement_evictions': self.statement_evictions,
+            }
+
+
+class _PooledConnection:
+    """A physical connection plus the time it was opened and its prepared statements."""
+
+    def __init__(self, connection):
+        self.connection = connection  # The underlying mysql.connector connection
+        self.created_at = time.monotonic()  # Used to decide when to recycle it
+        self.statements = OrderedDict()  # SQL text -> (SQL object, cursor), least recently used first
+
+
+class ConnectionPool:
+    """A fixed-size pool of MySQL connections with bounded overflow."""
+
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=30, recycle=3600, pre_ping=True,
+                 prepared=True, statement_cache_size=64):
+        self.connect_args = connect_args  # Keyword arguments for mysql.connector.connect()
+        self.size = size  # Number of connections kept open while idle
+        self.max_overflow = max_overflow  # Extra connections allowed under load, closed when returned
+        self.timeout = timeout  # Seconds a checkout may wait before raising PoolTimeout
+        self.recycle = recycle  # Reopen connections older than this many seconds (0 disables)
+        self.pre_ping = pre_ping  # Ping idle connections before handing them out
+        self.prepared = prepared  # Use server-side prepared statements (binary protocol) for Connection.prepared()
+        self.statement_cache_size = statement_cache_size  # Prepared statements kept per connection (server limit: max_prepared_stmt_count)
+        self.stats = PoolStats()  # Hit/miss and wait-time counters
+        self.pid = os.getpid()  # Process that owns these connections
+        self._idle = queue.LifoQueue()  # Most recently used connection is handed out first
+        self._lock = threading.Lock()  # Guards self._opened
+        self._opened = 0  # Connections currently open, idle or checked out
+
+    def _open(self):
+        """Open a new physical connection."""
+        return _PooledConnection(mysql.connector.connect(**self.connect_args))
+
+    def _close(self, pooled):
+        """Close a physical connection and free its slot."""
+        self._close_quietly(pooled)
+        with self._lock:
+            self._opened -= 1
+
+    @staticmethod
+    def _close_quietly(pooled):
+        """Close a physical connection, ignoring errors from a dead socket."""
+        try:
+            pooled.connection.close()
+        except mysql.connector.Error:
+            pass
+
+    def _reserve_slot(self):
+        """Claim room for a new connection if the pool is not full."""
+        with self._lock:
+            if self._opened < self.size + self.max_overflow:
+                self._opened += 1
+                return True
+            return False
+
+    def _open_reserved(self):
+        """Open a connection for a slot that has already been reserved."""
+        try:
+            return self._open()
+        except mysql.connector.Error:
+            with self._lock:
+                self._opened -= 1  # Give the slot back if the handshake fails
+            raise
+
+    def _validate(self, pooled):
+        """Return a usable connection, replacing it if it is too old or dead."""
+        if self.recycle and time.monotonic() - pooled.created_at > self.recycle:
+            self.stats.record('recycled')
+            self._close_quietly(pooled)
+            return self._open_reserved()  # Reuse the slot the old connection held
+        if self.pre_ping:
+            try:
+                pooled.connection.ping(reconnect=False)  # Cheap round-trip to detect dropped connections
+            except mysql.connector.Error:
+                self.stats.record('stale')
+                self._close_quietly(pooled)
+                return self._open_reserved()
+        return pooled
+
+    def acquire(self):
+        """Check a connection out of the pool."""
+        started = time.monotonic()
+        try:
+            pooled = self._idle.get_nowait()  # Reuse an idle connection when there is one
+            self.stats.record('hits')
+        except queue.Empty:
+            if self._reserve_slot():
+                pooled = self._open_reserved()  # Below the size + overflow limit: open a new one
+                self.stats.record('misses')
+            else:
+                try:
+                    pooled = self._idle.get(timeout=self.timeout)  # Pool exhausted: wait for a return
+                    self.stats.record('hits')
+                except queue.Empty:
+                    self.stats.record('timeouts')
+                    raise PoolTimeout(msg=f"No database connection available after {self.timeout} seconds")
+        self.stats.record_wait(time.monotonic() - started)
+        pooled = self._validate(pooled)
+        self.stats.record('checkouts')
+        return pooled
+
+    def release(self, pooled):
+        """Return a connection to the pool, resetting any leftover state."""
+        connection = pooled.connection
+        try:
+            if connection.unread_result:
+                connection.consume_results()  # Drain results left behind by an unclosed cursor
+            if connection.in_transaction:
+                connection.rollback()  # Never hand out a connection with an open transaction
+        except mysql.connector.Error:
+            self.stats.record('discarded')
+            self._close(pooled)
+            return
+        if os.getpid() != self.pid or self._idle.qsize() >= self.size:
+            self._close(pooled)  # Overflow connection, or the process forked: do not keep it
+        else:
+            self._idle.put(pooled)
+
+    def dispose(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class Replica:
+    """One read replica: its pool and the result of its last health check."""
+
+    def __init__(self, name, pool):
+        self.name = name  # host[:port], used in logs and metrics
+        self.pool = pool  # Connections to this replica
+        self.healthy = False  # Set by the first check
+        self.lag = None  # Seconds behind the primary at the last check
+        self.checked_at = 0.0  # time.monotonic() of the last check
+        self.reads = 0  # Checkouts routed to this replica
+        self._checking = threading.Lock()  # One thread checks at a time; the others use the last result
+
+
+class ReplicaSet:
+    """Spreads reads over healthy replicas whose lag is within bounds.
+
+    Each replica is checked at most once per `check_interval` seconds, by the
+    request that finds its result out of date. A replica that cannot be
+    reached, has stopped replicating or is more than `max_lag` seconds behind
+    gets no reads until a later check passes; with none left, reads go to the
+    primary.
+    """
+
+    def __init__(self, hosts, connect_args, pool_options, max_lag=5, check_interval=5, connect_timeout=2):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replicas = []
+        for host in hosts:
+            address, _, port = host.partition(':')
+            args = dict(connect_args, host=address, connection_timeout=connect_timeout)  # A dead replica must fail fast
+            if port:
+                args['port'] = int(port)
+            self.replicas.append(Replica(host, ConnectionPool(args, **pool_options)))
+        self._turn = itertools.count()  # Round-robin position
+        self.fallbacks = 0  # Reads sent to the primary because no replica was usable
+
+    def check(self, replica):
+        """Connect to a replica and read its lag from SHOW REPLICA STATUS."""
+        try:
+            pooled = replica.pool.acquire()
+        except mysql.connector.Error as err:
+            return self._mark(replica, False, None, err)
+        try:
+            cursor = pooled.connection.cursor(dictionary=True)
+            try:
+                cursor.execute("SHOW REPLICA STATUS")  # MySQL 8.0.22+
+            except mysql.connector.ProgrammingError:
+                cursor.execute("SHOW SLAVE STATUS")  # Older servers and MariaDB
+            status = cursor.fetchone() or {}
+            cursor.fetchall()
+            cursor.close()
+        except mysql.connector.Error as err:
+            replica.pool.release(pooled)
+            return self._mark(replica, False, None, err)
+        replica.pool.release(pooled)
+        if not status:
+            return self._mark(replica, True, 0, None)  # Not replicating from anything: serve it as it is
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        if lag is None:
+            return self._mark(replica, False, None, "replication is stopped")
+        return self._mark(replica, lag <= self.max_lag, lag, None if lag <= self.max_lag else f"{lag}s behind")
+
+    @staticmethod
+    def _mark(replica, healthy, lag, problem):
+        if not healthy and (replica.healthy or not replica.checked_at):
+            print(f"Replica {replica.name} taken out of rotation: {problem}")
+        elif healthy and not replica.healthy and replica.checked_at:
+            print(f"Replica {replica.name} back in rotation")
+        replica.healthy, replica.lag, replica.checked_at = healthy, lag, time.monotonic()
+        return healthy
+
+    def usable(self):
+        """Return the replicas that may serve reads, re-checking those whose result is out of date."""
+        now = time.monotonic()
+        for replica in self.replicas:
+            if now - replica.checked_at >= self.check_interval and replica._checking.acquire(blocking=False):
+                try:
+                    self.check(replica)
+                finally:
+                    replica._checking.release()
+        return [replica for replica in self.replicas if replica.healthy]
+
+    def acquire(self):
+        """Check a connection out of the next usable replica; return (replica, pooled) or None."""
+        candidates = self.usable()
+        start = next(self._turn)
+        for i in range(len(candidates)):
+            replica = candidates[(start + i) % len(candidates)]
+            try:
+                pooled = replica.pool.acquire()
+            except mysql.connector.Error as err:
+                self._mark(replica, False, None, err)  # Fail over to the next one straight away
+                continue
+            replica.reads += 1
+            return replica, pooled
+        self.fallbacks += 1
+        return None
+
+    def stats(self):
+        """Health, lag and read counts per replica, for the metrics endpoint."""
+        return [
+            {'replica': r.name, 'healthy': int(r.healthy), 'lag': r.lag if r.lag is not None else -1, 'reads': r.reads}
+            for r in self.replicas
+        ]
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.pool.dispose()
+
+
+_settings = {}  # Keyword arguments for ConnectionPool, set by configure_pool()
+_replica_settings = {}  # Keyword arguments for ReplicaSet, set by configure_pool()
+_pool = None  # The pool owned by the current process
+_replicas = None  # The replica pools owned by the current process, if any are configured
+_recently_written = None  # Function telling whether a table changed too recently to read it from a replica
+_routing = contextvars.ContextVar('db_routing', default=None)  # {'pinned': bool, 'wrote': bool} for the current request
+_pool_lock = threading.Lock()  # Guards creation of _pool
+_tracer = None  # Object whose span(kind, name) times checkouts and statements, set by set_tracer()
+
+
+def set_tracer(tracer):
+    """Time connection checkouts and SQL statements with tracer.span(kind, name); None turns tracing off."""
+    global _tracer
+    _tracer = tracer
+
+
+class TracedCursor:
+    """Cursor wrapper that reports every execute()/executemany() to the tracer."""
+
+    def __init__(self, cursor, tracer):
+        self._cursor = cursor
+        self._tracer = tracer
+
+    def execute(self, sql, params=(), *args, **kwargs):
+        with self._tracer.span('db.query', sql):
+            return self._cursor.execute(sql, params, *args, **kwargs)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        with self._tracer.span('db.query', sql):
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)  # fetch*, close, rowcount, lastrowid, ...
+
+
+class Statement:
+    """A statement cached on one connection; execute() runs it and returns the cursor."""
+
+    def __init__(self, sql, cursor):
+        self.sql = sql  # The exact str object the cursor was prepared with
+        self.cursor = cursor
+
+    def execute(self, params=()):
+        self.cursor.execute(self.sql, params)
+        return self.cursor
+
+
+class Connection:
+    """What db_connection() yields: the driver connection plus its statement cache.
+
+    Anything not defined here (commit, rollback, unread_result, ...) is
+    passed through to the mysql.connector connection.
+    """
+
+    def __init__(self, pooled, pool, tracer):
+        self._pooled = pooled
+        self._connection = pooled.connection
+        self._pool = pool
+        self._tracer = tracer
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._connection.cursor(*args, **kwargs)
+        return TracedCursor(cursor, self._tracer) if self._tracer else cursor
+
+    def prepared(self, sql):
+        """Return a Statement for sql, prepared on this connection the first time it is used.
+
+        The server parses and plans the statement once per connection; later
+        executions only send the parameters and get rows back in the binary
+        protocol. Results must be read (fetchall) before the next statement
+        runs. Do not close the returned cursor: it belongs to the cache.
+        """
+        statements = self._pooled.statements
+        entry = statements.get(sql)
+        if entry is None:
+            self._pool.stats.record('statement_misses')
+            if self._pool.prepared:
+                cursor = self._connection.cursor(prepared=True)
+            else:
+                cursor = self._connection.cursor(buffered=True)  # Text protocol, but still one cursor per statement
+            entry = statements[sql] = (sql, cursor)
+            while len(statements) > self._pool.statement_cache_size:
+                _, (_, evicted) = statements.popitem(last=False)
+                self._pool.stats.record('statement_evictions')
+                try:
+                    evicted.close()  # Deallocates the statement on the server
+                except mysql.connector.Error:
+                    pass
+        else:
+            self._pool.stats.record('statement_hits')
+            statements.move_to_end(sql)
+        # The driver only skips re-preparing when it is handed the *same* str object
+        # it prepared, so executions always go through the cached copy of the text.
+        cursor = TracedCursor(entry[1], self._tracer) if self._tracer else entry[1]
+        return Statement(entry[0], cursor)
+
+    def commit(self):
+        self._connection.commit()
+        state = _routing.get()
+        if state is not None:
+            state['wrote'] = True  # The session is pinned to the primary for its next reads
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def configure_pool(connect_args, replicas=(), max_lag=5, check_interval=5, connect_timeout=2, **options):
+    """Set the connection arguments and pool options used by get_pool().
+
+    `replicas` lists read replicas as host[:port]; they share the primary's
+    user, password, database and pool options.
+    """
+    global _pool, _replicas
+    with _pool_lock:
+        _settings.clear()
+        _settings.update(options, connect_args=connect_args)
+        _replica_settings.clear()
+        if replicas:
+            _replica_settings.update(hosts=list(replicas), max_lag=max_lag, check_interval=check_interval,
+                                     connect_timeout=connect_timeout)
+        if _pool is not None:
+            _pool.dispose()
+        if _replicas is not None:
+            _replicas.dispose()
+        _pool = _replicas = None  # The next get_pool() call builds pools with the new settings
+
+
+def set_write_tracker(recently_written):
+    """Route reads of a table to the primary while recently_written(table) is true.
+
+    Keeps a lagging replica from answering with rows older than a write the
+    caches have already been invalidated for.
+    """
+    global _recently_written
+    _recently_written = recently_written
+
+
+def begin_request(pinned=False):
+    """Reset the read routing state for a new request; `pinned` sends all its reads to the primary."""
+    _routing.set({'pinned': pinned, 'wrote': False})
+
+
+def end_request():
+    """Forget the read routing state, so a request whose before_request hooks were cut short cannot see it."""
+    _routing.set(None)
+
+
+def request_wrote():
+    """Whether the current request committed anything on the primary."""
+    state = _routing.get()
+    return bool(state and state['wrote'])
+
+
+def get_pool():
+    """Return this process's pool, creating a fresh one after a fork."""
+    global _pool, _replicas
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():  # Each gunicorn worker gets its own pool
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool(**_settings)
+                if _replica_settings:
+                    options = {key: value for key, value in _settings.items() if key != 'connect_args'}
+                    _replicas = ReplicaSet(connect_args=_settings['connect_args'], pool_options=options, **_replica_settings)
+            pool = _pool
+    return pool
+
+
+def close_pool():
+    """Close this process's idle connections; the next get_pool() call opens new ones.
+
+    Called once the app is built, so a gunicorn master that warmed up with
+    --preload does not hand its open sockets down to the workers it forks.
+    """
+    global _pool, _replicas
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.dispose()
+            if _replicas is not None:
+                _replicas.dispose()
+        _pool = _replicas = None
+
+
+def get_replicas():
+    """Return this process's ReplicaSet, or None when no replicas are configured."""
+    get_pool()  # Builds the replica pools alongside the primary pool
+    return _replicas
+
+
+def _use_replica(tables):
+    """Whether a read of these tables may be served by a replica."""
+    state = _routing.get()
+    if state and state['pinned']:
+        return False  # This session wrote recently: read its own writes
+    if _recently_written:
+        try:
+            return not any(_recently_written(table) for table in tables)
+        except Exception as err:  # A broken version store must not take the site down
+            print(f"Error reading table versions: {err}")
+            return False
+    return True
+
+
+def _acquire(pool, reads):
+    """Check out a replica connection for reads when allowed, else a primary one; return (pool, pooled)."""
+    replicas = get_replicas() if reads is not None else None
+    if replicas and _use_replica(reads):
+        chosen = replicas.acquire()
+        if chosen:
+            return chosen[0].pool, chosen[1]
+    return pool, pool.acquire()
+
+
+@contextmanager
+def db_connection(reads=None):
+    """Borrow a pooled connection for the duration of a `with` block.
+
+    Pass `reads` (the tables a read-only block selects from) to let it run on
+    a read replica; anything else, and every write, uses the primary.
+    Yields None if no connection could be obtained, so callers can keep
+    rendering their "Database connection failed." page.
+    """
+    pool = get_pool()
+    tracer = _tracer
+    try:
+        if tracer:
+            with tracer.span('db.checkout'):
+                pool, pooled = _acquire(pool, reads)
+        else:
+            pool, pooled = _acquire(pool, reads)
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")  # Print the error if the checkout fails
+        yield None
+        return
+    try:
+        yield Connection(pooled, pool, tracer)
+    finally:
+        pool.release(pooled)  # Always hand the connection back, even on error paths
+
+
+class RowStream:
+    """Iterates an unbuffered cursor in batches, holding its pooled connection until closed."""
+
+    def __init__(self, stack, cursor, batch_size):
+        self._stack = stack  # Releases the cursor's connection back to the pool
+        self._cursor = cursor  # Unbuffered cursor with the query already executed
+        self.batch_size = batch_size  # Rows fetched per round-trip
+
+    def __iter__(self):
+        try:
+            while True:
+                rows = self._cursor.fetchmany(self.batch_size)  # Only one batch is in memory at a time
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            self.close()
+
+    def close(self):
+        """Return the connection to the pool; safe to call more than once."""
+        self._stack.close()
+
+
+def stream_rows(sql, params=(), batch_size=500, reads=None):
+    """Execute a SELECT now and return a RowStream over its rows, or None if no connection is available.
+
+    The query runs before the response starts, so connection and SQL errors can
+    still be turned into an error page; rows are then read lazily while streaming.
+    `reads` is passed to db_connection().
+    """
+    stack = ExitStack()
+    mydb = stack.enter_context(db_connection(reads))  # Borrow a pooled connection for the life of the stream
+    if not mydb:
+        stack.close()
+        return None
+    try:
+        cursor = mydb.cursor(buffered=False)  # Unbuffered: rows stay on the server until fetched
+
+        def close_cursor():
+            if mydb.unread_result:
+                mydb.consume_results()  # Discard rows the page did not need before closing
+            cursor.close()
+        stack.callback(close_cursor)
+        cursor.execute(sql, params)
+    except BaseException:
+        stack.close()
+        raise
+    return RowStream(stack, cursor, batch_size)
@@ -0,0 +1,420 @@
+"""Downloadable CV documents (/cv.pdf, /cv.docx, /cv.md) rendered in a process pool and cached on disk.
+
+A document is named by a hash of the rows it is built from, so it is
+rendered once per change of the data and then served as a file. Rendering
+runs in worker processes, away from the request threads and the GIL.
+Concurrent requests for a document being rendered wait on the same job,
+and workers take a file lock per document, so a spike of requests across
+all workers still renders it once. Mutations invalidate the query cache,
+whose listener re-renders the formats this worker has served, in the
+background. Older renders are deleted once they have not been rendered or
+reused for `prune_after` seconds, so a download another worker has just
+found is never pulled from under it; a file that is gone anyway counts as
+a miss and is rendered again.
+
+The PDF and DOCX writers are deliberately small and use only the standard
+library: text in Helvetica / default Word styles, which is all a CV needs.
+"""
+import atexit  # Shut the pools down with the worker
+import hashlib  # Content hashes naming the cached files
+import json  # Canonical form of the rows for hashing
+import os  # Cache paths
+import threading  # Guards the in-flight jobs
+import time  # Age of older renders
+import traceback  # Logs render failures in full
+import zlib  # PDF stream compression
+from collections import OrderedDict  # Remembered content hashes
+from concurrent.futures import ThreadPoolExecutor, TimeoutError  # Render jobs
+from flask import Blueprint, render_template, send_file  # /cv.<format>
+from api import SectionUnavailable, load_sections, section_selects  # Whole sections through the query cache
+from assets import write_atomic  # Atomic writes
+from tenants import current_tenant, set_tenant  # Documents are per tenant
+
+try:
+    import fcntl  # Locks so only one worker renders each document
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+RENDER_VERSION = '1'  # Bump when the layout changes, so cached documents are rendered again
+FORMATS = {  # Extension -> MIME type
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'md': 'text/markdown; charset=utf-8',
+}
+TABLES = ('personal_info', 'education', 'work_experience', 'skills', 'projects')
+
+
+def years(start, end):
+    return f"{start} – {end if end is not None else 'Present'}"
+
+
+def cv_blocks(sections):
+    """Lay out the CV as a list of (kind, text) blocks: h1, h2, h3, p and li."""
+    blocks = []
+    for person in sections['personal_info'][:1]:
+        blocks += [('h1', person['name']), ('p', f"{person['email']} · {person['phone']}"), ('p', person['bio'])]
+    if sections['work_experience']:
+        blocks.append(('h2', 'Work Experience'))
+        for job in sections['work_experience']:
+            blocks += [('h3', f"{job['position']}, {job['company']} ({years(job['start_year'], job['end_year'])})"), ('p', job['description'])]
+    if sections['education']:
+        blocks.append(('h2', 'Education'))
+        for school in sections['education']:
+            blocks.append(('li', f"{school['school']}: {school['achievement']} ({years(school['start_year'], school['end_year'])})"))
+    if sections['projects']:
+        blocks.append(('h2', 'Projects'))
+        for project in sections['projects']:
+            blocks += [('h3', f"{project['project_name']} ({years(project['start_date'], project['end_date'])})"), ('p', project['description'])]
+    if sections['skills']:
+        blocks.append(('h2', 'Skills'))
+        categories = OrderedDict()
+        for skill in sections['skills']:
+            categories.setdefault(skill['category'], []).append(f"{skill['skill_name']} ({skill['proficiency_level']})")
+        blocks += [('li', f"{category}: {', '.join(skills)}") for category, skills in categories.items()]
+    return [(kind, str(text)) for kind, text in blocks if text]
+
+
+def render_markdown(blocks):
+    prefixes = {'h1': '# ', 'h2': '## ', 'h3': '### ', 'li': '- ', 'p': ''}
+    lines = []
+    for kind, text in blocks:
+        if kind != 'li' and lines and lines[-1] != '':
+            lines.append('')  # Blank line between blocks, but keep list items together
+        lines.append(prefixes[kind] + ' '.join(text.split()) if kind != 'p' else text.strip())
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def render_docx(blocks):
+    """A minimal WordprocessingML document using Word's built-in heading and list styles."""
+    import io, zipfile  # Imported lazily: only DOCX rendering needs them
+    from xml.sax.saxutils import escape
+    styles = {'h1': 'Title', 'h2': 'Heading1', 'h3': 'Heading2', 'li': 'ListBullet', 'p': None}
+    paragraphs = []
+    for kind, text in blocks:
+        text = ''.join(ch for ch in text if ch in '\t\n' or ord(ch) >= 32)  # XML 1.0 forbids other control characters
+        style = f'<w:pPr><w:pStyle w:val="{styles[kind]}"/></w:pPr>' if styles[kind] else ''
+        runs = '<w:br/>'.join(f'<w:t xml:space="preserve">{escape(line)}</w:t>' for line in text.split('\n'))
+        paragraphs.append(f'<w:p>{style}<w:r>{runs}</w:r></w:p>')
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    document = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{namespace}"><w:body>{"".join(paragraphs)}</w:body></w:document>'
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+        '</Relationships>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as docx:
+        for name, data in (('[Content_Types].xml', content_types), ('_rels/.rels', rels), ('word/document.xml', document)):
+            docx.writestr(zipfile.ZipInfo(name, (1980, 1, 1, 0, 0, 0)), data, zipfile.ZIP_DEFLATED)  # Fixed dates: same rows, same bytes
+    return buffer.getvalue()
+
+
+# Advance widths of Helvetica for ASCII 32-126, in 1/1000 em (from the standard AFM)
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+PDF_PAGE = (595, 842)  # A4 in points
+PDF_MARGIN = 56
+PDF_STYLES = {  # kind -> (font, size, space before, indent)
+    'h1': ('F2', 20, 0, 0),
+    'h2': ('F2', 14, 14, 0),
+    'h3': ('F2', 11, 8, 0),
+    'p': ('F1', 10, 4, 0),
+    'li': ('F1', 10, 2, 12),
+}
+
+
+def _text_width(text, size):
+    return sum(HELVETICA_WIDTHS[ord(ch) - 32] if 32 <= ord(ch) <= 126 else 556 for ch in text) * size / 1000
+
+
+def _wrap(text, size, width):
+    """Split text into lines no wider than `width` points, breaking at spaces."""
+    lines = []
+    for paragraph in text.split('\n'):
+        line = ''
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and _text_width(candidate, size) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _pdf_string(text):
+    data = text.encode('cp1252', 'replace')  # WinAnsiEncoding covers the dashes and quotes a CV uses
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def render_pdf(blocks):
+    """A text-only PDF in Helvetica, wrapped and paginated on A4."""
+    width, height = PDF_PAGE
+    pages, commands = [], []
+    y = height - PDF_MARGIN
+    for kind, text in blocks:
+        font, size, before, indent = PDF_STYLES[kind]
+        leading = size * 1.3
+        y -= before
+        if kind == 'li':
+            text = '• ' + text
+        for line in _wrap(text, size, width - 2 * PDF_MARGIN - indent):
+            if y - leading < PDF_MARGIN:
+                pages.append(commands)
+                commands, y = [], height - PDF_MARGIN
+            y -= leading
+            commands.append(b'BT /%s %d Tf %.2f %.2f Td %s Tj ET' % (font.encode(), size, PDF_MARGIN + indent, y, _pdf_string(line)))
+    pages.append(commands)
+
+    objects = []  # Object bodies; object n is objects[n - 1]
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    page_tree = add(None)
+    regular = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    bold = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+    kids = []
+    for commands in pages:
+        stream = zlib.compress(b'\n'.join(commands))
+        content = add(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+        kids.append(add(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>'
+                        % (page_tree, width, height, regular, bold, content)))
+    objects[catalog - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % page_tree
+    objects[page_tree - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % kid for kid in kids), len(kids))
+
+    output = [b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n']
+    offsets, size = [], len(output[0])
+    for number, body in enumerate(objects, start=1):
+        chunk = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        offsets.append(size)
+        output.append(chunk)
+        size += len(chunk)
+    output.append(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    output.extend(b'%010d 00000 n \n' % offset for offset in offsets)
+    output.append(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog, size))
+    return b''.join(output)
+
+
+RENDERERS = {'pdf': render_pdf, 'docx': render_docx, 'md': render_markdown}
+
+
+def render_document(fmt, blocks):
+    """Render blocks to bytes; runs in the process pool, so it takes and returns plain data."""
+    return RENDERERS[fmt](blocks)
+
+
+class DocumentPending(Exception):
+    """The document did not finish rendering within the timeout; it is still being rendered."""
+
+
+class DocumentFailed(Exception):
+    """Rendering the document failed; the render thread has logged why."""
+
+
+class DocumentRenderer:
+    """Serves each tenant's CV documents from disk, rendering them in a process pool when the data changed."""
+
+    def __init__(self, listings, query_cache, cache_dir, workers=2, timeout=30, prune_after=600):
+        self.listings = listings
+        self.query_cache = query_cache  # Rows come from its 'api' entries, shared with /api/cv
+        self.cache_dir = cache_dir  # <cache_dir>/<tenant>/<hash>.<format>
+        self.workers = workers  # Render processes per app worker; 0 renders in a thread of the app worker
+        self.timeout = timeout  # Seconds a request waits for a render
+        self.prune_after = prune_after  # Seconds an older render is kept after it was last rendered or reused
+        self.selects = section_selects({table: listings[table] for table in TABLES})
+        self.hits = 0  # Requests served from disk straight away
+        self.coalesced = 0  # Requests that waited for a render another request had started
+        self.renders = 0  # Documents rendered by this worker
+        self.errors = 0  # Renders that failed
+        self._hashes = OrderedDict()  # (tenant, table versions) -> content hash
+        self._inflight = {}  # (tenant, table versions, format) -> Future
+        self._served = set()  # (tenant, format) requested from this worker, re-rendered on changes
+        self._pid = None  # Process owning the executors
+        self._lock = threading.Lock()
+
+    def _executors(self):
+        with self._lock:
+            if self._pid != os.getpid():  # Pools do not survive a fork: each gunicorn worker starts its own
+                self._pid = os.getpid()
+                self._threads = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cv-document')
+                if self.workers:
+                    import multiprocessing  # Imported lazily, with the pool: only needed once a document is rendered
+                    from concurrent.futures import ProcessPoolExecutor
+                    # Not fork: forking a threaded server can copy a lock another thread holds into the child
+                    if 'forkserver' in multiprocessing.get_all_start_methods():
+                        context = multiprocessing.get_context('forkserver')
+                        context.set_forkserver_preload([__name__])  # Imported once by the fork server, not by every render process
+                    else:
+                        context = multiprocessing.get_context('spawn')
+                    self._processes = ProcessPoolExecutor(self.workers, mp_context=context)
+                else:
+                    self._processes = None
+                atexit.register(self.close)
+            return self._threads, self._processes
+
+    def state(self):
+        """The current tenant and the versions of the tables a CV is built from."""
+        return current_tenant(), tuple(self.query_cache.version(table) for table in TABLES)
+
+    def path(self, tenant, digest, fmt):
+        return os.path.join(self.cache_dir, str(tenant), f"{digest}.{fmt}")
+
+    def get(self, fmt):
+        """Return (path, content hash) of the current tenant's document, waiting for it to be rendered if needed.
+
+        Raises DocumentPending if the render takes longer than the timeout, and
+        DocumentFailed if it failed.
+        """
+        state = self.state()
+        digest = self._hashes.get(state)
+        if digest and os.path.exists(self.path(state[0], digest, fmt)):
+            self.hits += 1
+            return self.path(state[0], digest, fmt), digest
+        self._served.add((state[0], fmt))
+        future = self._submit(state, fmt)
+        try:
+            return future.result(self.timeout)
+        except SectionUnavailable:
+            raise
+        except Exception as err:
+            if not future.done():
+                raise DocumentPending() from None  # The render carries on; a later request finds it done
+            raise DocumentFailed() from err
+
+    def changed(self, table):
+        """Query cache listener: re-render in the background the documents this worker has served for the tenant."""
+        if table not in TABLES:
+            return
+        state = self.state()
+        for tenant, fmt in list(self._served):
+            if tenant == state[0]:
+                self._submit(state, fmt)
+
+    def _submit(self, state, fmt):
+        """Start a render, or join the one already running for the same data and format."""
+        threads, _ = self._executors()
+        key = state + (fmt,)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._inflight[key] = threads.submit(self._render, state, fmt)
+        future.add_done_callback(lambda done: self._done(key, done))
+        return future
+
+    def _done(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+        error = future.exception()
+        if error is not None and not isinstance(error, SectionUnavailable):
+            print(f"Error rendering CV document: {error}")  # Log render failures, waited for or not
+            traceback.print_exception(error)  # A failure in a render process carries that process's traceback too
+
+    def _render(self, state, fmt):
+        tenant = state[0]
+        set_tenant(tenant)  # This thread serves whichever tenant asked
+        tables = load_sections(self.query_cache, self.selects, TABLES)
+        sections = {table: [dict(zip(self.listings[table].columns, row)) for row in rows] for table, rows in tables.items()}
+        canonical = json.dumps([RENDER_VERSION, sections], default=str, sort_keys=True).encode('utf-8')
+        digest = hashlib.sha256(canonical).hexdigest()[:20]
+        with self._lock:
+            self._hashes[state] = digest
+            while len(self._hashes) > 4096:
+                self._hashes.popitem(last=False)
+        path = self.path(tenant, digest, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.lock', 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # Another worker rendering the same document: wait for it
+            if not os.path.exists(path):
+                blocks = cv_blocks(sections)
+                _, processes = self._executors()
+                try:
+                    body = processes.submit(render_document, fmt, blocks).result(self.timeout) if processes else render_document(fmt, blocks)
+                except Exception:
+                    self.errors += 1
+                    raise  # Logged by _done, with its traceback
+                write_atomic(path, body)
+                self.renders += 1
+                self._prune(os.path.dirname(path), digest, fmt)
+            else:
+                os.utime(path)  # Reused: keep it from being pruned while it is served
+        return path, digest
+
+    def _prune(self, directory, digest, fmt):
+        """Delete the tenant's renders of this format not rendered or reused for `prune_after` seconds.
+
+        Lock files stay: another worker may hold or be about to take one.
+        """
+        cutoff = time.time() - self.prune_after
+        for name in os.listdir(directory):
+            if name.endswith(f".{fmt}") and not name.startswith(digest):
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass  # Pruned by another worker
+
+    def close(self):
+        if self._pid == os.getpid():
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            if self._processes:
+                self._processes.shutdown(cancel_futures=True)  # Waits for the render in progress, if any
+
+    def stats(self):
+        return {'hits': self.hits, 'coalesced': self.coalesced, 'renders': self.renders, 'errors': self.errors}
+
+
+def create_documents(renderer):
+    """Build the blueprint serving /cv.pdf, /cv.docx and /cv.md."""
+    documents = Blueprint('documents', __name__)
+
+    @documents.route('/cv.<fmt>')
+    def cv_document(fmt):
+        """Download the CV; rendered on the first request after each change, then served from disk."""
+        if fmt not in FORMATS:
+            return render_template('error.html', error_message=f"No CV in .{fmt} format; try .pdf, .docx or .md."), 404
+        try:
+            try:
+                response = send_document(fmt)
+            except FileNotFoundError:  # Pruned after get() found it: a miss, so render it again
+                response = send_document(fmt)
+        except DocumentPending:
+            return render_template('error.html', error_message="Your CV is still being generated. Please try again in a moment."), 503, {'Retry-After': '5'}
+        except SectionUnavailable:
+            return render_template('error.html', error_message="Database connection failed."), 503
+        except DocumentFailed:
+            return render_template('error.html', error_message="Unable to generate the CV."), 500  # Already logged
+        except Exception as err:
+            print(f"Error sending CV document: {err}")  # Log anything else, e.g. an unreadable cache directory
+            traceback.print_exc()
+            return render_template('error.html', error_message="Unable to generate the CV."), 500
+        response.headers['Cache-Control'] = 'public, no-cache'  # Revalidate: the hash changes with the data
+        return response
+
+    def send_document(fmt):
+        path, digest = renderer.get(fmt)
+        return send_file(path, mimetype=FORMATS[fmt], download_name=f"cv.{fmt}", etag=digest, max_age=0, conditional=True)
+
+    return documents
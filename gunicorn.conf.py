@@ -0,0 +1,54 @@
+"""Gunicorn settings: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+SERVER_MODE=sync (default) runs one request per worker process at a time.
+SERVER_MODE=async runs gevent workers: each worker serves up to
+WORKER_CONNECTIONS requests concurrently, switching to another request
+whenever one is waiting on MySQL, so a slow query no longer blocks a whole
+worker. Requires `pip install gevent`; app.py switches the MySQL driver to
+its pure-Python implementation in this mode because the C extension's
+socket reads would block every other request in the worker.
+
+PRELOAD_APP=true (the default in sync mode) builds the app once in the
+master: templates, the listing cache and the search index are warmed there
+and every forked worker starts with them, sharing the memory until it is
+written to. Connections, threads and process pools are opened by each
+worker after the fork. Code changes then need a full restart rather than
+a HUP. It is off by default in async mode, since a gevent hub started in
+the master does not reliably survive the fork. The contact queue's writer
+thread is one of the things started per worker, by post_worker_init below,
+so journals left by a dead worker are delivered as soon as its replacement
+boots.
+"""
+import multiprocessing  # Default worker count
+import os  # Settings come from the environment, like app.py
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'sync')  # "sync" or "async"
+
+bind = os.getenv('BIND', '0.0.0.0:8000')  # Address gunicorn listens on
+timeout = int(os.getenv('WORKER_TIMEOUT', '30'))  # Seconds before a stuck worker is restarted
+preload_app = os.getenv('PRELOAD_APP', 'false' if SERVER_MODE == 'async' else 'true').lower() == 'true'  # Build and warm the app before forking
+if preload_app:
+    os.environ.setdefault('CONTACT_QUEUE_START', 'false')  # Not in the master: its thread would not survive the fork
+
+if SERVER_MODE == 'async':
+    worker_class = 'gevent'  # Cooperative greenlets; sockets, locks and sleeps yield to other requests
+    workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count())))  # One per core is enough
+    worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))  # Concurrent requests per worker
+    # Requests beyond DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW wait for a pooled connection
+    # (cooperatively, up to DB_POOL_TIMEOUT), so raise the pool size along with this.
+else:
+    worker_class = 'sync'
+    workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+
+
+def post_worker_init(worker):
+    """Start the contact queue in each worker once the app is loaded, replaying journals of workers that died."""
+    worker.wsgi.extensions['cv']['contact_queue'].start()
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics into METRICS_DIR's archive, so the directory does not grow with every restart."""
+    metrics_dir = os.getenv('METRICS_DIR')
+    if metrics_dir:
+        from metrics import mark_process_dead  # Imported lazily: the master only needs it when a worker exits
+        mark_process_dead(metrics_dir, worker.pid)
@@ -0,0 +1,350 @@
+"""Request timing spans, Prometheus metrics, slow-request logs and an opt-in profiler."""
+import glob  # Finds the snapshots written by other workers
+import json  # Worker snapshots are stored as JSON
+import os  # Snapshot and profile file paths
+import re  # Normalises SQL text
+import threading  # Guards the metric registry
+import time  # Span timings
+from contextlib import contextmanager  # span() is used as a `with` block
+from functools import lru_cache  # The same few statements are normalised over and over
+from flask import g, has_request_context, request, template_rendered, before_render_template  # Request-scoped state and Jinja signals
+
+try:
+    import fcntl  # Serialises folding dead workers' snapshots between workers
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # Bytes
+ARCHIVE = 'dead.json'  # Totals of exited workers, so counters do not go backwards when a worker is replaced
+
+
+@lru_cache(maxsize=512)
+def normalize_sql(sql):
+    """Collapse whitespace and literals so equivalent statements share one label."""
+    sql = re.sub(r"'(?:[^'\\]|\\.)*'", '?', sql)  # String literals
+    sql = re.sub(r'\b\d+\b', '?', sql)  # Numeric literals
+    sql = re.sub(r'%s', '?', sql)  # Driver placeholders
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(...)', sql)  # IN lists and multi-row VALUES
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class Registry:
+    """Counters and histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.help = {}  # name -> (type, help text)
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self.buckets = {}  # name -> bucket bounds
+        self.collectors = []  # Callables returning extra gauge samples at scrape time
+
+    def counter(self, name, help_text):
+        self.help[name] = ('counter', help_text)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.help[name] = ('histogram', help_text)
+        self.buckets[name] = buckets
+
+    def inc(self, name, labels=(), amount=1):
+        """Increment a counter; labels is a tuple of (key, value) pairs."""
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        """Record one observation in a histogram."""
+        bounds = self.buckets[name]
+        with self._lock:
+            key = (name, labels)
+            data = self.histograms.get(key)
+            if data is None:
+                data = self.histograms[key] = [0] * (len(bounds) + 2)
+            for index, bound in enumerate(bounds):
+                if value <= bound:
+                    data[index] += 1
+                    break
+            data[-2] += value  # Sum
+            data[-1] += 1  # Count
+
+    def snapshot(self):
+        """Return the counters and histograms in a JSON-friendly form."""
+        with self._lock:
+            return {
+                'counters': [[name, list(map(list, labels)), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(map(list, labels)), list(data)] for (name, labels), data in self.histograms.items()],
+            }
+
+    @staticmethod
+    def merge(snapshots):
+        """Sum several snapshots into dicts keyed like self.counters/self.histograms."""
+        counters, histograms = {}, {}
+        for snap in snapshots:
+            for name, labels, value in snap['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, data in snap['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                total = histograms.setdefault(key, [0] * len(data))
+                for index, value in enumerate(data):
+                    total[index] += value
+        return counters, histograms
+
+    @classmethod
+    def combine(cls, snapshots):
+        """Sum several snapshots into one snapshot."""
+        counters, histograms = cls.merge(snapshots)
+        return {
+            'counters': [[name, list(map(list, labels)), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(map(list, labels)), data] for (name, labels), data in histograms.items()],
+        }
+
+    def render(self, snapshots):
+        """Render merged snapshots plus collector gauges in Prometheus text format."""
+        counters, histograms = self.merge(snapshots)
+        lines = []
+        for name, (kind, help_text) in sorted(self.help.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+            else:
+                for (metric, labels), data in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets[name], data):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {data[-1]}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {data[-2]}")
+                    lines.append(f"{name}_count{format_labels(labels)} {data[-1]}")
+        gauges = {}  # name -> (help, samples); one HELP/TYPE per name even with several label sets
+        for collect in self.collectors:
+            for name, help_text, labels, value in collect():
+                gauges.setdefault(name, (help_text, []))[1].append((labels, value))
+        for name, (help_text, samples) in gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """Format ((key, value), ...) as {key="value",...}."""
+    if not labels:
+        return ''
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"' for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def write_json(path, data):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+
+def read_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+@contextmanager
+def archive_lock(metrics_dir, exclusive):
+    """Lock the snapshot files against folding (shared) or for folding (exclusive)."""
+    os.makedirs(metrics_dir, exist_ok=True)
+    with open(os.path.join(metrics_dir, '.lock'), 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def mark_process_dead(metrics_dir, pid):
+    """Fold an exited worker's snapshot into the archive of dead workers' totals and remove its file.
+
+    Like prometheus_client's function of the same name: call it from
+    gunicorn's child_exit hook. render() also sweeps up snapshots of
+    processes that are gone, e.g. after the whole server was killed.
+    """
+    path = os.path.join(metrics_dir, f"{pid}.json")
+    with archive_lock(metrics_dir, exclusive=True):  # Two workers sweeping at once must not both fold the same file
+        if not os.path.exists(path):
+            return  # Folded already
+        try:
+            snapshot = read_json(path)
+        except ValueError:
+            snapshot = None  # Cut short by a crash while it was written
+        if snapshot is not None:
+            archive_path = os.path.join(metrics_dir, ARCHIVE)
+            archive = read_json(archive_path, {'counters': [], 'histograms': []})
+            write_json(archive_path, Registry.combine([archive, snapshot]))
+        os.remove(path)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)  # Signal 0 only checks that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+class Instrumentation:
+    """Wires spans, metrics, profiling and slow-request logging into a Flask app."""
+
+    def __init__(self, app, metrics_dir=None, slow_threshold=1.0, profiling=False, profile_token=None, profile_dir=None):
+        self.registry = Registry()
+        self.metrics_dir = metrics_dir  # Shared directory for per-worker snapshots, or None for this process only
+        self.slow_threshold = slow_threshold  # Seconds after which a request is logged with its spans
+        self.profiling = profiling  # Allow ?_profile=1 / X-Profile to run cProfile on a request
+        self.profile_token = profile_token  # If set, the trigger value must equal this token
+        self.profile_dir = profile_dir  # Where .prof files are written
+        self._last_dump = 0.0  # Time of the last snapshot written to metrics_dir
+        self._profile_lock = threading.Lock()  # cProfile allows one active profiler per process (Python 3.12+ raises otherwise)
+        r = self.registry
+        r.counter('cv_http_requests_total', "HTTP requests by endpoint, method and status.")
+        r.histogram('cv_http_request_duration_seconds', "Time to produce the response, by endpoint.")
+        r.histogram('cv_http_response_size_bytes', "Response body size, by endpoint.", SIZE_BUCKETS)
+        r.histogram('cv_db_checkout_seconds', "Time to check a connection out of the pool.")
+        r.histogram('cv_db_query_seconds', "SQL statement execution time, by normalised statement.")
+        r.histogram('cv_template_render_seconds', "Jinja render time, by template.")
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._rendered, app)
+
+    def collector(self, fn):
+        """Register a callable returning (name, help, labels, value) gauge samples."""
+        self.registry.collectors.append(fn)
+        return fn
+
+    @contextmanager
+    def span(self, kind, name=''):
+        """Time a block, adding it to the current request's spans and metrics."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if kind == 'db.checkout':
+                self.registry.observe('cv_db_checkout_seconds', elapsed)
+            elif kind == 'db.query':
+                name = normalize_sql(name)
+                self.registry.observe('cv_db_query_seconds', elapsed, (('statement', name),))
+            if has_request_context() and 'spans' in g:
+                g.spans.append((kind, name, elapsed))
+
+    def _before(self):
+        g.spans = []  # (kind, name, seconds) recorded during this request
+        g.request_started = time.perf_counter()
+        g.profiler = None
+        trigger = request.headers.get('X-Profile') or request.args.get('_profile')
+        if self.profiling and trigger and (not self.profile_token or trigger == self.profile_token):
+            if not self._profile_lock.acquire(blocking=False):
+                return  # Another request is being profiled; serve this one unprofiled
+            import cProfile  # Imported lazily: only profiled requests need it
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # Another profiling tool is active in this process
+                self._profile_lock.release()
+                return
+            g.profiler = profiler
+
+    def _before_render(self, sender, template, context, **extra):
+        g.render_started = time.perf_counter()
+
+    def _rendered(self, sender, template, context, **extra):
+        if 'render_started' in g and 'spans' in g:
+            elapsed = time.perf_counter() - g.pop('render_started')
+            self.registry.observe('cv_template_render_seconds', elapsed, (('template', template.name),))
+            g.spans.append(('template', template.name, elapsed))
+
+    def _after(self, response):
+        if 'request_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        endpoint = request.endpoint or 'unmatched'
+        size = response.calculate_content_length()  # None for streamed responses
+        r = self.registry
+        r.inc('cv_http_requests_total', (('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+        r.observe('cv_http_request_duration_seconds', elapsed, (('endpoint', endpoint),))
+        if size is not None:
+            r.observe('cv_http_response_size_bytes', size, (('endpoint', endpoint),))
+        response.headers['Server-Timing'] = ', '.join(
+            [f'{kind.replace(".", "-")};dur={seconds * 1000:.2f}' for kind, _, seconds in g.spans[:20]]
+            + [f'total;dur={elapsed * 1000:.2f}']
+        )
+        if g.profiler:
+            profiler = self._stop_profiler()
+            self._report_profile(profiler, endpoint)
+        if elapsed >= self.slow_threshold:
+            self._log_slow(endpoint, elapsed, size)
+        self._dump()
+        return response
+
+    def _stop_profiler(self):
+        profiler, g.profiler = g.profiler, None
+        profiler.disable()
+        self._profile_lock.release()
+        return profiler
+
+    def _teardown(self, exc):
+        if g.get('profiler'):
+            self._stop_profiler()  # The request failed before after_request could stop it
+
+    def _log_slow(self, endpoint, elapsed, size):
+        """Print a slow request with the spans it spent its time in."""
+        spans = '; '.join(' '.join(filter(None, (kind, name, f"{seconds * 1000:.1f}ms"))) for kind, name, seconds in g.spans)
+        print(f"Slow request: {request.method} {request.full_path} ({endpoint}) took {elapsed * 1000:.1f}ms, {size} bytes: {spans}")
+
+    def _report_profile(self, profiler, endpoint):
+        """Save a request's profile and print its hottest functions."""
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{int(time.time() * 1000)}-{endpoint}.prof")
+            profiler.dump_stats(path)
+            print(f"Profile for {request.full_path} written to {path}")
+        import io, pstats  # Imported lazily: only profiled requests need them
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+        print(out.getvalue())
+
+    def _dump(self):
+        """Write this worker's snapshot to metrics_dir at most once a second."""
+        now = time.monotonic()
+        if not self.metrics_dir or now - self._last_dump < 1:
+            return
+        self._last_dump = now
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        write_json(os.path.join(self.metrics_dir, f"{os.getpid()}.json"), self.registry.snapshot())
+
+    def render(self):
+        """Return every worker's metrics (or this process's) in Prometheus text format."""
+        if not self.metrics_dir:
+            return self.registry.render([self.registry.snapshot()])
+        self._last_dump = 0
+        self._dump()  # Make sure this worker's latest numbers are included
+        for path in glob.glob(os.path.join(self.metrics_dir, '*.json')):
+            pid = os.path.basename(path)[:-len('.json')]
+            if pid.isdigit() and not process_alive(int(pid)):
+                mark_process_dead(self.metrics_dir, int(pid))  # Exited without child_exit running, e.g. the server was killed
+        snapshots = []
+        with archive_lock(self.metrics_dir, exclusive=False):  # A snapshot being folded would be counted twice
+            for path in glob.glob(os.path.join(self.metrics_dir, '*.json')):  # Live workers plus the dead workers' archive
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Being replaced by its worker right now
+        return self.registry.render(snapshots)
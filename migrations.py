@@ -0,0 +1,239 @@
+"""Versioned schema migrations and an EXPLAIN check of the app's queries.
+
+Migrations are the NNNN_description.sql files in schema/migrations, applied
+in order by `flask db migrate` and recorded in the schema_migrations table
+with a checksum of the file. A statement ends with a `;` at the end of a
+line, so string literals may contain one. MySQL commits every DDL statement on its own,
+so a migration that fails part-way is not rolled back: fix the file and run
+it again, or finish it by hand and `flask db stamp` its version.
+"""
+import hashlib  # Detects migration files edited after they were applied
+import os  # Finds the migration files
+import re  # Parses file names and strips comments
+from contextlib import contextmanager  # Connection helper for the commands
+import click  # Command-line interface for `flask db ...`
+import mysql.connector  # Database errors raised while migrating
+from flask import Blueprint  # CLI group
+from db import db_connection  # Pooled connections
+from pagination import PageRequest, InvalidPageRequest, encode_cursor  # Builds the listing queries to EXPLAIN
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema', 'migrations')
+LOCK_NAME = 'cv_schema_migrations'  # MySQL named lock held while migrating, so two deploys cannot race
+LOCK_TIMEOUT = 60  # Seconds to wait for another migration run to finish
+EXPLAIN_MAX_ROWS = 1000  # Estimated rows a full scan may read before the check fails
+
+HISTORY_SQL = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT UNSIGNED NOT NULL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB"""
+
+_filename = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+class MigrationError(Exception):
+    """Raised for unreadable migration files or a failed statement."""
+
+
+class Migration:
+    """One NNNN_description.sql file."""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding='utf-8') as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+
+    def statements(self):
+        """Split the file into statements; `--` comment lines are dropped and a `;` at the end of a line ends a statement.
+
+        A `;` anywhere else, e.g. in a string literal, is part of the statement.
+        """
+        sql = re.sub(r'^\s*--.*$', '', self.sql, flags=re.M)
+        return [statement.strip() for statement in re.split(r';[ \t\r]*(?:--.*)?$', sql, flags=re.M) if statement.strip()]
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Return the migrations in `directory`, oldest first."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _filename.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Two migrations have version {version}: {migrations[version].path} and {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_migrations(cursor):
+    """Return {version: checksum} of the migrations recorded in the database."""
+    cursor.execute(HISTORY_SQL)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def _record(mydb, cursor, migration):
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum),
+    )
+    mydb.commit()
+
+
+def migrate(mydb, migrations, target=None, progress=None):
+    """Apply the pending migrations up to `target` (default: all); return the ones applied."""
+    cursor = mydb.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchall()[0][0] != 1:
+        raise MigrationError("Another migration run holds the lock; try again when it has finished.")
+    try:
+        applied = applied_migrations(cursor)
+        done = []
+        for migration in migrations:
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            if progress:
+                progress(migration)
+            for statement in migration.statements():
+                try:
+                    cursor.execute(statement)
+                except mysql.connector.Error as err:
+                    raise MigrationError(f"{os.path.basename(migration.path)} failed: {err}\n{statement}") from err
+            _record(mydb, cursor, migration)
+            done.append(migration)
+        return done
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+def stamp(mydb, migrations, version):
+    """Record every migration up to `version` as applied without running it."""
+    cursor = mydb.cursor()
+    applied = applied_migrations(cursor)
+    stamped = [m for m in migrations if m.version <= version and m.version not in applied]
+    for migration in stamped:
+        _record(mydb, cursor, migration)
+    cursor.close()
+    return stamped
+
+
+def sample_value(column):
+    """A plausible value for a column, used to fill in the parameters of EXPLAINed queries."""
+    if column == 'id':
+        return 1
+    if column.endswith('_year'):
+        return 2000
+    if column.endswith('_date'):
+        return '2000-01-01'
+    return 'm'
+
+
+def app_queries(listings, resources):
+    """Yield (label, sql, params) for every query shape the listing and form routes issue.
+
+    Whole-table reads (bulk export, /api/cv) are left out: they read every row by design.
+    """
+    for table, listing in listings.items():
+        variants = [{}] + [{name: str(sample_value(name))} for name in listing.filters]  # No filter, then each one
+        for sort in listing.sorts:
+            for order in ('asc', 'desc'):
+                for filters in variants:
+                    for cursor in (None, 'after', 'before'):
+                        args = dict(filters, sort=sort, order=order)
+                        if cursor:
+                            args[cursor] = encode_cursor(sample_value(sort), 1)
+                        try:
+                            sql, params = PageRequest(listing, args).query()
+                        except InvalidPageRequest:
+                            continue
+                        label = f"{table} " + ' '.join(f"{key}={value}" for key, value in args.items() if key not in ('after', 'before'))
+                        yield label + (f" {cursor}=..." if cursor else ""), sql, params
+    for resource in resources:
+        yield f"{resource.table} select by id", resource.select_sql, (1, 1)
+        yield f"{resource.table} update by id", resource.update_sql, tuple(sample_value(c) for c in resource.columns) + (1, 1)
+        yield f"{resource.table} delete by id", resource.delete_sql, (1, 1)
+
+
+def explain(mydb, queries, max_rows=EXPLAIN_MAX_ROWS):
+    """EXPLAIN each query; return (label, sql, plan row) for every full scan estimated above `max_rows` rows."""
+    failures = []
+    cursor = mydb.cursor()
+    for label, sql, params in queries:
+        cursor.execute("EXPLAIN " + sql, params)
+        names = [column[0] for column in cursor.description]
+        for row in cursor.fetchall():
+            plan = dict(zip(names, row))
+            # ALL reads the whole table, index the whole of an index
+            if plan.get('type') in ('ALL', 'index') and int(plan.get('rows') or 0) > max_rows:
+                failures.append((label, sql, plan))
+    cursor.close()
+    return failures
+
+
+def create_migrations(listings, resources):
+    """Build the blueprint providing the `flask db` commands."""
+    db = Blueprint('migrations', __name__, cli_group='db')
+
+    @contextmanager
+    def connection():
+        with db_connection() as mydb:  # Borrow a pooled database connection
+            if not mydb:
+                raise click.ClickException("Database connection failed.")
+            yield mydb
+
+    @db.cli.command('migrate')
+    @click.option('--to', 'target', type=int, help="Stop after this version.")
+    def migrate_command(target):
+        """Apply pending migrations from schema/migrations."""
+        with connection() as mydb:
+            try:
+                done = migrate(mydb, load_migrations(), target, lambda m: click.echo(f"Applying {m.version:04d}_{m.name}"))
+            except MigrationError as err:
+                raise click.ClickException(str(err))
+        click.echo(f"Applied {len(done)} migrations" if done else "Schema is up to date")
+
+    @db.cli.command('status')
+    def status_command():
+        """List applied and pending migrations; flag applied files that were edited since."""
+        with connection() as mydb:
+            cursor = mydb.cursor()
+            applied = applied_migrations(cursor)
+            cursor.close()
+        for migration in load_migrations():
+            if migration.version not in applied:
+                state = 'pending'
+            elif applied[migration.version] != migration.checksum:
+                state = 'applied, file changed since'
+            else:
+                state = 'applied'
+            click.echo(f"{migration.version:04d}_{migration.name}: {state}")
+
+    @db.cli.command('stamp')
+    @click.argument('version', type=int)
+    def stamp_command(version):
+        """Mark migrations up to VERSION as applied, for a database whose schema was created by hand."""
+        with connection() as mydb:
+            stamped = stamp(mydb, load_migrations(), version)
+        click.echo(f"Stamped {len(stamped)} migrations")
+
+    @db.cli.command('explain')
+    @click.option('--max-rows', default=EXPLAIN_MAX_ROWS, show_default=True, help="Largest full scan allowed.")
+    def explain_command(max_rows):
+        """EXPLAIN every listing and form query; fail if one scans more than --max-rows rows."""
+        queries = list(app_queries(listings, resources))
+        with connection() as mydb:
+            failures = explain(mydb, queries, max_rows)
+        for label, sql, plan in failures:
+            click.echo(f"{label}: {plan.get('type')} scan of ~{plan.get('rows')} rows on {plan.get('table')}\n    {sql}", err=True)
+        if failures:
+            raise click.ClickException(f"{len(failures)} of {len(queries)} queries scan more than {max_rows} rows")
+        click.echo(f"Checked {len(queries)} queries; no full scans above {max_rows} rows")
+
+    return db
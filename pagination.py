@@ -0,0 +1,196 @@
+"""Keyset (cursor) pagination, sorting and filtering for the listing pages."""
+import base64  # Encodes cursors so they are safe in URLs
+import json  # Serialises the (sort value, id) pair inside a cursor
+from urllib.parse import urlencode  # Canonical cache keys for a page request
+from tenants import current_tenant  # Every listing query is limited to the tenant being served
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for malformed cursors, sort fields or filter values."""
+
+
+class Listing:
+    """Describes how one table is listed: its columns, sortable fields and filters."""
+
+    def __init__(self, table, columns, sorts=(), filters=None, nullable=()):
+        self.table = table  # Table name
+        self.columns = columns  # Selected columns, `id` last as the templates expect
+        self.sorts = ('id',) + tuple(sorts)  # Columns a page may be ordered by
+        self.filters = filters or {}  # query parameter -> (SQL condition, converter)
+        self.nullable = set(nullable)  # Optional columns; a blank form field is stored as NULL
+
+    def select(self):
+        """Return the SELECT ... FROM part of the query."""
+        return f"SELECT {', '.join(self.columns)} FROM {self.table}"
+
+
+class Page:
+    """One page of rows plus the query arguments for the neighbouring pages."""
+
+    def __init__(self, rows, next_args=None, prev_args=None):
+        self.rows = rows  # Rows in display order
+        self.next_args = next_args  # Query arguments for the next page, or None on the last page
+        self.prev_args = prev_args  # Query arguments for the previous page, or None on the first page
+
+
+class StreamingPage:
+    """A page whose rows are consumed lazily; the links are known once iteration ends."""
+
+    def __init__(self, page_request, rows):
+        self._request = page_request
+        self._source = rows  # Iterator over at most limit + 1 rows
+        self._first = self._last = None  # First and last rows displayed
+        self._more = False  # Whether the look-ahead row was seen
+
+    @property
+    def rows(self):
+        """Yield up to `limit` rows, remembering the ends for the links."""
+        for count, row in enumerate(self._source):
+            if count == self._request.limit:
+                self._more = True  # Look-ahead row: there is another page
+                break
+            if self._first is None:
+                self._first = row
+            self._last = row
+            yield row
+
+    @property
+    def next_args(self):
+        if self._last is None or not self._more:
+            return None
+        return dict(self._request.base_args(), after=self._request.row_key(self._last))
+
+    @property
+    def prev_args(self):
+        if self._first is None or self._request.after is None:
+            return None
+        return dict(self._request.base_args(), before=self._request.row_key(self._first))
+
+
+def encode_cursor(sort_value, row_id):
+    """Pack the last row's sort value and id into a URL-safe token."""
+    raw = json.dumps([sort_value, row_id], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a token produced by encode_cursor()."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(raw)
+        if isinstance(sort_value, bool) or not isinstance(sort_value, (str, int, float, type(None))):
+            raise TypeError("sort value must be a string, number or null")  # Only these can be bound as a parameter
+        return sort_value, int(row_id)
+    except (ValueError, TypeError) as err:
+        raise InvalidPageRequest(f"Invalid cursor: {token}") from err
+
+
+class PageRequest:
+    """The sort, filter and cursor arguments of one listing request."""
+
+    def __init__(self, listing, args, page_size=50, max_page_size=200):
+        self.listing = listing
+        self.page_size = page_size  # Default rows per page, left out of generated links
+        self.sort = args.get('sort', 'id')  # Column to order by
+        if self.sort not in listing.sorts:
+            raise InvalidPageRequest(f"Cannot sort {listing.table} by {self.sort}")
+        self.descending = args.get('order', 'asc') == 'desc'  # Sort direction
+        try:
+            self.limit = min(int(args.get('limit', page_size)), max_page_size)  # Rows per page
+        except ValueError as err:
+            raise InvalidPageRequest("limit must be a number") from err
+        if self.limit < 1:
+            raise InvalidPageRequest("limit must be positive")
+        self.filters = {}  # Validated filter values keyed by query parameter
+        for name, (_, convert) in listing.filters.items():
+            if args.get(name):
+                try:
+                    self.filters[name] = convert(args[name])
+                except ValueError as err:
+                    raise InvalidPageRequest(f"Invalid value for {name}") from err
+        self.after = decode_cursor(args['after']) if args.get('after') else None  # Rows after this key
+        self.before = decode_cursor(args['before']) if args.get('before') else None  # Rows before this key
+
+    def base_args(self):
+        """Query arguments shared by every page of this listing."""
+        args = dict(self.filters)
+        if self.sort != 'id':
+            args['sort'] = self.sort
+        if self.descending:
+            args['order'] = 'desc'
+        if self.limit != self.page_size:
+            args['limit'] = self.limit
+        return args
+
+    def cache_key(self):
+        """A canonical string identifying this page, for the query cache."""
+        args = self.base_args()
+        args['limit'] = self.limit
+        if self.after:
+            args['after'] = encode_cursor(*self.after)
+        if self.before:
+            args['before'] = encode_cursor(*self.before)
+        return urlencode(sorted(args.items()))
+
+    def query(self):
+        """Return (sql, params) fetching one row more than the page size."""
+        conditions = ['tenant_id = %s']  # WHERE clauses joined with AND; the tenant first, matching the indexes
+        params = [current_tenant()]  # Values for the %s placeholders
+        for name, value in self.filters.items():
+            conditions.append(self.listing.filters[name][0])
+            params.extend([value] * self.listing.filters[name][0].count('%s'))
+        backwards = self.before is not None  # Walking towards the start of the listing
+        ascending = self.descending == backwards  # Direction of the SQL ORDER BY
+        cursor = self.before or self.after
+        if cursor:
+            op = '>' if ascending else '<'
+            sort_value, row_id = cursor
+            if self.sort == 'id':
+                conditions.append(f"id {op} %s")
+                params.append(row_id)
+            elif sort_value is None:
+                # MySQL sorts NULL before every value: ascending, all non-NULL rows follow
+                tail = f" OR {self.sort} IS NOT NULL" if ascending else ""
+                conditions.append(f"(({self.sort} IS NULL AND id {op} %s){tail})")
+                params.append(row_id)
+            else:
+                # Descending, the NULL rows come after every value
+                tail = f" OR {self.sort} IS NULL" if not ascending and self.sort in self.listing.nullable else ""
+                conditions.append(f"({self.sort} {op} %s OR ({self.sort} = %s AND id {op} %s){tail})")
+                params.extend([sort_value, sort_value, row_id])
+        sql = self.listing.select() + " WHERE " + " AND ".join(conditions)
+        direction = 'ASC' if ascending else 'DESC'
+        if self.sort == 'id':
+            sql += f" ORDER BY id {direction}"
+        else:
+            sql += f" ORDER BY {self.sort} {direction}, id {direction}"
+        sql += " LIMIT %s"
+        params.append(self.limit + 1)  # One extra row tells us whether another page exists
+        return sql, tuple(params)
+
+    def row_key(self, row):
+        """Return the cursor token pointing at a row."""
+        return encode_cursor(row[self.listing.columns.index(self.sort)], row[-1])
+
+    def stream(self, rows):
+        """Like page(), but consumes the rows lazily while the template renders."""
+        if self.before is not None:
+            return self.page(rows)  # Backward pages must be reversed, so they are read in full
+        return StreamingPage(self, rows)
+
+    def page(self, rows):
+        """Turn the rows returned by query() into a Page with next/prev links."""
+        rows = list(rows)
+        more = len(rows) > self.limit  # The extra row was returned
+        rows = rows[:self.limit]
+        if self.before is not None:
+            rows.reverse()  # Rows were fetched backwards
+        key = self.row_key
+        has_next = more if self.before is None else True
+        has_prev = more if self.before is not None else self.after is not None
+        next_args = prev_args = None
+        if rows and has_next:
+            next_args = dict(self.base_args(), after=key(rows[-1]))
+        if rows and has_prev:
+            prev_args = dict(self.base_args(), before=key(rows[0]))
+        return Page(rows, next_args, prev_args)
@@ -0,0 +1,195 @@
+"""Token-bucket rate limits per client IP and per route, shared by every worker on the host.
+
+Buckets live in a memory-mapped file (put it on /dev/shm to keep it off the
+disk entirely), so all gunicorn workers draw from the same buckets without
+an external service. The file is a fixed table of slots; a key hashes to a
+group of slots guarded by its own byte-range lock, so unrelated clients do
+not contend. When a group is full the least recently used bucket is
+reused, which can only ever forgive a client, never block one wrongly.
+
+The check runs in a before_request hook, ahead of the view, so a rejected
+request gets its 429 without borrowing a database connection. A request
+takes a token from every bucket covering it (per IP and per route) or from
+none, so a refusal by one bucket never drains another.
+"""
+import hashlib  # Keys -> slots
+import math  # Retry-After in whole seconds
+import mmap  # The shared bucket table
+import os  # Table file and the current process id
+import re  # Parses "10/minute"
+import struct  # Slot layout
+import threading  # Guards each group within a process
+import time  # Refill clock, shared by every process on the host
+from flask import render_template, request  # The hook and its 429 responses
+from api import json_response  # 429s from JSON routes are JSON
+from tenants import current_tenant  # Route-wide buckets are per tenant
+
+try:
+    import fcntl  # Byte-range locks between workers
+except ImportError:  # pragma: no cover - not available on Windows, where each process keeps its own buckets
+    fcntl = None
+
+SLOT = struct.Struct('<Qdd')  # Key hash (0 = free), tokens left, last update
+GROUP = 8  # Slots a key may occupy; one lock covers a group
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(value):
+    """Parse "N/period" or "N/period burst M" into (requests per second, burst); an empty value is None."""
+    if not value or not value.strip():
+        return None
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*(?:burst\s+(\d+)\s*)?', value)
+    if not match:
+        raise ValueError(f"Invalid rate limit {value!r}; expected e.g. '10/minute' or '100/hour burst 20'")
+    count, multiple, period, burst = match.groups()
+    if int(count) == 0 or burst == '0' or multiple == '0':
+        raise ValueError(f"Invalid rate limit {value!r}; counts must be at least 1 (leave it empty for no limit)")
+    seconds = PERIODS[period] * int(multiple or 1)
+    return int(count) / seconds, int(burst or count)
+
+
+class SharedBuckets:
+    """Token buckets in a memory-mapped table of `slots` slots, shared by every process that opens `path`."""
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.groups = max(1, slots // GROUP)
+        self._pid = None  # Process that opened the mapping
+        self._open_lock = threading.Lock()
+
+    def _open(self):
+        with self._open_lock:
+            if self._pid != os.getpid():  # Locks are per process: a forked worker starts with fresh ones
+                size = self.groups * GROUP * SLOT.size
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)  # New pages read as zeroes, i.e. free slots
+                self._fd = fd
+                self._map = mmap.mmap(fd, size)
+                self._locks = [threading.Lock() for _ in range(min(self.groups, 256))]
+                self._pid = os.getpid()
+
+    def take(self, key, rate, burst, now=None):
+        """Take a token from `key`'s bucket; return 0 if allowed, else the seconds until one is available."""
+        return self.take_all([(key, rate, burst)], now)[0]
+
+    def take_all(self, buckets, now=None):
+        """Take a token from each of `buckets` [(key, rate, burst)], or from none if any is empty.
+
+        Returns each bucket's wait: all 0 if the tokens were taken, else the
+        seconds until each refusing bucket has a token again.
+        """
+        if self._pid != os.getpid():
+            self._open()
+        now = time.time() if now is None else now
+        digests = [int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1 for key, _, _ in buckets]
+        groups = sorted({digest % self.groups for digest in digests})  # Locked in order, so two requests cannot deadlock
+        locks = [self._locks[index] for index in sorted({group % len(self._locks) for group in groups})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            if fcntl:
+                for group in groups:
+                    fcntl.lockf(self._fd, fcntl.LOCK_EX, GROUP * SLOT.size, group * GROUP * SLOT.size)
+            try:
+                starts = [digest % self.groups * GROUP * SLOT.size for digest in digests]
+                offsets = [  # Each bucket's slot, None for a key not in the table yet
+                    next((start + n * SLOT.size for n in range(GROUP) if SLOT.unpack_from(self._map, start + n * SLOT.size)[0] == digest), None)
+                    for digest, start in zip(digests, starts)
+                ]
+                found = []  # (slot offset, tokens) of each bucket
+                for offset, start, (_, rate, burst) in zip(offsets, starts, buckets):
+                    if offset is None:
+                        claimed = set(offsets) | {offset for offset, _ in found}
+                        free = [start + n * SLOT.size for n in range(GROUP) if start + n * SLOT.size not in claimed]
+                        offset = min(free, key=lambda offset: SLOT.unpack_from(self._map, offset)[2])  # A free slot (updated 0) or the stalest bucket
+                        tokens = burst
+                    else:
+                        _, tokens, updated = SLOT.unpack_from(self._map, offset)
+                        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                    found.append((offset, tokens))
+                waits = [0 if tokens >= 1 else (1 - tokens) / rate for (_, tokens), (_, rate, _) in zip(found, buckets)]
+                allowed = not any(waits)
+                for digest, (offset, tokens) in zip(digests, found):
+                    SLOT.pack_into(self._map, offset, digest, tokens - 1 if allowed else tokens, now)
+                return waits
+            finally:
+                if fcntl:
+                    for group in groups:
+                        fcntl.lockf(self._fd, fcntl.LOCK_UN, GROUP * SLOT.size, group * GROUP * SLOT.size)
+        finally:
+            for lock in locks:
+                lock.release()
+
+
+class RateLimiter:
+    """Applies named rules to endpoints; each rule limits every client IP and, optionally, the route as a whole."""
+
+    def __init__(self, app, buckets, enabled=True):
+        self.buckets = buckets
+        self.enabled = enabled
+        self.rules = {}  # name -> (per-IP rate or None, route-wide rate or None)
+        self.endpoints = {}  # endpoint -> [(rule name, methods)]
+        self.counts = {}  # (rule, 'allowed'|'rejected_ip'|'rejected_route') -> requests seen by this worker
+        app.before_request(self._before)
+
+    def rule(self, name, per_ip, per_route=None, endpoints=(), methods=('POST',)):
+        """Limit `endpoints` (for `methods` only) to the `per_ip` and `per_route` rates, given as "N/period" strings."""
+        per_ip, per_route = parse_rate(per_ip), parse_rate(per_route)
+        if not per_ip and not per_route:
+            return
+        self.rules[name] = (per_ip, per_route)
+        for endpoint in endpoints:
+            self.endpoints.setdefault(endpoint, []).append((name, set(methods)))
+
+    def count(self, name, outcome):
+        key = (name, outcome)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def check(self):
+        """Take a token from every bucket covering this request, or from none; return the seconds to wait if one refuses, else 0."""
+        buckets, owners = [], []  # (key, rate, burst) and the (rule, outcome if it refuses) of each
+        for name, methods in self.endpoints.get(request.endpoint, ()):
+            if request.method not in methods:
+                continue
+            per_ip, per_route = self.rules[name]
+            if per_ip:
+                buckets.append((f"{name}:{request.endpoint}:{request.remote_addr}", *per_ip))
+                owners.append((name, 'rejected_ip'))
+            if per_route:
+                buckets.append((f"{name}:{request.endpoint}:tenant={current_tenant()}", *per_route))
+                owners.append((name, 'rejected_route'))
+        if not buckets:
+            return 0
+        waits = self.buckets.take_all(buckets)
+        if not any(waits):
+            for name in dict.fromkeys(name for name, _ in owners):
+                self.count(name, 'allowed')
+            return 0
+        refused = {}  # rule -> its first refusing bucket's outcome
+        for (name, outcome), wait in zip(owners, waits):
+            if wait:
+                refused.setdefault(name, outcome)
+        for name, outcome in refused.items():
+            self.count(name, outcome)
+        return max(waits)  # Every refusing bucket must have a token again
+
+    def _before(self):
+        """Answer 429 before the view runs when a rule covering the request is exhausted."""
+        if not self.enabled or request.endpoint not in self.endpoints:
+            return None
+        wait = self.check()
+        if not wait:
+            return None
+        headers = {'Retry-After': str(math.ceil(wait))}
+        message = "Too many requests. Please slow down and try again shortly."
+        if request.blueprint in ('api', 'bulk', 'batch') or request.accept_mimetypes.best == 'application/json':
+            response = json_response({'error': message}, 429)
+            response.headers.update(headers)
+            return response
+        return render_template('error.html', error_message=message), 429, headers
+
+    def stats(self):
+        """Return [(rule, outcome, requests)] for every rule, zeros included."""
+        return [(name, outcome, self.counts.get((name, outcome), 0)) for name in self.rules for outcome in ('allowed', 'rejected_ip', 'rejected_route')]
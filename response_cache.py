@@ -0,0 +1,136 @@
+"""Full-page response cache with ETag/Last-Modified revalidation."""
+import hashlib  # Builds strong ETags from the table versions
+import os  # Walks the template and static directories for the build fingerprint
+from datetime import datetime, timezone  # Last-Modified timestamps
+from functools import wraps  # Keeps the view's name so url_for() still works
+from flask import request, make_response  # Request headers and response objects
+from compression import compress  # Compressed copies of cached pages
+from cache import scoped_name  # Per-tenant table versions
+
+
+def build_fingerprint(*directories):
+    """Return (hash, newest mtime) of the files in the given directories.
+
+    Included in every ETag so a deploy that changes a template or stylesheet
+    invalidates the copies browsers and CDNs already hold.
+    """
+    digest = hashlib.sha1()
+    newest = 0
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+                newest = max(newest, stat.st_mtime)
+    return digest.hexdigest()[:12], newest
+
+
+class PageCache:
+    """Stores rendered pages keyed by the versions of the tables they show."""
+
+    encoding_suffixes = ('gzip', 'br', 'zstd')  # Compressed variants carry the page ETag plus one of these
+
+    def __init__(self, versions, store, build_id='', build_time=0, default_policy='public, no-cache', policies=None, compression=None, scope=None):
+        self.versions = versions  # Per-table version counters bumped by the mutation routes
+        self.store = store  # Backend holding rendered bytes (LRU, memcached or redis)
+        self.build_id = build_id  # Changes whenever templates or static files change
+        self.build_time = build_time  # Oldest Last-Modified we ever report
+        self.default_policy = default_policy  # Cache-Control for routes without their own policy
+        self.policies = policies or {}  # endpoint -> Cache-Control value
+        self.compression = compression  # If set, compressed copies are cached next to each page
+        self.scope = scope  # Current tenant, or None; pages of different tenants never share an ETag
+        self.hits = 0  # Pages served from the store
+        self.misses = 0  # Pages rendered by the view
+        self.not_modified = 0  # 304 responses sent
+
+    def policy(self, endpoint):
+        """Return the Cache-Control value for an endpoint."""
+        return self.policies.get(endpoint.replace('.', '_'), self.default_policy)  # Blueprint endpoints: api.cv -> api_cv
+
+    def _validators(self, tables):
+        """Return the (ETag, Last-Modified) pair for the current table versions."""
+        names = [scoped_name(self.scope, table) for table in tables]
+        versions = [self.versions.get(name) for name in names]
+        scope = self.scope() if self.scope else None  # Same path and versions on two tenants is still two pages
+        etag = hashlib.sha1(repr((self.build_id, scope, request.full_path, versions)).encode()).hexdigest()
+        modified = max([self.build_time] + [self.versions.modified(name) for name in names])
+        last_modified = datetime.fromtimestamp(int(modified), timezone.utc)  # HTTP dates have one-second resolution
+        return etag, last_modified
+
+    def _is_fresh(self, etag, last_modified):
+        """Check the conditional request headers against the current validators."""
+        if request.if_none_match:  # If-None-Match wins over If-Modified-Since
+            candidates = [etag] + [f"{etag}-{suffix}" for suffix in self.encoding_suffixes]
+            return any(request.if_none_match.contains(candidate) for candidate in candidates)
+        if request.if_modified_since:
+            return last_modified <= request.if_modified_since
+        return False
+
+    def _finish(self, response, etag, last_modified):
+        """Attach the caching headers to a response."""
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = self.policy(request.endpoint)
+        return response
+
+    def _read(self, key):
+        try:
+            return self.store.get(key)
+        except Exception as err:
+            print(f"Error reading page cache: {err}")
+            return None
+
+    def _write(self, key, value):
+        try:
+            self.store.set(key, value)
+        except Exception as err:
+            print(f"Error writing page cache: {err}")
+
+    def _encode(self, response, key, body):
+        """Send the page compressed, compressing it at most once per encoding and table version."""
+        encoding = self.compression.choose(response)
+        if not encoding or len(body) < self.compression.min_size:
+            return
+        encoded = self._read(f"{key}:{encoding}")
+        if encoded is None:
+            encoded = compress(body, encoding)
+            self._write(f"{key}:{encoding}", encoded)
+        self.compression.apply(response, body, encoded, encoding)
+
+    def page(self, *tables):
+        """Decorator caching a GET view whose output depends only on the given tables."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(*args, **kwargs)
+                try:
+                    etag, last_modified = self._validators(tables)
+                except Exception as err:  # A broken version store must not take the site down
+                    print(f"Error reading table versions: {err}")
+                    return view(*args, **kwargs)
+                if self._is_fresh(etag, last_modified):
+                    self.not_modified += 1
+                    return self._finish(make_response('', 304), etag, last_modified)  # No MySQL, no Jinja
+                key = f"page:{etag}"
+                cached = self._read(key)
+                if cached is None:
+                    self.misses += 1
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response  # Never cache error pages or redirects
+                    if response.is_streamed:
+                        return self._finish(response, etag, last_modified)  # Buffering a stream would defeat its purpose
+                    body = response.get_data()
+                    self._write(key, (response.content_type, body))  # JSON pages must come back as JSON
+                else:
+                    self.hits += 1
+                    content_type, body = cached
+                    response = make_response(body)
+                    response.content_type = content_type
+                self._finish(response, etag, last_modified)
+                if self.compression:
+                    self._encode(response, key, body)
+                return response
+            return wrapper
+        return decorator
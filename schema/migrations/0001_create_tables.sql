@@ -0,0 +1,50 @@
+-- The CV tables and the contact inbox.
+-- Years are SMALLINT and project dates DATE, so they sort and compare as numbers
+-- and dates rather than text. A NULL end year/date means "ongoing".
+
+CREATE TABLE IF NOT EXISTS personal_info (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    phone VARCHAR(30) NOT NULL,
+    bio TEXT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS education (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    school VARCHAR(255) NOT NULL,
+    achievement VARCHAR(255) NOT NULL,
+    start_year SMALLINT UNSIGNED NOT NULL,
+    end_year SMALLINT UNSIGNED NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS work_experience (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    company VARCHAR(255) NOT NULL,
+    position VARCHAR(255) NOT NULL,
+    start_year SMALLINT UNSIGNED NOT NULL,
+    end_year SMALLINT UNSIGNED NULL,
+    description TEXT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS skills (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    skill_name VARCHAR(100) NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    proficiency_level VARCHAR(50) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS projects (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    project_name VARCHAR(255) NOT NULL,
+    description TEXT NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS contact (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    message TEXT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,36 @@
+-- Databases built by hand before these migrations existed already had the tables, so
+-- 0001's CREATE TABLE IF NOT EXISTS left their columns as they were (often TEXT).
+-- Convert them to the types 0001 gives a new database, before 0003 indexes them:
+-- MySQL cannot index a TEXT column without a prefix length. On a database created
+-- by 0001 this changes nothing.
+-- Blank end years/dates, which the old forms stored as '', become NULL ("ongoing")
+-- first, since '' is not a valid number or date. The column is made nullable text
+-- for that step, as strict mode refuses NULL in a NOT NULL column.
+
+ALTER TABLE personal_info MODIFY name VARCHAR(100) NOT NULL;
+
+ALTER TABLE education MODIFY end_year VARCHAR(20) NULL;
+UPDATE education SET end_year = NULL WHERE TRIM(end_year) = '';
+ALTER TABLE education
+    MODIFY school VARCHAR(255) NOT NULL,
+    MODIFY start_year SMALLINT UNSIGNED NOT NULL,
+    MODIFY end_year SMALLINT UNSIGNED NULL;
+
+ALTER TABLE work_experience MODIFY end_year VARCHAR(20) NULL;
+UPDATE work_experience SET end_year = NULL WHERE TRIM(end_year) = '';
+ALTER TABLE work_experience
+    MODIFY company VARCHAR(255) NOT NULL,
+    MODIFY start_year SMALLINT UNSIGNED NOT NULL,
+    MODIFY end_year SMALLINT UNSIGNED NULL;
+
+ALTER TABLE skills
+    MODIFY skill_name VARCHAR(100) NOT NULL,
+    MODIFY category VARCHAR(100) NOT NULL,
+    MODIFY proficiency_level VARCHAR(50) NOT NULL;
+
+ALTER TABLE projects MODIFY end_date VARCHAR(20) NULL;
+UPDATE projects SET end_date = NULL WHERE TRIM(end_date) = '';
+ALTER TABLE projects
+    MODIFY project_name VARCHAR(255) NOT NULL,
+    MODIFY start_date DATE NOT NULL,
+    MODIFY end_date DATE NULL;
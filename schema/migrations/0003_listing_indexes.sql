@@ -0,0 +1,21 @@
+-- Secondary indexes backing the keyset-paginated listing queries in app.py.
+-- Each sortable/filterable column is indexed together with `id` so that
+-- "ORDER BY <col>, id LIMIT n" and "(<col>, id) > (?, ?)" seeks read only one page of rows.
+
+CREATE INDEX idx_personal_info_name ON personal_info (name, id);
+
+CREATE INDEX idx_education_start_year ON education (start_year, id);
+CREATE INDEX idx_education_end_year ON education (end_year, id);
+CREATE INDEX idx_education_school ON education (school, id);
+
+CREATE INDEX idx_work_experience_start_year ON work_experience (start_year, id);
+CREATE INDEX idx_work_experience_end_year ON work_experience (end_year, id);
+CREATE INDEX idx_work_experience_company ON work_experience (company, id);
+
+CREATE INDEX idx_skills_category ON skills (category, id);
+CREATE INDEX idx_skills_skill_name ON skills (skill_name, id);
+CREATE INDEX idx_skills_proficiency_level ON skills (proficiency_level, id);
+
+CREATE INDEX idx_projects_start_date ON projects (start_date, id);
+CREATE INDEX idx_projects_end_date ON projects (end_date, id);
+CREATE INDEX idx_projects_project_name ON projects (project_name, id);
@@ -0,0 +1,63 @@
+-- Multi-tenant hosting: every CV row belongs to a tenant (see tenants.py).
+-- Existing rows become tenant 1, the CV served when TENANT_MODE is off.
+-- Each table is clustered on (tenant_id, id), so one tenant's rows sit together
+-- and a page read touches only that tenant's part of the table however many
+-- tenants there are. `id` stays unique across tenants, so AUTO_INCREMENT and
+-- the /edit-<item>/<id> URLs keep working. The listing indexes gain tenant_id
+-- as their first column for the same reason.
+
+CREATE TABLE IF NOT EXISTS tenants (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    slug VARCHAR(63) NOT NULL,
+    name VARCHAR(255) NOT NULL DEFAULT '',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_tenants_slug (slug)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO tenants (id, slug, name) VALUES (1, 'default', '');
+
+ALTER TABLE personal_info
+    ADD COLUMN tenant_id INT UNSIGNED NOT NULL DEFAULT 1 AFTER id,
+    DROP PRIMARY KEY, ADD PRIMARY KEY (tenant_id, id), ADD UNIQUE KEY uq_personal_info_id (id),
+    DROP INDEX idx_personal_info_name, ADD INDEX idx_personal_info_tenant_name (tenant_id, name, id);
+
+ALTER TABLE education
+    ADD COLUMN tenant_id INT UNSIGNED NOT NULL DEFAULT 1 AFTER id,
+    DROP PRIMARY KEY, ADD PRIMARY KEY (tenant_id, id), ADD UNIQUE KEY uq_education_id (id),
+    DROP INDEX idx_education_start_year, ADD INDEX idx_education_tenant_start_year (tenant_id, start_year, id),
+    DROP INDEX idx_education_end_year, ADD INDEX idx_education_tenant_end_year (tenant_id, end_year, id),
+    DROP INDEX idx_education_school, ADD INDEX idx_education_tenant_school (tenant_id, school, id);
+
+ALTER TABLE work_experience
+    ADD COLUMN tenant_id INT UNSIGNED NOT NULL DEFAULT 1 AFTER id,
+    DROP PRIMARY KEY, ADD PRIMARY KEY (tenant_id, id), ADD UNIQUE KEY uq_work_experience_id (id),
+    DROP INDEX idx_work_experience_start_year, ADD INDEX idx_work_experience_tenant_start_year (tenant_id, start_year, id),
+    DROP INDEX idx_work_experience_end_year, ADD INDEX idx_work_experience_tenant_end_year (tenant_id, end_year, id),
+    DROP INDEX idx_work_experience_company, ADD INDEX idx_work_experience_tenant_company (tenant_id, company, id);
+
+ALTER TABLE skills
+    ADD COLUMN tenant_id INT UNSIGNED NOT NULL DEFAULT 1 AFTER id,
+    DROP PRIMARY KEY, ADD PRIMARY KEY (tenant_id, id), ADD UNIQUE KEY uq_skills_id (id),
+    DROP INDEX idx_skills_category, ADD INDEX idx_skills_tenant_category (tenant_id, category, id),
+    DROP INDEX idx_skills_skill_name, ADD INDEX idx_skills_tenant_skill_name (tenant_id, skill_name, id),
+    DROP INDEX idx_skills_proficiency_level, ADD INDEX idx_skills_tenant_proficiency_level (tenant_id, proficiency_level, id);
+
+ALTER TABLE projects
+    ADD COLUMN tenant_id INT UNSIGNED NOT NULL DEFAULT 1 AFTER id,
+    DROP PRIMARY KEY, ADD PRIMARY KEY (tenant_id, id), ADD UNIQUE KEY uq_projects_id (id),
+    DROP INDEX idx_projects_start_date, ADD INDEX idx_projects_tenant_start_date (tenant_id, start_date, id),
+    DROP INDEX idx_projects_end_date, ADD INDEX idx_projects_tenant_end_date (tenant_id, end_date, id),
+    DROP INDEX idx_projects_project_name, ADD INDEX idx_projects_tenant_project_name (tenant_id, project_name, id);
+
+-- The inbox is only appended to; the index serves reading one tenant's messages
+ALTER TABLE contact
+    ADD COLUMN tenant_id INT UNSIGNED NOT NULL DEFAULT 1 AFTER id,
+    ADD INDEX idx_contact_tenant (tenant_id, id);
+
+-- From here on the app names the tenant of every row it writes; a forgotten one is an error, not tenant 1
+ALTER TABLE personal_info ALTER COLUMN tenant_id DROP DEFAULT;
+ALTER TABLE education ALTER COLUMN tenant_id DROP DEFAULT;
+ALTER TABLE work_experience ALTER COLUMN tenant_id DROP DEFAULT;
+ALTER TABLE skills ALTER COLUMN tenant_id DROP DEFAULT;
+ALTER TABLE projects ALTER COLUMN tenant_id DROP DEFAULT;
+ALTER TABLE contact ALTER COLUMN tenant_id DROP DEFAULT;
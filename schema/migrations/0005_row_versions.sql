@@ -0,0 +1,10 @@
+-- Optimistic concurrency for POST /api/batch (see batch.py): every CV row carries a
+-- version, starting at 1 and incremented by each UPDATE from the forms or a batch.
+-- A batch names the version it last read, and its write only matches the row if
+-- nobody changed it since. The contact inbox is never edited, so it has none.
+
+ALTER TABLE personal_info ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
+ALTER TABLE education ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
+ALTER TABLE work_experience ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
+ALTER TABLE skills ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
+ALTER TABLE projects ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
@@ -0,0 +1,293 @@
+"""In-memory full-text search over the CV sections: an inverted index with prefix matching and BM25 ranking.
+
+Each worker holds an index per tenant, built from MySQL on first use (the
+default tenant's at startup) and then kept current by the add/edit/delete
+routes, which pass every change to SearchIndex.apply() (a batch passes
+each table's changes to apply_many() at once). Changes made
+elsewhere (other workers, bulk imports) bump the query cache's table
+versions; the index compares them at most every `check_interval` seconds
+and reloads a table whose version moved without it. Queries never touch MySQL.
+
+Every tenant's index has its own lock, and rows are read from MySQL without
+holding it: only swapping them into the index does. A tenant's first search
+waits for its index to be built; later searches use the current index while
+one of them reloads a table, and other tenants are never held up.
+"""
+import heapq  # Top results without sorting every match
+import math  # BM25 idf
+import re  # Tokenizer
+import threading  # Guards the index
+import time  # Version check interval
+from bisect import bisect_left, insort  # Sorted term list for prefix matching
+from collections import Counter, OrderedDict, defaultdict  # Term frequencies, tenant LRU, scores
+import mysql.connector  # Load errors
+from flask import Blueprint, render_template, request  # /search and /api/search
+from api import json_response  # JSON responses shaped like the rest of the API
+from db import db_connection  # Pooled connections for (re)loading tables
+from tenants import current_tenant  # One index per tenant
+
+K1 = 1.2  # BM25 term frequency saturation
+B = 0.75  # BM25 length normalisation
+PREFIX_WEIGHT = 0.8  # A term matched only by prefix counts for less than the exact word
+MAX_EXPANSIONS = 50  # Terms one query word may expand to
+
+_token = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lowercase words of a text; digits and non-ASCII letters count as word characters."""
+    return _token.findall(str(text).lower()) if text is not None else []
+
+
+class SearchUnavailable(Exception):
+    """Raised when a table could not be loaded into the index."""
+
+
+class Corpus:
+    """The inverted index of one tenant: documents are rows, keyed by (table, id)."""
+
+    def __init__(self):
+        self.postings = {}  # term -> {doc: term frequency}
+        self.terms = []  # Every term, sorted, for prefix lookups
+        self.lengths = {}  # doc -> number of tokens
+        self.docs = {}  # doc -> {column: value} of the indexed columns
+        self.total_length = 0  # Sum of lengths, for the average document length
+
+    def add(self, doc, fields):
+        """Index a row, replacing any earlier version of it."""
+        self.remove(doc)
+        tokens = [token for value in fields.values() for token in tokenize(value)]
+        for term, frequency in Counter(tokens).items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                insort(self.terms, term)
+            postings[doc] = frequency
+        self.docs[doc] = fields
+        self.lengths[doc] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc):
+        fields = self.docs.pop(doc, None)
+        if fields is None:
+            return
+        for term in {token for value in fields.values() for token in tokenize(value)}:
+            postings = self.postings[term]
+            del postings[doc]
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+        self.total_length -= self.lengths.pop(doc)
+
+    def remove_table(self, table):
+        for doc in [doc for doc in self.docs if doc[0] == table]:
+            self.remove(doc)
+
+    def expand(self, word):
+        """Yield the indexed terms starting with `word`, the word itself first."""
+        index = bisect_left(self.terms, word)
+        for term in self.terms[index:index + MAX_EXPANSIONS]:
+            if not term.startswith(word):
+                break
+            yield term
+
+    def search(self, query, limit=20, tables=None):
+        """Return [(doc, score)] for the best matches; every query word may match as a prefix."""
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average = self.total_length / count or 1
+        scores = defaultdict(float)
+        for word in set(tokenize(query)):
+            best = {}  # doc -> score of its best term for this word, so "java" is not counted again for "javascript"
+            for term in self.expand(word):
+                postings = self.postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * (1.0 if term == word else PREFIX_WEIGHT)
+                for doc, frequency in postings.items():
+                    if tables and doc[0] not in tables:
+                        continue
+                    norm = K1 * (1 - B + B * self.lengths[doc] / average)
+                    score = weight * frequency * (K1 + 1) / (frequency + norm)
+                    if score > best.get(doc, 0):
+                        best[doc] = score
+            for doc, score in best.items():
+                scores[doc] += score
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class SearchIndex:
+    """Per-tenant Corpus objects kept in step with the database.
+
+    `fields` maps each table to the columns searched; `version(table)` returns
+    the current tenant's version of a table (the query cache's counters).
+    """
+
+    def __init__(self, fields, version, check_interval=1.0, max_tenants=1000):
+        self.fields = fields
+        self.version = version
+        self.check_interval = check_interval  # Seconds between version checks of a tenant's tables
+        self.max_tenants = max_tenants  # Tenant indexes kept per worker, least recently searched dropped first
+        self.selects = {  # Built once so prepared statements are reused
+            table: f"SELECT id, {', '.join(columns)} FROM {table} WHERE tenant_id = %s" for table, columns in fields.items()
+        }
+        self.queries = 0  # Searches answered
+        self.reloads = 0  # Tables (re)loaded from the database
+        # tenant id -> {'corpus' (None until built), 'versions', 'checked',
+        #              'lock' (guards corpus and versions), 'loading' (one (re)load at a time)}
+        self._tenants = OrderedDict()
+        self._lock = threading.Lock()  # Guards _tenants and the counters, never held while loading
+
+    def _fetch(self, table):
+        """Read the current tenant's rows of a table; return (version, rows). Called without any lock held."""
+        version = self.version(table)  # Read first: a write during the load is picked up by the next check
+        try:
+            with db_connection(reads=(table,)) as mydb:  # Borrow a pooled connection, a replica if allowed
+                if not mydb:
+                    raise SearchUnavailable()
+                rows = mydb.prepared(self.selects[table]).execute((current_tenant(),)).fetchall()
+        except mysql.connector.Error as err:
+            print(f"Error loading {table} into the search index: {err}")  # Log any database errors
+            raise SearchUnavailable() from err
+        with self._lock:
+            self.reloads += 1
+        return version, rows
+
+    def _fill(self, corpus, table, rows):
+        """Replace a table's documents with `rows`."""
+        corpus.remove_table(table)
+        for row in rows:
+            corpus.add((table, row[0]), dict(zip(self.fields[table], row[1:])))
+
+    def _entry(self):
+        """Return the current tenant's index, building or refreshing it as needed."""
+        tenant = current_tenant()
+        with self._lock:
+            entry = self._tenants.get(tenant)
+            if entry is None:
+                entry = self._tenants[tenant] = {'corpus': None, 'versions': {}, 'checked': 0, 'lock': threading.Lock(), 'loading': threading.Lock()}
+                while len(self._tenants) > self.max_tenants:
+                    self._tenants.popitem(last=False)
+            else:
+                self._tenants.move_to_end(tenant)
+        if entry['corpus'] is None:
+            with entry['loading']:  # This tenant's other first searches wait for the same build
+                if entry['corpus'] is None:
+                    corpus, versions = Corpus(), {}
+                    for table in self.fields:
+                        versions[table], rows = self._fetch(table)
+                        self._fill(corpus, table, rows)  # Not shared yet: no lock needed
+                    with entry['lock']:
+                        entry['corpus'], entry['versions'], entry['checked'] = corpus, versions, time.monotonic()
+        elif time.monotonic() - entry['checked'] >= self.check_interval and entry['loading'].acquire(blocking=False):
+            try:  # Searches meanwhile use the index as it is
+                for table in self.fields:
+                    if self.version(table) != entry['versions'][table]:
+                        version, rows = self._fetch(table)
+                        with entry['lock']:
+                            self._fill(entry['corpus'], table, rows)
+                            entry['versions'][table] = version
+                entry['checked'] = time.monotonic()
+            finally:
+                entry['loading'].release()
+        return entry
+
+    def warm(self):
+        """Build the current tenant's index now rather than on the first search."""
+        try:
+            self._entry()
+        except SearchUnavailable:
+            pass  # Built on the first search instead
+
+    def apply(self, table, action, row_id, row):
+        """Record one add/update/delete made by this worker; `row` maps columns to values (None for deletes)."""
+        self.apply_many(table, [(action, row_id, row)])
+
+    def apply_many(self, table, changes):
+        """Record the [(action, id, row)] changes one commit of this worker made to a table, moving its version by one."""
+        if table not in self.fields:
+            return
+        with self._lock:
+            entry = self._tenants.get(current_tenant())
+        if entry is None:
+            return  # Built from the database when first searched
+        with entry['lock']:
+            if entry['corpus'] is None:
+                return  # Being built, from rows that include this change or followed by a version check
+            version = self.version(table)
+            if version != entry['versions'][table] + 1:
+                entry['checked'] = 0  # Someone else wrote too: reload the table on the next search
+                return
+            for action, row_id, row in changes:
+                if action == 'delete':
+                    entry['corpus'].remove((table, row_id))
+                else:
+                    entry['corpus'].add((table, row_id), {column: row.get(column) for column in self.fields[table]})
+            entry['versions'][table] = version
+
+    def search(self, query, limit=20, tables=None):
+        """Return the best matches as dicts with section, id, score and the matched columns."""
+        entry = self._entry()
+        with self._lock:
+            self.queries += 1
+        with entry['lock']:
+            corpus = entry['corpus']
+            matches = corpus.search(query, limit, tables)
+            return [
+                {'section': table, 'id': row_id, 'score': round(score, 4), 'fields': corpus.docs[(table, row_id)]}
+                for (table, row_id), score in matches
+            ]
+
+    def stats(self):
+        with self._lock:
+            corpora = [entry['corpus'] for entry in self._tenants.values() if entry['corpus'] is not None]
+            return {
+                'tenants': len(self._tenants),
+                'documents': sum(len(corpus.docs) for corpus in corpora),
+                'terms': sum(len(corpus.terms) for corpus in corpora),
+                'queries': self.queries,
+                'reloads': self.reloads,
+            }
+
+
+def create_search(index, sections, max_results=100):
+    """Build the blueprint serving /search (HTML) and /api/search (JSON)."""
+    search = Blueprint('search', __name__)
+    tables = {table: name for name, table in sections.items()}  # table -> URL segment
+
+    def run():
+        """Parse ?q=, ?section= and ?limit=; return (query, results) or raise ValueError."""
+        query = request.args.get('q', '').strip()
+        names = [name.strip() for name in request.args.get('section', '').split(',') if name.strip()]
+        if any(name not in sections for name in names):
+            raise ValueError(f"Unknown section; choose from {', '.join(sections)}")
+        limit = max(1, min(request.args.get('limit', 20, type=int), max_results))
+        if not query:
+            return query, []
+        return query, index.search(query, limit, {sections[name] for name in names} or None)
+
+    @search.route('/search')
+    def search_page():
+        """Search every CV section."""
+        try:
+            query, results = run()
+        except ValueError as err:
+            return render_template('error.html', error_message=str(err)), 400
+        except SearchUnavailable:
+            return render_template('error.html', error_message="Search is unavailable right now."), 503
+        return render_template('search.html', query=query, results=results, sections=tables)
+
+    @search.route('/api/search')
+    def search_api():
+        """Search every CV section; results carry the section, row id, score and matched columns."""
+        try:
+            query, results = run()
+        except ValueError as err:
+            return json_response({'error': str(err)}, 400)
+        except SearchUnavailable:
+            return json_response({'error': "Search is unavailable right now."}, 503)
+        for result in results:
+            result['section'] = tables[result['section']]
+        return json_response({'query': query, 'results': results})
+
+    return search
@@ -0,0 +1,179 @@
+"""Static-site export: the public pages pre-rendered to HTML files that nginx serves without the app.
+
+`flask export-static` builds the fingerprinted assets, copies them to
+<output>/static/ and renders every exported page to <output>/<path>.html
+(/ becomes index.html). With incremental rebuilds on, a mutation that
+invalidates a table re-renders, in a background thread, just the pages
+showing that table; a page whose HTML did not change is left untouched so
+its mtime, and nginx's ETag, stay the same.
+
+Only the first page of each listing is exported: anything with a query
+string, every other method and every other path still goes to the app.
+
+    location / {
+        root /srv/cv/export;
+        error_page 418 = @app;
+        if ($request_method !~ ^(GET|HEAD)$) { return 418; }
+        if ($args) { return 418; }
+        gzip_static on;
+        try_files $uri.html $uri/index.html @app;
+    }
+    location /static/dist/ {
+        root /srv/cv/export;
+        gzip_static on;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+    location @app { proxy_pass http://cv_app; }
+"""
+import atexit  # Finish pending rebuilds when the process exits
+import gzip  # .gz siblings for nginx's gzip_static
+import os  # Output paths
+import shutil  # Copies the built assets
+import threading  # Background rebuild thread
+import time  # Debounce before rebuilding
+import click  # `flask export-static`
+from flask import Blueprint  # CLI command
+from assets import SUFFIXES, build, write_atomic  # Fingerprinted assets and atomic writes
+from compression import brotli  # Optional .br siblings
+
+
+class StaticExport:
+    """Renders `pages` (path -> tables it shows) into `output_dir` and keeps them current.
+
+    `prefix` is put in front of every path, e.g. "/default" when tenants are
+    addressed by path; `base_url` sets the Host the pages are rendered for.
+    """
+
+    def __init__(self, app, assets, output_dir, pages, prefix='', base_url='http://localhost', debounce=0.5):
+        self.app = app
+        self.assets = assets  # The app's Assets, whose manifest links the hashed files
+        self.output_dir = output_dir  # Directory nginx serves
+        self.pages = pages  # URL path -> tables whose rows it shows
+        self.prefix = prefix
+        self.base_url = base_url
+        self.debounce = debounce  # Seconds to wait so a burst of edits causes one rebuild
+        self.written = 0  # Page files written
+        self.unchanged = 0  # Pages re-rendered to the same HTML
+        self.errors = 0  # Pages that could not be rendered
+        self._pending = set()  # Paths waiting to be rebuilt
+        self._pid = None  # Process that started the rebuild thread
+        self._stopping = False
+        self._cond = threading.Condition()  # Guards _pending and wakes the thread
+
+    def path_for(self, path):
+        """Return the file a page is written to."""
+        name = path.strip('/') or 'index'
+        return os.path.join(self.output_dir, self.prefix.strip('/'), name + '.html')
+
+    def render(self, path):
+        """Render one page through the app and write it if it changed; return whether it was written."""
+        response = self.app.test_client().get(self.prefix + path, base_url=self.base_url)
+        if response.status_code != 200:
+            print(f"Error exporting {path}: status {response.status_code}")  # Keep the previous file
+            self.errors += 1
+            return False
+        body = response.get_data()
+        target = self.path_for(path)
+        try:
+            with open(target, 'rb') as f:
+                if f.read() == body:
+                    self.unchanged += 1
+                    return False
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        variants = {'gzip': lambda: gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli:
+            variants['br'] = lambda: brotli.compress(body, quality=11)
+        for encoding, compress in variants.items():
+            write_atomic(target + SUFFIXES[encoding], compress())  # Before the page, so they are never older than it
+        write_atomic(target, body)
+        self.written += 1
+        return True
+
+    def copy_assets(self):
+        """Build the assets and copy the hashed files (and their variants) that are not exported yet."""
+        build(self.app.static_folder)
+        self.assets.reload()  # Pages rendered from now on link the new build
+        copied = 0
+        for entry in self.assets.manifest.values():
+            for suffix in [''] + [SUFFIXES[encoding] for encoding in entry['encodings']]:
+                source = os.path.join(self.app.static_folder, entry['path'] + suffix)
+                target = os.path.join(self.output_dir, 'static', entry['path'] + suffix)
+                if not os.path.exists(target):  # Hashed names never change content
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copyfile(source, target)
+                    copied += 1
+        return copied
+
+    def export(self):
+        """Export the assets and every page; return (assets copied, pages written)."""
+        copied = self.copy_assets()
+        written = sum(self.render(path) for path in self.pages)
+        return copied, written
+
+    def changed(self, table):
+        """Queue a rebuild of the pages showing `table`; meant as a query cache invalidation listener."""
+        paths = {path for path, tables in self.pages.items() if table in tables}
+        if not paths:
+            return
+        self._start()
+        with self._cond:
+            self._pending |= paths
+            self._cond.notify()
+
+    def _start(self):
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()  # A forked worker starts its own thread
+            self._pending = set()
+            self._thread = threading.Thread(target=self._run, name='static-export', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            if not self._stopping:
+                time.sleep(self.debounce)  # Let the rest of a burst of edits arrive
+            with self._cond:
+                paths, self._pending = self._pending, set()
+            for path in sorted(paths):
+                try:
+                    self.render(path)
+                except Exception as err:  # Keep the thread alive for the next change
+                    print(f"Error exporting {path}: {err}")
+                    self.errors += 1
+
+    def close(self, timeout=10):
+        """Render whatever is still pending, then stop the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {'written': self.written, 'unchanged': self.unchanged, 'errors': self.errors}
+
+
+def create_static_export(static_export):
+    """Build the blueprint providing `flask export-static`."""
+    bp = Blueprint('static_export', __name__, cli_group=None)  # A top-level command, not a group
+
+    @bp.cli.command('export-static')
+    @click.option('--output', type=click.Path(file_okay=False), help="Directory to write to; defaults to STATIC_EXPORT_DIR.")
+    def export_static_command(output):
+        """Render the public pages and fingerprinted assets to static files for nginx."""
+        if output:
+            static_export.output_dir = output
+        copied, written = static_export.export()
+        if static_export.errors:
+            raise click.ClickException(f"{static_export.errors} pages could not be rendered; their previous files were kept.")
+        click.echo(f"Exported {len(static_export.pages)} pages to {static_export.output_dir} ({written} written, {copied} assets copied)")
+
+    return bp
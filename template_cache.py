@@ -0,0 +1,27 @@
+"""Compiled-template caching: Jinja bytecode on disk and a warm-up at worker boot."""
+import os  # Cache directory creation
+from jinja2 import FileSystemBytecodeCache  # Stores compiled template code between processes
+
+
+def configure_templates(app, cache_dir):
+    """Store compiled templates under `cache_dir` so a new worker loads them instead of compiling.
+
+    Each cache file is keyed by template name and checked against a checksum of
+    the source, so an edited template is recompiled rather than served stale.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir, pattern='cv-%s.cache')
+
+
+def warm_templates(app):
+    """Compile every template into the environment's in-memory cache; return how many were loaded.
+
+    Run at worker boot so the first request renders an already-compiled template.
+    """
+    names = app.jinja_env.list_templates(extensions=('html',))
+    for name in names:
+        try:
+            app.jinja_env.get_template(name)  # Loads from the bytecode cache, or compiles and stores it
+        except Exception as err:  # A broken template should fail its own route, not the worker
+            print(f"Error compiling template {name}: {err}")
+    return len(names)
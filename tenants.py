@@ -0,0 +1,164 @@
+"""Multi-tenant hosting: which CV a request is for, resolved by subdomain or path prefix.
+
+The current tenant lives in a context variable set by TenantMiddleware before
+Flask routes the request. The SQL builders (pagination, crud, api, bulk) and
+the caches read it, so handlers never pass a tenant around and cannot forget
+to scope a query.
+"""
+import contextvars  # Current tenant of the request being served
+import re  # Slug validation
+import threading  # Guards the slug cache
+import time  # Expiry of cached slug lookups
+from collections import OrderedDict  # LRU of slug lookups
+import click  # `flask tenants ...`
+import mysql.connector  # Lookup errors
+from flask import Blueprint  # CLI group
+from werkzeug.exceptions import NotFound, ServiceUnavailable  # Responses for unknown tenants and lookup failures
+
+DEFAULT_TENANT_ID = 1  # The CV served without TENANT_MODE; rows from before multi-tenancy belong to it
+SHARED_PATHS = ('static', 'metrics')  # First path segments served without a tenant
+
+_current = contextvars.ContextVar('tenant_id', default=DEFAULT_TENANT_ID)
+_slug = re.compile(r'^[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?$')  # One DNS label
+
+
+def current_tenant():
+    """Return the id of the tenant the current request is for."""
+    return _current.get()
+
+
+def set_tenant(tenant_id):
+    """Make `tenant_id` the current tenant of this thread/greenlet (every request sets it)."""
+    _current.set(tenant_id)
+
+
+def valid_slug(slug):
+    return bool(_slug.match(slug or ''))
+
+
+class TenantDirectory:
+    """Maps tenant slugs to ids, remembering lookups (and misses) so most requests skip the database."""
+
+    def __init__(self, lookup, ttl=60, negative_ttl=5, maxsize=100000):
+        self.lookup = lookup  # slug -> id or None, reads the tenants table
+        self.ttl = ttl  # Seconds a found slug is remembered
+        self.negative_ttl = negative_ttl  # Seconds an unknown slug is remembered, so random subdomains cannot flood MySQL
+        self.maxsize = maxsize  # Slugs remembered per worker
+        self._cache = OrderedDict()  # slug -> (expires_at, id or None)
+        self._lock = threading.Lock()
+
+    def resolve(self, slug):
+        """Return the tenant id for a slug, or None if there is no such tenant."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(slug)
+            if entry and entry[0] > now:
+                self._cache.move_to_end(slug)
+                return entry[1]
+        tenant_id = self.lookup(slug) if valid_slug(slug) else None
+        with self._lock:
+            self._cache[slug] = (now + (self.ttl if tenant_id else self.negative_ttl), tenant_id)
+            self._cache.move_to_end(slug)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return tenant_id
+
+    def forget(self, slug):
+        with self._lock:
+            self._cache.pop(slug, None)
+
+
+class TenantMiddleware:
+    """WSGI middleware setting the current tenant from the Host header or the first path segment.
+
+    mode "subdomain": <slug>.<base_domain> is that tenant; the base domain itself
+    (or www.) is the default tenant. mode "path": /<slug>/skills is routed as
+    /skills with SCRIPT_NAME /<slug>, so url_for() keeps links inside the tenant.
+    mode "off": every request is the default tenant.
+    """
+
+    def __init__(self, wsgi_app, directory, mode='off', base_domain=''):
+        self.wsgi_app = wsgi_app
+        self.directory = directory
+        self.mode = mode
+        self.base_domain = base_domain.lower().lstrip('.')
+
+    def slug(self, environ):
+        """Return the slug named by the request, '' for the default tenant, or None for no tenant at all."""
+        if self.mode == 'subdomain':
+            host = environ.get('HTTP_HOST', '').split(':', 1)[0].lower()
+            if host in (self.base_domain, 'www.' + self.base_domain):
+                return ''
+            if host.endswith('.' + self.base_domain):
+                return host[:-len(self.base_domain) - 1]
+            return None
+        segment = environ.get('PATH_INFO', '').lstrip('/').split('/', 1)[0]
+        if not segment:
+            return None
+        environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + '/' + segment  # Route the rest of the path as usual
+        environ['PATH_INFO'] = environ['PATH_INFO'][len(segment) + 1:] or '/'
+        return segment
+
+    def __call__(self, environ, start_response):
+        if self.mode == 'off':
+            set_tenant(DEFAULT_TENANT_ID)
+            return self.wsgi_app(environ, start_response)
+        first = environ.get('PATH_INFO', '').lstrip('/').split('/', 1)[0]
+        if first in SHARED_PATHS:
+            set_tenant(DEFAULT_TENANT_ID)  # Static files and metrics are the same for everyone
+            return self.wsgi_app(environ, start_response)
+        slug = self.slug(environ)
+        if slug == '':
+            tenant_id = DEFAULT_TENANT_ID
+        elif slug is None:
+            return NotFound()(environ, start_response)
+        else:
+            try:
+                tenant_id = self.directory.resolve(slug)
+            except mysql.connector.Error as err:
+                print(f"Error resolving tenant {slug}: {err}")  # Log lookup failures
+                return ServiceUnavailable()(environ, start_response)
+            if tenant_id is None:
+                return NotFound()(environ, start_response)
+        set_tenant(tenant_id)
+        return self.wsgi_app(environ, start_response)
+
+
+def create_tenants(directory, db_connection):
+    """Build the blueprint providing the `flask tenants` commands."""
+    tenants = Blueprint('tenants', __name__, cli_group='tenants')
+
+    @tenants.cli.command('create')
+    @click.argument('slug')
+    @click.option('--name', default='', help="Display name.")
+    def create_command(slug, name):
+        """Add a tenant served at SLUG.<base domain> or /SLUG/."""
+        if not valid_slug(slug) or slug in SHARED_PATHS:
+            raise click.BadParameter("use lowercase letters, digits and hyphens (not 'static' or 'metrics')", param_hint='SLUG')
+        with db_connection() as mydb:
+            if not mydb:
+                raise click.ClickException("Database connection failed.")
+            cursor = mydb.cursor()
+            try:
+                cursor.execute("INSERT INTO tenants (slug, name) VALUES (%s, %s)", (slug, name))
+            except mysql.connector.IntegrityError:
+                raise click.ClickException(f"Tenant {slug} already exists")
+            mydb.commit()
+            tenant_id = cursor.lastrowid
+            cursor.close()
+        directory.forget(slug)  # Drop a cached "no such tenant"
+        click.echo(f"Created tenant {slug} with id {tenant_id}")
+
+    @tenants.cli.command('list')
+    def list_command():
+        """List tenants."""
+        with db_connection() as mydb:
+            if not mydb:
+                raise click.ClickException("Database connection failed.")
+            cursor = mydb.cursor()
+            cursor.execute("SELECT id, slug, name FROM tenants ORDER BY id")
+            for tenant_id, slug, name in cursor.fetchall():
+                click.echo(f"{tenant_id}\t{slug}\t{name}")
+            cursor.close()
+
+    return tenants
@@ -0,0 +1,62 @@
+"""Shared fixtures: the app runs on the SQLite shim from benchmarks/, so no MySQL server is needed."""
+import os  # Import path
+import sys  # Import path
+import pytest  # Fixtures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import sqlite_shim  # noqa: E402  Brings in mysql.connector, which the app imports anyway
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh SQLite database behind mysql.connector.connect()."""
+    path = str(tmp_path / 'cv.db')
+    sqlite_shim.install(path)
+    return path
+
+
+@pytest.fixture
+def connection(db_path):
+    """A shim connection for tests that run queries without the app."""
+    connection = sqlite_shim.Connection(db_path)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def make_app(db_path, tmp_path):
+    """Build apps with create_app(overrides), writing their journals and caches under tmp_path."""
+    import app as app_module
+    from db import close_pool
+    built = []
+
+    def make(**overrides):
+        settings = {
+            'CONTACT_SPILL_DIR': str(tmp_path / 'contact-queue'),
+            'CACHE_VERSIONS_DIR': str(tmp_path / 'versions'),
+            'TEMPLATE_CACHE_DIR': str(tmp_path / 'jinja'),
+            'DOCUMENT_CACHE_DIR': str(tmp_path / 'documents'),
+            'RATE_LIMIT_FILE': str(tmp_path / 'rate-limits'),
+            'RATE_LIMIT_ENABLED': False,
+            'CACHE_WARMUP': False,
+            'SEARCH_WARMUP': False,
+            'TEMPLATE_WARMUP': False,
+            'DOCUMENT_WORKERS': 0,
+        }
+        settings.update(overrides)
+        application = app_module.create_app(settings)
+        built.append(application)
+        return application
+    yield make
+    for application in built:
+        extensions = application.extensions['cv']
+        extensions['contact_queue'].close()
+        extensions['documents'].close()
+    close_pool()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
@@ -0,0 +1,27 @@
+"""The JSON API: /api/cv with ?sections= and ?fields=."""
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/add-skill', data={'skill_name': 'Python', 'category': 'Languages', 'proficiency_level': 'Expert'})
+    return client
+
+
+def test_cv_returns_every_section(client):
+    body = client.get('/api/cv').get_json()
+    assert set(body) == {'personal_info', 'education', 'work_experience', 'skills', 'projects'}
+    assert [skill['skill_name'] for skill in body['skills']] == ['Python']
+
+
+def test_fields_select_columns(client):
+    body = client.get('/api/cv?sections=skills&fields=skills.skill_name, skills.category').get_json()
+    assert body == {'skills': [{'skill_name': 'Python', 'category': 'Languages'}]}
+
+
+@pytest.mark.parametrize('fields', ['skills', 'skills.', '.skill_name', 'skills.nope', 'nope.skill_name', 'skills.skill_name,skills'])
+def test_invalid_fields_are_400(client, fields):
+    response = client.get(f'/api/cv?fields={fields}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
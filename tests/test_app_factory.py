@@ -0,0 +1,52 @@
+"""create_app(): overrides, preload warm-up, no connections left open for forked workers, and lazy imports."""
+import json  # Settings for the subprocess
+import os  # Repository root
+import subprocess  # A fresh interpreter, to see what importing the app loads
+import sys  # The interpreter running the tests
+import db  # The process-wide pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_CHECK = """
+import json, sys
+from benchmarks import sqlite_shim
+sqlite_shim.install(sys.argv[1])
+from app import create_app
+create_app(json.loads(sys.argv[2]))
+print(json.dumps(sorted(m for m in ('multiprocessing', 'concurrent.futures.process') if m in sys.modules)))
+"""
+
+
+def test_overrides_apply_to_one_app_only(make_app):
+    small = make_app(LIST_PAGE_SIZE=1).test_client()
+    default = make_app().test_client()
+    for name in ['Go', 'Rust']:
+        default.post('/add-skill', data={'skill_name': name, 'category': 'Languages', 'proficiency_level': 'Expert'})
+    assert len(small.get('/api/skills').get_json()['items']) == 1
+    assert len(default.get('/api/skills').get_json()['items']) == 2
+
+
+def test_preload_warms_caches_and_closes_the_pool(make_app):
+    app = make_app(CACHE_WARMUP=True, SEARCH_WARMUP=True, TEMPLATE_WARMUP=True)
+    assert db._pool is None  # Each forked worker opens its own connections
+    extensions = app.extensions['cv']
+    query_cache, search_index = extensions['query_cache'], extensions['search_index']
+    misses, reloads = query_cache.misses, search_index.reloads
+    assert misses and reloads
+    client = app.test_client()
+    assert client.get('/skills').status_code == 200
+    assert client.get('/api/search?q=python').status_code == 200
+    assert (query_cache.misses, search_index.reloads) == (misses, reloads)  # Answered from the warm-up
+
+
+def test_heavy_modules_are_imported_lazily(db_path, tmp_path):
+    settings = {
+        'CONTACT_SPILL_DIR': str(tmp_path / 'contact-queue'),
+        'CACHE_VERSIONS_DIR': str(tmp_path / 'versions'),
+        'TEMPLATE_CACHE_DIR': str(tmp_path / 'jinja'),
+        'DOCUMENT_CACHE_DIR': str(tmp_path / 'documents'),
+        'RATE_LIMIT_FILE': str(tmp_path / 'rate-limits'),
+        'CONTACT_QUEUE_START': False,
+    }
+    result = subprocess.run([sys.executable, '-c', IMPORT_CHECK, db_path, json.dumps(settings)], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.splitlines()[-1]) == []
@@ -0,0 +1,58 @@
+"""The asset pipeline: minified, fingerprinted builds and the URLs and headers they are served with."""
+import gzip  # Decodes the precompressed variant
+import pytest
+from flask import Flask, url_for  # A bare app around a temporary static folder
+from assets import IMMUTABLE, Assets, build, minify_css  # Under test
+
+CSS = "/* header */\nbody  {\n  color: red;\n  content: \"a  ;  b\";\n}\n.nav a { margin: 0 ; }\n" * 20
+
+
+@pytest.fixture
+def static(tmp_path):
+    folder = tmp_path / 'static'
+    folder.mkdir()
+    (folder / 'styles.css').write_text(CSS)
+    (folder / 'logo.png').write_bytes(b'\x89PNG not really')
+    return folder
+
+
+def test_minify_css_keeps_strings_and_descendant_selectors():
+    assert minify_css(CSS) == 'body{color:red;content:"a  ;  b"}.nav a{margin:0}' * 20
+    assert minify_css("a :hover { color : red }") == 'a :hover{color :red}'  # A space before ":" can be significant
+
+
+def test_build_fingerprints_and_is_incremental(static):
+    manifest, written = build(str(static))
+    entry = manifest['styles.css']
+    assert entry['path'].startswith('dist/styles.') and entry['path'].endswith('.css')
+    assert 'gzip' in entry['encodings']
+    assert manifest['logo.png']['encodings'] == []  # Not worth compressing
+    built = (static / entry['path']).read_bytes()
+    assert gzip.decompress((static / (entry['path'] + '.gz')).read_bytes()) == built
+    assert len(built) < len(CSS)
+    assert build(str(static)) == (manifest, 0)  # Nothing changed: nothing written
+
+    (static / 'styles.css').write_text(CSS + 'p{margin:0}')
+    changed, _ = build(str(static))
+    assert changed['styles.css']['path'] != entry['path']
+    assert (static / entry['path']).exists()  # Kept for pages that still link it
+
+
+def test_urls_and_headers(static):
+    app = Flask(__name__, static_folder=str(static))
+    build(str(static))
+    assets = Assets(app)
+    hashed = assets.manifest['styles.css']['path']
+    with app.test_request_context():
+        assert url_for('static', filename='styles.css') == f'/static/{hashed}'
+        assert url_for('static', filename='missing.css') == '/static/missing.css'
+    client = app.test_client()
+    response = client.get(f'/static/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    response.close()
+    plain = client.get('/static/styles.css')  # The unhashed name still revalidates
+    assert 'immutable' not in plain.headers.get('Cache-Control', '')
+    plain.close()
@@ -0,0 +1,83 @@
+"""POST /api/batch: all or nothing, with per-operation statuses, and GET /api/versions/<section>."""
+from db import db_connection  # Checks what was written
+
+
+def skill(name):
+    return {'skill_name': name, 'category': 'Languages', 'proficiency_level': 'Expert'}
+
+
+def skills():
+    with db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.execute("SELECT id, skill_name, version FROM skills ORDER BY id")
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def batch(client, *operations):
+    response = client.post('/api/batch', json={'operations': list(operations)})
+    return response.status_code, response.get_json()
+
+
+def test_batch_applies_every_operation(app):
+    client = app.test_client()
+    status, body = batch(client, *({'op': 'create', 'section': 'skills', 'values': skill(name)} for name in ('Go', 'Lua', 'Zig')))
+    assert status == 200
+    created = body['results']
+    assert [result['status'] for result in created] == ['created'] * 3
+    assert [(result['id'], name, 1) for result, name in zip(created, ('Go', 'Lua', 'Zig'))] == skills()
+
+    go, lua, zig = (result['id'] for result in created)
+    status, body = batch(client,
+                         {'op': 'update', 'section': 'skills', 'id': go, 'version': 1, 'values': skill('Golang')},
+                         {'op': 'update', 'section': 'skills', 'id': lua, 'values': skill('LuaJIT')},
+                         {'op': 'delete', 'section': 'skills', 'id': zig, 'version': 1})
+    assert status == 200
+    assert [(result['status'], result.get('version')) for result in body['results']] == [('updated', 2), ('updated', 2), ('deleted', None)]
+    assert skills() == [(go, 'Golang', 2), (lua, 'LuaJIT', 2)]
+
+
+def test_conflict_rolls_back_the_whole_batch(app):
+    client = app.test_client()
+    _, body = batch(client, *({'op': 'create', 'section': 'skills', 'values': skill(name)} for name in ('Go', 'Lua')))
+    go, lua = (result['id'] for result in body['results'])
+    before = skills()
+    status, body = batch(client,
+                         {'op': 'create', 'section': 'skills', 'values': skill('Zig')},
+                         {'op': 'update', 'section': 'skills', 'id': go, 'version': 1, 'values': skill('Golang')},
+                         {'op': 'update', 'section': 'skills', 'id': lua, 'version': 7, 'values': skill('LuaJIT')},
+                         {'op': 'delete', 'section': 'skills', 'id': 999})
+    assert status == 409
+    assert [(result['status'], result['id'], result.get('version')) for result in body['results']] == [
+        ('aborted', None, None), ('aborted', go, None), ('conflict', lua, 1), ('not_found', 999, None)]
+    assert skills() == before
+
+
+def test_batch_keeps_the_search_index_current(app):
+    client = app.test_client()
+    index = app.extensions['cv']['search_index']
+    assert client.get('/api/search?q=go').get_json()['results'] == []  # Builds the index
+    reloads = index.reloads
+    status, body = batch(client, *({'op': 'create', 'section': 'skills', 'values': skill(name)} for name in ('Go', 'Gleam', 'Groovy')))
+    assert status == 200
+    results = client.get('/api/search?q=g').get_json()['results']
+    assert sorted(result['fields']['skill_name'] for result in results) == ['Gleam', 'Go', 'Groovy']
+    assert index.reloads == reloads  # Applied from the batch, not reloaded from the database
+
+
+def test_versions_by_ids_and_pages(app):
+    client = app.test_client()
+    _, body = batch(client, *({'op': 'create', 'section': 'skills', 'values': skill(f"Skill {n}")} for n in range(5)))
+    ids = [result['id'] for result in body['results']]
+    body = client.get(f'/api/versions/skills?ids={ids[1]},{ids[3]},12345').get_json()
+    assert body['versions'] == {str(ids[1]): 1, str(ids[3]): 1} and body['next'] is None
+
+    seen, url = [], '/api/versions/skills?limit=2'
+    while url:
+        body = client.get(url).get_json()
+        seen += [int(row_id) for row_id in body['versions']]
+        url = body['next']
+    assert seen == ids
+    assert client.get('/api/versions/skills?limit=0').status_code == 400
+    assert client.get('/api/versions/skills?ids=1,x').status_code == 400
@@ -0,0 +1,36 @@
+"""Bulk import validation: bad files are refused with a list of errors and nothing is written."""
+import io  # Uploaded files
+
+
+def upload(client, body, filename='skills.csv'):
+    return client.post('/import/skills', data={'file': (io.BytesIO(body.encode()), filename)}, content_type='multipart/form-data')
+
+
+def test_valid_csv_is_imported(app):
+    response = upload(app.test_client(), "skill_name,category,proficiency_level\nPython,Languages,Expert\nSQL,Languages,Advanced\n")
+    assert response.status_code == 200
+    assert response.json['imported'] == 2
+
+
+def test_malformed_csv_is_a_validation_error(app):
+    client = app.test_client()
+    body = "skill_name,category,proficiency_level\nPython,Languages,Expert\n" + 'x' * 200000 + ",Languages,Expert\n"  # Over the csv module's field limit
+    response = upload(client, body)
+    assert response.status_code == 422
+    assert response.json['details'][0].startswith("Row 2: field larger than field limit")
+    assert client.get('/api/skills').json['items'] == []
+
+
+def test_missing_and_invalid_values_are_listed(app):
+    response = upload(app.test_client(), "skill_name,category,proficiency_level\n,Languages,Expert\nSQL,,Advanced\n")
+    assert response.status_code == 422
+    assert response.json['details'] == ["Row 1: missing skill_name", "Row 2: missing category"]
+
+
+def test_out_of_range_years_are_listed(app):
+    client = app.test_client()
+    body = "school,achievement,start_year,end_year\nMIT,BSc,2001,2005\nMIT,MSc,-1,2007\nMIT,PhD,2007,70000\n"
+    response = client.post('/import/education', data={'file': (io.BytesIO(body.encode()), 'education.csv')}, content_type='multipart/form-data')
+    assert response.status_code == 422
+    assert response.json['details'] == ["Row 2: invalid start_year '-1'", "Row 3: invalid end_year '70000'"]
+    assert client.get('/api/education').json['items'] == []
@@ -0,0 +1,57 @@
+"""The read-through cache: listings are served from it until a write to their table invalidates them."""
+from cache import LRUCache, create_cache  # Under test
+from db import db_connection  # Writes behind the app's back
+
+SKILL = {'skill_name': 'Go', 'category': 'Languages', 'proficiency_level': 'Expert'}
+
+
+def insert_skill(name):
+    with db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.execute("INSERT INTO skills (tenant_id, skill_name, category, proficiency_level) VALUES (1, %s, 'Tools', 'Basic')", (name,))
+        mydb.commit()
+        cursor.close()
+
+
+def test_listing_is_cached_until_a_write_to_its_table(app):
+    client = app.test_client()
+    client.get('/skills')
+    insert_skill('Ansible')  # Not through the app, so nothing is invalidated
+    assert b'Ansible' not in client.get('/skills').data
+    assert client.post('/add-skill', data=SKILL).status_code == 302
+    page = client.get('/skills').data
+    assert b'Ansible' in page and b'Go' in page
+
+
+def test_writes_only_expire_their_own_table(app):
+    versions = app.extensions['cv']['query_cache']
+    before = {table: versions.version(table) for table in ('skills', 'projects')}
+    app.test_client().post('/add-skill', data=SKILL)
+    assert versions.version('skills') != before['skills']
+    assert versions.version('projects') == before['projects']
+
+
+def test_versions_are_shared_between_workers(tmp_path):
+    first, second = (create_cache('memory://', versions_dir=str(tmp_path)) for _ in range(2))
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [('row',)]
+    assert second.get_or_load('skills', loader) == [('row',)]
+    assert second.get_or_load('skills', loader) == [('row',)]
+    assert len(loads) == 1
+    first.invalidate('skills')  # Another worker's write
+    second.get_or_load('skills', loader)
+    assert len(loads) == 2
+
+
+def test_lru_expiry_and_eviction():
+    cache = LRUCache(maxsize=2, ttl=0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)  # Evicts b, the least recently used
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    cache.set('d', 4, ttl=-1)  # Already expired
+    assert cache.get('d') is None
@@ -0,0 +1,48 @@
+"""Response compression: negotiation, the size threshold, and cached pages compressed once per version."""
+import gzip  # Decodes the responses
+import pytest
+import response_cache  # Counts compressions of cached pages
+from compression import negotiate  # Under test
+
+SKILL = {'skill_name': 'Go', 'category': 'Languages', 'proficiency_level': 'Expert'}
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('', None),
+    ('*', 'br'),
+    ('gzip, br;q=0.5', 'br'),  # Our preference wins among accepted encodings
+    ('gzip;q=nope', None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header, ['br', 'gzip']) == expected
+
+
+def test_small_bodies_are_sent_as_they_are(make_app):
+    client = make_app(COMPRESSION_MIN_SIZE=1 << 20).test_client()
+    response = client.get('/skills', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_json_is_compressed(make_app):
+    client = make_app(COMPRESSION_MIN_SIZE=10).test_client()
+    plain = client.get('/api/skills')
+    response = client.get('/api/skills', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_cached_page_is_compressed_once_per_version(app, monkeypatch):
+    calls = []
+    real = response_cache.compress
+    monkeypatch.setattr(response_cache, 'compress', lambda data, encoding: calls.append(encoding) or real(data, encoding))
+    client = app.test_client()
+    bodies = [client.get('/skills', headers={'Accept-Encoding': 'gzip'}).data for _ in range(3)]
+    assert calls == ['gzip']
+    assert gzip.decompress(bodies[0]) == client.get('/skills').data
+    client.post('/add-skill', data=SKILL)
+    assert b'Go' in gzip.decompress(client.get('/skills', headers={'Accept-Encoding': 'gzip'}).data)
+    assert calls == ['gzip', 'gzip']  # The new version is compressed afresh
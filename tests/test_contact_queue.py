@@ -0,0 +1,43 @@
+"""The contact queue replays journals of dead workers when the app starts, without waiting for a submission."""
+import json  # Journal records
+import os  # Journal files
+import time  # Waits for the writer thread
+from db import db_connection  # Reads back the stored messages
+
+
+def stored_messages():
+    with db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.execute("SELECT tenant_id, name, email, message FROM contact ORDER BY id")
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_dead_workers_journal_is_delivered_at_start(make_app, tmp_path):
+    spill_dir = tmp_path / 'contact-queue'
+    os.makedirs(spill_dir)
+    (spill_dir / '999999-dead.lock').write_text('')  # Its owner exited, so nobody holds the lock
+    record = {'tenant_id': 1, 'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hello'}
+    (spill_dir / '999999-dead.active.jsonl').write_text(json.dumps({'seq': 1, 'record': record}) + '\n')
+
+    make_app()  # No request is made
+
+    assert wait_for(lambda: stored_messages() == [(1, 'Ada', 'ada@example.com', 'Hello')])
+    assert wait_for(lambda: not any(name.startswith('999999-dead') or 'recovered' in name for name in os.listdir(spill_dir)))
+
+
+def test_preloaded_master_leaves_the_queue_to_the_workers(make_app):
+    queue = make_app(CONTACT_QUEUE_START=False).extensions['cv']['contact_queue']
+    assert queue.stats()['queued'] == 0 and queue._pid is None
+    queue.start()  # What gunicorn.conf.py's post_worker_init does in each worker
+    assert queue._pid == os.getpid()
@@ -0,0 +1,26 @@
+"""The add/edit/delete forms: a missing id answers 404 and leaves the caches and the search index alone."""
+
+SKILL = {'skill_name': 'Kubernetes', 'category': 'Tools', 'proficiency_level': 'Expert'}
+
+
+def test_edit_and_delete_of_a_missing_id_are_404(app):
+    client = app.test_client()
+    versions = app.extensions['cv']['query_cache']
+    assert client.get('/api/search?q=kubernetes').get_json()['results'] == []  # Builds the index
+    before = versions.version('skills')
+    assert client.post('/edit-skill/9999', data=SKILL).status_code == 404
+    assert client.get('/delete-skill/9999').status_code == 404
+    assert versions.version('skills') == before
+    assert client.get('/api/search?q=kubernetes').get_json()['results'] == []
+
+
+def test_add_edit_delete(app):
+    client = app.test_client()
+    assert client.post('/add-skill', data=SKILL).status_code == 302
+    [result] = client.get('/api/search?q=kubernetes').get_json()['results']
+    row_id = result['id']
+    assert client.post(f'/edit-skill/{row_id}', data=dict(SKILL, skill_name='Nomad')).status_code == 302
+    assert b'Nomad' in client.get('/skills').data
+    assert client.get(f'/delete-skill/{row_id}').status_code == 302
+    assert client.get(f'/edit-skill/{row_id}').status_code == 404
+    assert client.get('/api/search?q=nomad').get_json()['results'] == []
@@ -0,0 +1,64 @@
+"""CV downloads: outdated renders are pruned only after a grace period, and a pruned file is rendered again."""
+import os  # Ages and removes cached files
+import time  # File ages
+import threading  # Holds a render back
+
+
+def test_prune_keeps_recent_renders_and_lock_files(make_app, tmp_path):
+    renderer = make_app(DOCUMENT_PRUNE_AFTER=60).extensions['cv']['documents']
+    directory = tmp_path / 'tenant'
+    directory.mkdir()
+    for name in ('old.md', 'old.md.lock', 'recent.md', 'current.md', 'old.pdf'):
+        (directory / name).write_bytes(b'')
+    stale = time.time() - 120
+    for name in ('old.md', 'old.md.lock', 'old.pdf'):
+        os.utime(directory / name, (stale, stale))
+    renderer._prune(str(directory), 'current', 'md')
+    assert sorted(os.listdir(directory)) == ['current.md', 'old.md.lock', 'old.pdf', 'recent.md']
+
+
+def test_missing_document_is_rendered_again(app):
+    client = app.test_client()
+    first = client.get('/cv.md')
+    assert first.status_code == 200
+    renderer = app.extensions['cv']['documents']
+    path, _ = renderer.get('md')
+    os.remove(path)  # As if another worker pruned it
+    again = client.get('/cv.md')
+    assert again.status_code == 200
+    assert again.data == first.data
+    assert os.path.exists(path)
+
+
+def test_slow_render_returns_retry_after(make_app):
+    app = make_app(DOCUMENT_RENDER_TIMEOUT=0.1)
+    renderer = app.extensions['cv']['documents']
+    release = threading.Event()
+    render = renderer._render
+
+    def slow_render(state, fmt):
+        release.wait(5)
+        return render(state, fmt)
+    renderer._render = slow_render
+    try:
+        response = app.test_client().get('/cv.md')
+    finally:
+        release.set()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_render_failure_is_logged_with_its_traceback(app, monkeypatch, capsys):
+    def broken(fmt, blocks):
+        raise RuntimeError('no fonts')
+    monkeypatch.setattr('documents.render_document', broken)
+    assert app.test_client().get('/cv.pdf').status_code == 500
+    out = err = ''
+    for _ in range(50):  # The render thread logs from its done callback, possibly just after the response
+        output = capsys.readouterr()
+        out, err = out + output.out, err + output.err
+        if 'in broken' in err:
+            break
+        time.sleep(0.02)
+    assert 'Error rendering CV document: no fonts' in out
+    assert 'Traceback' in err and 'in broken' in err
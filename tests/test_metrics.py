@@ -0,0 +1,80 @@
+"""Per-worker metric snapshots of exited workers, and one profiled request at a time."""
+import json  # Snapshot files
+import os  # Snapshot paths
+import subprocess  # A pid that is certainly gone
+import sys  # Interpreter for the short-lived process
+from flask import Flask, g  # A bare app to instrument
+from metrics import ARCHIVE, Instrumentation, mark_process_dead  # Under test
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def requests_total(text, endpoint):
+    for line in text.splitlines():
+        if line.startswith('cv_http_requests_total{') and f'endpoint="{endpoint}"' in line:
+            return int(line.rsplit(' ', 1)[1])
+    return 0
+
+
+def instrumented(tmp_path, **options):
+    app = Flask(__name__)
+    instrumentation = Instrumentation(app, **options)
+
+    @app.route('/ping')
+    def ping():
+        return {'profiled': g.profiler is not None}
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError("boom")
+    return app, instrumentation
+
+
+def test_dead_workers_are_folded_into_the_archive(tmp_path):
+    metrics_dir = tmp_path / 'metrics'
+    app, instrumentation = instrumented(tmp_path, metrics_dir=str(metrics_dir))
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/ping')
+    instrumentation._last_dump = 0
+    instrumentation._dump()  # Snapshots are written at most once a second
+    pid = dead_pid()
+    os.replace(metrics_dir / f"{os.getpid()}.json", metrics_dir / f"{pid}.json")  # Pretend those requests were served by a worker that exited
+    instrumentation.registry.counters.clear()
+    instrumentation.registry.histograms.clear()
+    client.get('/ping')
+
+    assert requests_total(instrumentation.render(), 'ping') == 4
+    assert not (metrics_dir / f"{pid}.json").exists()
+    assert (metrics_dir / ARCHIVE).exists()
+    assert requests_total(instrumentation.render(), 'ping') == 4  # Folded once, not again on the next scrape
+    assert sorted(os.listdir(metrics_dir)) == sorted(['.lock', ARCHIVE, f"{os.getpid()}.json"])
+
+
+def test_mark_process_dead_adds_to_the_archive(tmp_path):
+    snapshot = {'counters': [['cv_http_requests_total', [['endpoint', 'ping']], 2]], 'histograms': []}
+    for pid in (dead_pid(), dead_pid()):
+        (tmp_path / f"{pid}.json").write_text(json.dumps(snapshot))
+        mark_process_dead(str(tmp_path), pid)
+        mark_process_dead(str(tmp_path), pid)  # From child_exit and a sweep: counted once
+    archive = json.loads((tmp_path / ARCHIVE).read_text())
+    assert archive['counters'] == [['cv_http_requests_total', [['endpoint', 'ping']], 4]]
+
+
+def test_only_one_request_is_profiled_at_a_time(tmp_path, capsys):
+    app, instrumentation = instrumented(tmp_path, profiling=True)
+    client = app.test_client()
+    assert instrumentation._profile_lock.acquire(blocking=False)  # A profiled request is in progress
+    response = client.get('/ping?_profile=1')
+    assert response.status_code == 200 and response.json == {'profiled': False}
+    instrumentation._profile_lock.release()
+
+    assert client.get('/ping?_profile=1').json == {'profiled': True}
+    assert 'function calls' in capsys.readouterr().out
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    assert client.get('/fail?_profile=1').status_code == 500
+    assert instrumentation._profile_lock.acquire(blocking=False)  # Released even though the view raised
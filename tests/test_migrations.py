@@ -0,0 +1,48 @@
+"""Migration files: splitting them into statements, and the order they run in."""
+import re  # Finds index definitions
+from migrations import Migration, load_migrations  # Under test
+
+
+def statements(tmp_path, sql):
+    path = tmp_path / '0001_test.sql'
+    path.write_bytes(sql.encode())
+    return Migration(1, 'test', str(path)).statements()
+
+
+def test_semicolons_inside_literals_and_comments_do_not_split(tmp_path):
+    sql = (
+        "-- Seed rows; the comment has a semicolon\n"
+        "INSERT INTO skills (skill_name) VALUES ('C; C++');  -- trailing; comment\n"
+        "UPDATE skills\n"
+        "    SET category = 'a;b'\n"
+        "    WHERE id = 1;\n"
+        "DELETE FROM skills WHERE id = 2"
+    )
+    assert statements(tmp_path, sql) == [
+        "INSERT INTO skills (skill_name) VALUES ('C; C++')",
+        "UPDATE skills\n    SET category = 'a;b'\n    WHERE id = 1",
+        "DELETE FROM skills WHERE id = 2",
+    ]
+
+
+def test_crlf_files(tmp_path):
+    assert statements(tmp_path, "SELECT 1;\r\nSELECT ';';\r\n") == ["SELECT 1", "SELECT ';'"]
+
+
+def test_shipped_migrations_split_into_single_statements():
+    for migration in load_migrations():
+        for statement in migration.statements():
+            assert statement.rstrip().endswith(';') is False
+            assert statement.split()[0].upper() in ('CREATE', 'ALTER', 'INSERT', 'UPDATE', 'DROP'), (migration.path, statement)
+
+
+def test_column_types_are_converted_before_anything_indexes_them():
+    migrations = load_migrations()
+    [convert] = [migration for migration in migrations if migration.name == 'convert_column_types']
+    indexing = [migration for migration in migrations if re.search(r'\b(CREATE|ADD) (UNIQUE )?(INDEX|KEY)\b', migration.sql)]
+    assert indexing and all(convert.version < migration.version for migration in indexing)
+    statements = convert.statements()
+    for n, statement in enumerate(statements):
+        blanked = re.match(r"UPDATE (\w+) SET (\w+) = NULL", statement)
+        if blanked:  # Strict mode refuses the NULL unless the column was made nullable just before
+            assert re.fullmatch(rf"ALTER TABLE {blanked[1]} MODIFY {blanked[2]} VARCHAR\(\d+\) NULL", statements[n - 1])
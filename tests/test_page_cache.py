@@ -0,0 +1,45 @@
+"""The page cache: ETags and Last-Modified from table versions, and 304s that skip the view."""
+import time  # Last-Modified has one-second resolution
+
+SKILL = {'skill_name': 'Go', 'category': 'Languages', 'proficiency_level': 'Expert'}
+
+
+def test_unchanged_page_answers_304(app):
+    client = app.test_client()
+    page_cache = app.extensions['cv']['page_cache']
+    first = client.get('/skills')
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'public, no-cache'
+    etag, last_modified = first.headers['ETag'], first.headers['Last-Modified']
+    misses = page_cache.misses
+    assert client.get('/skills', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/skills', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/skills').status_code == 200
+    assert page_cache.misses == misses  # Served from the store without running the view
+    assert page_cache.not_modified == 2
+
+
+def test_write_changes_the_etag(app):
+    client = app.test_client()
+    etag = client.get('/skills').headers['ETag']
+    time.sleep(1.1)  # So Last-Modified moves too
+    client.post('/add-skill', data=SKILL)
+    response = client.get('/skills', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag and b'Go' in response.data
+    assert client.get('/projects', headers={'If-None-Match': client.get('/projects').headers['ETag']}).status_code == 304  # Other tables keep theirs
+
+
+def test_error_pages_are_not_cached(app):
+    client = app.test_client()
+    assert client.get('/api/skills?limit=ten').status_code == 400
+    assert 'ETag' not in client.get('/api/skills?limit=ten').headers
+
+
+def test_compressed_variant_has_its_own_etag_and_revalidates(app):
+    client = app.test_client()
+    plain = client.get('/skills')
+    gzipped = client.get('/skills', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    assert client.get('/skills', headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped.headers['ETag']}).status_code == 304
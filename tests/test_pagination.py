@@ -0,0 +1,95 @@
+"""Keyset pagination: every row exactly once in either direction, NULLs where MySQL sorts them, and Previous links."""
+import pytest  # Parametrised cases
+from pagination import InvalidPageRequest, Listing, PageRequest, encode_cursor  # Under test
+
+EDUCATION = Listing(
+    'education', ['school', 'achievement', 'start_year', 'end_year', 'id'],
+    sorts=('school', 'start_year', 'end_year'),
+    filters={'from_year': ('(end_year >= %s OR end_year IS NULL)', int)},
+    nullable=('end_year',),
+)
+ROWS = 23  # Not a multiple of the page size, so the last page is short
+PAGE_SIZE = 5
+
+
+@pytest.fixture
+def education(connection):
+    """Seed rows with repeated sort values and a NULL end year on every fourth row."""
+    cursor = connection.cursor()
+    cursor.executemany(
+        "INSERT INTO education (tenant_id, school, achievement, start_year, end_year) VALUES (%s, %s, %s, %s, %s)",
+        [(1, f"School {n % 7}", f"Degree {n}", 1990 + n % 5, None if n % 4 == 0 else 2000 + n % 3) for n in range(ROWS)],
+    )
+    cursor.execute("INSERT INTO education (tenant_id, school, achievement, start_year, end_year) VALUES (2, 'Other', 'x', 1990, 2000)")
+    connection.commit()
+    cursor.execute("SELECT school, achievement, start_year, end_year, id FROM education WHERE tenant_id = 1")
+    return cursor.fetchall()
+
+
+def fetch(connection, args):
+    page_request = PageRequest(EDUCATION, args, page_size=PAGE_SIZE)
+    cursor = connection.cursor()
+    cursor.execute(*page_request.query())
+    return page_request.page(cursor.fetchall())
+
+
+def expected_order(rows, sort, descending):
+    """MySQL's order: NULL before every value ascending, after every value descending; ties by id."""
+    index = EDUCATION.columns.index(sort)
+    ordered = sorted(rows, key=lambda row: (row[index] is not None, row[index] or 0, row[-1]) if sort != 'school' else (row[index], row[-1]))
+    return [row[-1] for row in (reversed(ordered) if descending else ordered)]
+
+
+@pytest.mark.parametrize('sort', ['id', 'school', 'start_year', 'end_year'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_next_and_previous_links_visit_every_row_once(connection, education, sort, order):
+    args = {'sort': sort, 'order': order}
+    forward = []
+    page = fetch(connection, args)
+    assert page.prev_args is None  # The first page has no Previous link
+    while True:
+        forward.append([row[-1] for row in page.rows])
+        if page.next_args is None:
+            break
+        page = fetch(connection, page.next_args)
+    assert [row_id for rows in forward for row_id in rows] == expected_order(education, sort, order == 'desc')
+    assert [len(rows) for rows in forward] == [PAGE_SIZE] * (ROWS // PAGE_SIZE) + [ROWS % PAGE_SIZE]
+
+    backward = []
+    while page.prev_args is not None:  # From the last page back to the first
+        page = fetch(connection, page.prev_args)
+        assert page.next_args is not None  # A page reached through Previous always has a Next link
+        backward.append([row[-1] for row in page.rows])
+    assert backward[::-1] == forward[:-1]
+
+
+def test_stream_matches_page(connection, education):
+    args = {'sort': 'end_year', 'order': 'desc'}
+    first = fetch(connection, args)
+    page_request = PageRequest(EDUCATION, first.next_args, page_size=PAGE_SIZE)
+    cursor = connection.cursor()
+    cursor.execute(*page_request.query())
+    rows = cursor.fetchall()
+    streamed = page_request.stream(iter(rows))
+    assert list(streamed.rows) == page_request.page(rows).rows
+    assert (streamed.next_args, streamed.prev_args) == (page_request.page(rows).next_args, page_request.page(rows).prev_args)
+
+
+def test_filter_keeps_ongoing_rows(connection, education):
+    page = fetch(connection, {'from_year': '2002', 'limit': '100'})
+    assert {row[-1] for row in page.rows} == {row[-1] for row in education if row[3] is None or row[3] >= 2002}
+
+
+@pytest.mark.parametrize('args', [
+    {'sort': 'achievement'}, {'after': 'not a cursor'}, {'limit': '0'}, {'limit': 'ten'}, {'from_year': 'soon'},
+    {'sort': 'school', 'after': encode_cursor([1, 2], 1)}, {'sort': 'school', 'before': encode_cursor({'a': 1}, 1)},
+    {'sort': 'school', 'after': encode_cursor(True, 1)}, {'after': encode_cursor('x', [1])},
+])
+def test_invalid_requests(args):
+    with pytest.raises(InvalidPageRequest):
+        PageRequest(EDUCATION, args)
+
+
+def test_crafted_cursor_is_400_not_500(app):
+    response = app.test_client().get(f"/api/skills?sort=category&after={encode_cursor([1, 2], 1)}")
+    assert response.status_code == 400
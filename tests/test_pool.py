@@ -0,0 +1,89 @@
+"""The connection pool: checkout timeouts, overflow, recycling, the pre-ping and the prepared-statement cache."""
+import time  # Ages connections and times the checkout timeout
+import mysql.connector  # Errors a dead connection raises
+import pytest
+from db import Connection, ConnectionPool, PoolTimeout  # Under test
+
+
+@pytest.fixture
+def make_pool(db_path):
+    pools = []
+
+    def make(**options):
+        pool = ConnectionPool({}, **options)
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.dispose()
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted(make_pool):
+    pool = make_pool(size=1, max_overflow=0, timeout=0.1)
+    held = pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.1
+    assert pool.stats.timeouts == 1
+    pool.release(held)
+    assert pool.acquire() is held  # Reused, not reopened
+    assert (pool.stats.misses, pool.stats.hits) == (1, 1)
+
+
+def test_overflow_connections_are_closed_on_return(make_pool):
+    pool = make_pool(size=1, max_overflow=1, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool._idle.qsize() == 1 and pool._opened == 1
+
+
+def test_old_connections_are_recycled(make_pool):
+    pool = make_pool(size=1, recycle=60)
+    pooled = pool.acquire()
+    pool.release(pooled)
+    pooled.created_at -= 61
+    fresh = pool.acquire()
+    assert fresh is not pooled
+    assert pool.stats.recycled == 1 and pool._opened == 1
+
+
+def test_dead_connections_are_replaced_after_the_pre_ping(make_pool):
+    pool = make_pool(size=1, pre_ping=True)
+    pooled = pool.acquire()
+    pool.release(pooled)
+
+    def dead(**kwargs):
+        raise mysql.connector.errors.OperationalError(msg="MySQL server has gone away")
+    pooled.connection.ping = dead
+    assert pool.acquire() is not pooled
+    assert pool.stats.stale == 1
+
+
+def test_open_transactions_are_rolled_back_on_return(make_pool):
+    pool = make_pool(size=1)
+    pooled = pool.acquire()
+    cursor = pooled.connection.cursor()
+    cursor.execute("INSERT INTO skills (tenant_id, skill_name, category, proficiency_level) VALUES (1, 'Go', 'Languages', 'Expert')")
+    pool.release(pooled)
+    cursor = pool.acquire().connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM skills")
+    assert cursor.fetchall() == [(0,)]
+
+
+def test_prepared_statements_are_cached_per_connection(make_pool):
+    pool = make_pool(size=1, statement_cache_size=2)
+    pooled = pool.acquire()
+    connection = Connection(pooled, pool, None)
+    first = connection.prepared("SELECT %s")
+    assert connection.prepared("SELECT %s").cursor is first.cursor  # Reused, not prepared again
+    assert first.execute((7,)).fetchall() == [(7,)]
+    connection.prepared("SELECT %s + 1")
+    connection.prepared("SELECT %s + 2")  # Over the cache size: the oldest statement goes
+    assert list(pooled.statements) == ["SELECT %s + 1", "SELECT %s + 2"]
+    stats = pool.stats
+    assert (stats.statement_hits, stats.statement_misses, stats.statement_evictions) == (1, 3, 1)
+    pool.release(pooled)
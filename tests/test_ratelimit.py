@@ -0,0 +1,46 @@
+"""Token buckets: refill, rejection, and a refused request taking no token from any bucket."""
+import pytest
+from ratelimit import SharedBuckets, parse_rate
+
+
+@pytest.fixture
+def buckets(tmp_path):
+    return SharedBuckets(str(tmp_path / 'rate-limits'), slots=64)
+
+
+def test_parse_rate():
+    assert parse_rate('10/minute') == (10 / 60, 10)
+    assert parse_rate('100/hour burst 20') == (100 / 3600, 20)
+    assert parse_rate(' ') is None
+    for value in ('0/minute', '5/minute burst 0', '5/0 minutes', 'often'):
+        with pytest.raises(ValueError):
+            parse_rate(value)
+
+
+def test_bucket_refills_at_the_rate(buckets):
+    rate, burst = parse_rate('60/minute burst 3')
+    assert [buckets.take('ip', rate, burst, now=100.0) for _ in range(3)] == [0, 0, 0]
+    assert buckets.take('ip', rate, burst, now=100.0) == pytest.approx(1.0)
+    assert buckets.take('ip', rate, burst, now=100.5) == pytest.approx(0.5)  # Refused requests take nothing
+    assert buckets.take('ip', rate, burst, now=101.0) == 0
+    assert buckets.take('ip', rate, burst, now=101.0) == pytest.approx(1.0)
+    assert [buckets.take('ip', rate, burst, now=200.0) for _ in range(4)] == [0, 0, 0, pytest.approx(1.0)]  # Refilled up to the burst only
+    assert buckets.take('other', rate, burst, now=100.0) == 0  # Keys are independent
+
+
+def test_refusal_takes_from_no_bucket(buckets):
+    ip, route = ('ip', 1.0, 5), ('route', 1.0, 1)
+    assert buckets.take_all([ip, route], now=0.0) == [0, 0]
+    waits = buckets.take_all([ip, route], now=0.0)
+    assert waits[0] == 0 and waits[1] == pytest.approx(1.0)
+    assert [buckets.take('ip', 1.0, 5, now=0.0) for _ in range(5)] == [0, 0, 0, 0, pytest.approx(1.0)]  # Four left, not three
+
+
+def test_route_returns_429_with_retry_after(make_app):
+    app = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMIT_CONTACT='1/minute', RATE_LIMIT_CONTACT_ROUTE='')
+    client = app.test_client()
+    form = {'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hello'}
+    assert client.post('/contact', data=form).status_code != 429
+    response = client.post('/contact', data=form)
+    assert response.status_code == 429
+    assert 55 <= int(response.headers['Retry-After']) <= 60
@@ -0,0 +1,43 @@
+"""Read replicas: reads go to a replica unless the table or the session wrote within the window."""
+import pytest
+import db  # The replica set and its health check
+
+SKILL = {'skill_name': 'Go', 'category': 'Languages', 'proficiency_level': 'Expert'}
+
+
+@pytest.fixture
+def replica_app(make_app, monkeypatch):
+    monkeypatch.setattr(db.ReplicaSet, 'check', lambda self, replica: self._mark(replica, True, 0, None))  # The shim has no replication status
+    return make_app(DB_REPLICAS=['replica-1'])
+
+
+def replica_reads():
+    return db.get_replicas().replicas[0].reads
+
+
+def test_reads_go_to_the_replica(replica_app):
+    assert replica_app.test_client().get('/skills').status_code == 200
+    assert replica_reads() == 1
+
+
+def test_writes_pin_the_table_and_the_session_to_the_primary(replica_app):
+    writer = replica_app.test_client()
+    response = writer.post('/add-skill', data=SKILL)
+    assert response.status_code == 302
+    assert 'db_primary_until=' in response.headers['Set-Cookie']
+
+    assert b'Go' in replica_app.test_client().get('/skills').data  # Another session, but skills was just written
+    assert replica_reads() == 0
+    replica_app.test_client().get('/education')  # Not written: the replica may answer
+    assert replica_reads() == 1
+    writer.get('/projects')  # The writing session reads its own writes everywhere
+    assert replica_reads() == 1
+
+
+def test_rate_limited_request_does_not_inherit_the_last_write(make_app, monkeypatch):
+    monkeypatch.setattr(db.ReplicaSet, 'check', lambda self, replica: self._mark(replica, True, 0, None))
+    app = make_app(DB_REPLICAS=['replica-1'], RATE_LIMIT_ENABLED=True, RATE_LIMIT_WRITES='1/minute')
+    assert 'db_primary_until=' in app.test_client().post('/add-skill', data=SKILL).headers['Set-Cookie']
+    response = app.test_client().post('/add-skill', data=SKILL)
+    assert response.status_code == 429
+    assert 'Set-Cookie' not in response.headers
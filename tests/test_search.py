@@ -0,0 +1,55 @@
+"""The search index: kept in step with edits, and one tenant's load never holds up another's searches."""
+import threading  # The slow load runs beside the search
+from db import db_connection  # Seeds rows
+from tenants import set_tenant  # Searches as one tenant, then another
+
+
+def add_skill(tenant_id, name):
+    with db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.execute("INSERT INTO skills (tenant_id, skill_name, category, proficiency_level) VALUES (%s, %s, %s, %s)",
+                       (tenant_id, name, 'Languages', 'Expert'))
+        mydb.commit()
+        cursor.close()
+
+
+def test_search_follows_edits(app):
+    client = app.test_client()
+    assert client.get('/api/search?q=haskell').get_json()['results'] == []
+    response = client.post('/add-skill', data={'skill_name': 'Haskell', 'category': 'Languages', 'proficiency_level': 'Expert'})
+    assert response.status_code == 302
+    results = client.get('/api/search?q=haskell').get_json()['results']
+    assert [result['section'] for result in results] == ['skills']
+
+
+def test_tenant_load_does_not_block_other_tenants(app):
+    index = app.extensions['cv']['search_index']
+    add_skill(1, 'Rust')
+    add_skill(2, 'Erlang')
+    set_tenant(1)
+    index.warm()
+    loading, release = threading.Event(), threading.Event()
+    fetch = index._fetch
+
+    def slow_fetch(table):
+        loading.set()
+        release.wait(5)
+        return fetch(table)
+    index._fetch = slow_fetch
+    found = {}
+
+    def search_tenant_two():
+        set_tenant(2)
+        found[2] = index.search('erlang')
+    thread = threading.Thread(target=search_tenant_two)
+    thread.start()
+    try:
+        assert loading.wait(5)
+        set_tenant(1)
+        assert [result['id'] for result in index.search('rust')]  # Answered while tenant 2 is still loading
+        assert thread.is_alive()
+    finally:
+        release.set()
+        thread.join(5)
+        set_tenant(1)
+    assert [result['section'] for result in found[2]] == ['skills']
@@ -0,0 +1,45 @@
+"""The static export: every page is written once, and an edit re-renders only the pages showing the edited table."""
+import os  # Page files and their mtimes
+
+SKILL = {'skill_name': 'Kubernetes', 'category': 'Tools', 'proficiency_level': 'Expert'}
+
+
+def snapshot(output):
+    files = {}
+    for root, dirs, names in os.walk(output):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, output)] = (os.stat(path).st_mtime_ns, f.read())
+    return files
+
+
+def test_export_writes_every_page_and_its_variants(make_app, tmp_path):
+    output = tmp_path / 'export'
+    app = make_app(STATIC_EXPORT_DIR=str(output))
+    static_export = app.extensions['cv']['static_export']
+    copied, written = static_export.export()
+    assert copied and written == len(static_export.pages)
+    assert static_export.errors == 0
+    for path in ['index.html', 'skills.html', 'skills.html.gz', 'projects.html']:
+        assert (output / path).is_file()
+
+    assert static_export.export() == (0, 0)  # Nothing changed: no files rewritten
+    assert static_export.unchanged == len(static_export.pages)
+
+
+def test_edit_rebuilds_only_the_affected_page(make_app, tmp_path):
+    output = tmp_path / 'export'
+    app = make_app(STATIC_EXPORT_DIR=str(output), STATIC_EXPORT_DEBOUNCE=0)
+    static_export = app.extensions['cv']['static_export']
+    static_export.export()
+    before = snapshot(output)
+
+    assert app.test_client().post('/add-skill', data=SKILL).status_code == 302
+    static_export.close()  # Waits for the pending rebuild
+    after = snapshot(output)
+
+    changed = {path for path in after if after[path] != before.get(path)}
+    assert changed == {'skills.html', 'skills.html.gz'} | ({'skills.html.br'} if 'skills.html.br' in after else set())
+    assert b'Kubernetes' in after['skills.html'][1]
+    assert static_export.errors == 0
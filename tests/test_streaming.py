@@ -0,0 +1,52 @@
+"""Streamed listings: rows are rendered while they are fetched, and the connection goes back when the stream ends."""
+import re  # Pulls the rows out of the page
+import pytest
+from db import db_connection, get_pool  # Seeds rows; checks connections are returned
+
+NAMES = [f"Skill {n:02d}" for n in range(12)]
+
+
+@pytest.fixture
+def stream_app(make_app):
+    app = make_app(STREAM_ROUTES={'skills'}, STREAM_BATCH_SIZE=3)
+    with db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.executemany("INSERT INTO skills (tenant_id, skill_name, category, proficiency_level) VALUES (1, %s, 'Tools', 'Basic')", [(name,) for name in NAMES])
+        mydb.commit()
+        cursor.close()
+    return app
+
+
+def names(html):
+    return re.findall(r'Skill \d\d', html)
+
+
+def test_listing_is_streamed_in_order(stream_app, make_app):
+    client = stream_app.test_client()
+    response = client.get('/skills?sort=skill_name&limit=5', buffered=False)
+    assert response.is_streamed
+    chunks = [chunk for chunk in response.response]
+    response.close()
+    assert len(chunks) > 1  # Sent as it was rendered, not in one piece
+    html = b''.join(chunks).decode()
+    assert names(html) == NAMES[:5]
+    assert 'after=' in html  # Next link, filled in once the rows were read
+
+    second = client.get(re.search(r'href="([^"]*after=[^"]*)"', html)[1].replace('&amp;', '&')).get_data(as_text=True)
+    assert names(second) == NAMES[5:10]
+
+
+def test_stream_matches_the_buffered_page(stream_app, make_app):
+    streamed = stream_app.test_client().get('/skills?limit=100').get_data(as_text=True)
+    buffered = make_app().test_client().get('/skills?limit=100').get_data(as_text=True)
+    assert names(streamed) == names(buffered) == NAMES
+
+
+def test_connection_is_returned_when_the_client_stops_reading(stream_app):
+    pool = get_pool()
+    idle = pool._idle.qsize()
+    response = stream_app.test_client().get('/skills?limit=100', buffered=False)
+    next(iter(response.response))  # Read a little, then hang up
+    response.close()
+    assert pool._idle.qsize() == max(idle, 1)
+    assert pool._opened == pool._idle.qsize()
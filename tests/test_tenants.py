@@ -0,0 +1,47 @@
+"""Path-mode tenants: every link on a tenant's pages stays inside that tenant."""
+import re  # Pulls the links out of the pages
+from db import db_connection  # Creates the tenant
+
+LINK = re.compile(r'(?:href|action)="([^"]+)"')
+
+
+def create_tenant(slug):
+    with db_connection() as mydb:
+        cursor = mydb.cursor()
+        cursor.execute("INSERT INTO tenants (slug, name) VALUES (%s, %s)", (slug, slug.title()))
+        mydb.commit()
+        cursor.close()
+
+
+def local_links(html):
+    return [link for link in LINK.findall(html) if not link.startswith(('http://', 'https://', '#'))]
+
+
+def test_nav_links_keep_the_tenant_in_path_mode(make_app):
+    app = make_app(TENANT_MODE='path')
+    create_tenant('alice')
+    client = app.test_client()
+    seen, pending = set(), ['/alice/skills']
+    while pending:
+        path = pending.pop()
+        seen.add(path)
+        response = client.get(path)
+        assert response.status_code == 200, path
+        if not response.mimetype == 'text/html':
+            continue
+        for link in local_links(response.get_data(as_text=True)):
+            if link.startswith('/static/'):
+                continue  # Shared by every tenant
+            assert link.startswith('/alice/'), f"{path} links to {link}"
+            link = link.split('?', 1)[0]
+            if link not in seen and not link.startswith(('/alice/delete-', '/alice/cv.')):
+                pending.append(link)
+    assert {'/alice/', '/alice/personal-info', '/alice/education', '/alice/work-experience', '/alice/skills',
+            '/alice/projects', '/alice/search', '/alice/contact'} <= seen
+
+
+def test_unknown_tenant_and_bare_paths_are_not_found(make_app):
+    client = make_app(TENANT_MODE='path').test_client()
+    create_tenant('alice')
+    assert client.get('/bob/skills').status_code == 404
+    assert client.get('/').status_code == 404
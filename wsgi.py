@@ -1,5 +1,16 @@
 import os
-from app import app
+
+if os.getenv('SERVER_MODE') == 'async':
+    from gevent import monkey  # Must patch sockets, threads and locks before anything else is imported
+    monkey.patch_all()
+
+from app import create_app
+
+app = create_app()  # Once per worker, or once in the gunicorn master with --preload
 
 if __name__ == "__main__":
-    app.run()
+    if os.getenv('SERVER_MODE') == 'async':
+        from gevent.pywsgi import WSGIServer  # Cooperative server for running without gunicorn
+        WSGIServer(('0.0.0.0', int(os.getenv('PORT', '8000'))), app).serve_forever()
+    else:
+        app.run()